@@ -0,0 +1,35 @@
+"""
+Shared helpers for batch lookup endpoints
+"""
+from typing import List
+from uuid import UUID
+
+from fastapi import HTTPException, Query, status
+
+from app.core.config import settings
+
+OK = "ok"
+NOT_FOUND = "not_found"
+FORBIDDEN = "forbidden"
+
+
+def batch_ids(ids: str = Query(..., description="Comma-separated ids")) -> List[UUID]:
+    """Parse ``?ids=a,b,c`` keeping request order (duplicates are allowed)"""
+    parts = [part.strip() for part in ids.split(",") if part.strip()]
+    if not parts:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must contain at least one id"
+        )
+    if len(parts) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.BATCH_MAX_IDS} ids per request"
+        )
+    try:
+        return [UUID(part) for part in parts]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be UUIDs"
+        )
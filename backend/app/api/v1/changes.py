@@ -0,0 +1,48 @@
+"""
+Cursor handling for delta-sync endpoints
+
+Cursors are opaque to clients: ``?since=`` takes the ``cursor`` of the
+previous response, and no ``since`` means a full sync.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query, status
+
+from app.services.change_feed import Cursor, cursor_expired
+
+
+def encode_cursor(cursor: Optional[Cursor]) -> Optional[str]:
+    if cursor is None:
+        return None
+    raw = f"{cursor[0]}|{cursor[1]}|{cursor[2].isoformat()}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def since_param(
+    since: Optional[str] = Query(None, description="Cursor from the previous response; omit for a full sync")
+) -> Optional[Cursor]:
+    if not since:
+        return None
+    try:
+        parts = base64.urlsafe_b64decode(since + "=" * (-len(since) % 4)).decode().split("|")
+        # (timestamp, id) cursors from before commit-ordered feeds can't be mapped to a position
+        legacy = len(parts) == 2
+        if not legacy:
+            change_xid, change_seq, issued_at = parts
+            cursor = (int(change_xid), int(change_seq), datetime.fromisoformat(issued_at))
+            if cursor[2].tzinfo is None:
+                raise ValueError("naive timestamp")
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cursor"
+        )
+    if legacy or cursor_expired(cursor):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Cursor expired; resync without since"
+        )
+    return cursor
@@ -3,17 +3,22 @@ Admin endpoints - Event creation and registration management
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
+from datetime import datetime, timezone
 
+from app.api.v1.fields import EVENT_LIST_FIELDS, event_projection, fields_param, registration_projection
 from app.core.database import get_db
 from app.core.rbac import require_admin
 from app.models.user import User
 from app.models.event import Event
 from app.models.registration import Registration
-from app.schemas.event import EventCreate, EventUpdate, EventResponse
-from app.schemas.registration import RegistrationResponse, RegistrationUpdate
+from app.schemas.checkin import CheckinBatch, CheckinBatchResponse, TicketKey, TicketKeysResponse
+from app.schemas.event import EventCreate, EventUpdate, EventResponse, EventPartialResponse
+from app.schemas.registration import RegistrationResponse, RegistrationUpdate, RegistrationPartialResponse
 from app.services.audit import log_admin_action
+from app.services.tickets import ALGORITHM, record_checkins, signer
+from app.services.waitlist import apply_status_change, fill_from_waitlist
 
 router = APIRouter()
 
@@ -82,6 +87,14 @@ async def update_event(
     for field, value in update_data.items():
         setattr(event, field, value)
     
+    # Moving the deadline reopens (or closes) registration
+    if "registration_deadline" in update_data:
+        event.registration_open = event.registration_deadline > datetime.now(timezone.utc)
+    
+    # Raising capacity admits people from the waitlist
+    if "max_participants" in update_data:
+        fill_from_waitlist(db, event)
+    
     db.commit()
     db.refresh(event)
     
@@ -103,34 +116,33 @@ async def update_event(
     return EventResponse(**event_dict)
 
 
-@router.get("/events/my-events", response_model=List[EventResponse])
+@router.get("/events/my-events", response_model=List[EventPartialResponse], response_model_exclude_unset=True)
 async def get_my_events(
+    fields: Optional[str] = Depends(fields_param),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get events created by current admin"""
-    query = db.query(Event).filter(Event.created_by == current_user.id)
+    selected = event_projection.select(fields, EVENT_LIST_FIELDS)
+    query = db.query(Event).options(*event_projection.options(selected))
     
     # Developers can see all events
-    if current_user.role == "developer":
-        query = db.query(Event)
+    if current_user.role != "developer":
+        query = query.filter(Event.created_by == current_user.id)
     
     events = query.order_by(Event.created_at.desc()).all()
     
-    result = []
-    for event in events:
-        event_dict = {
-            **event.__dict__,
-            "creator_name": event.creator.full_name if event.creator else None
-        }
-        result.append(EventResponse(**event_dict))
-    
-    return result
+    return [event_projection.item(event, selected) for event in events]
 
 
-@router.get("/events/{event_id}/registrations", response_model=List[RegistrationResponse])
+@router.get(
+    "/events/{event_id}/registrations",
+    response_model=List[RegistrationPartialResponse],
+    response_model_exclude_unset=True
+)
 async def get_event_registrations(
     event_id: UUID,
+    fields: Optional[str] = Depends(fields_param),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -150,20 +162,15 @@ async def get_event_registrations(
             detail="You can only view registrations for events you created"
         )
     
-    registrations = db.query(Registration).filter(
+    # Moderators review the form answers here, so form_data stays in the default set
+    selected = registration_projection.select(fields, registration_projection.fields)
+    registrations = db.query(Registration).options(
+        *registration_projection.options(selected, provided=["event_title"])
+    ).filter(
         Registration.event_id == event_id
     ).order_by(Registration.created_at.desc()).all()
     
-    result = []
-    for reg in registrations:
-        reg_dict = {
-            **reg.__dict__,
-            "event_title": event.title,
-            "user_name": reg.user.full_name if reg.user else None
-        }
-        result.append(RegistrationResponse(**reg_dict))
-    
-    return result
+    return [registration_projection.item(reg, selected, event_title=event.title) for reg in registrations]
 
 
 @router.patch("/registrations/{registration_id}", response_model=RegistrationResponse)
@@ -197,13 +204,7 @@ async def update_registration_status(
         )
     
     old_status = registration.status
-    registration.status = registration_data.status
-    
-    # Update event participant count
-    if registration_data.status == "accepted" and old_status != "accepted":
-        registration.event.current_participants += 1
-    elif old_status == "accepted" and registration_data.status != "accepted":
-        registration.event.current_participants = max(0, registration.event.current_participants - 1)
+    promoted = apply_status_change(db, registration, registration_data.status)
     
     db.commit()
     db.refresh(registration)
@@ -219,7 +220,8 @@ async def update_registration_status(
             "old_status": old_status,
             "new_status": registration_data.status,
             "event_id": str(registration.event_id),
-            "user_id": str(registration.user_id)
+            "user_id": str(registration.user_id),
+            "promoted_from_waitlist": [str(r.id) for r in promoted]
         },
         request=request
     )
@@ -230,3 +232,62 @@ async def update_registration_status(
         "user_name": registration.user.full_name if registration.user else None
     }
     return RegistrationResponse(**reg_dict)
+
+
+@router.get("/tickets/keys", response_model=TicketKeysResponse)
+async def get_ticket_keys(
+    current_user: User = Depends(require_admin)
+):
+    """Public keys for verifying tickets offline on scanners"""
+    return TicketKeysResponse(
+        algorithm=ALGORITHM,
+        active_kid=signer.active_kid,
+        keys=[TicketKey(kid=kid, public_key=key) for kid, key in signer.public_keys_raw().items()]
+    )
+
+
+@router.post("/events/{event_id}/checkins/batch", response_model=CheckinBatchResponse)
+def sync_checkins(
+    event_id: UUID,
+    batch: CheckinBatch,
+    request: Request,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Upload ticket scans made at the door; each registration is checked in once across all gates"""
+    # A plain def: verifying a full batch of signatures runs in the threadpool, not on the event loop
+    event = db.query(Event).filter(Event.id == event_id).first()
+    
+    if not event:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    
+    # Admins can only check in attendees of their own events
+    if current_user.role == "admin" and event.created_by != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only check in attendees of events you created"
+        )
+    
+    result = record_checkins(db, event.id, batch.scans, current_user.id)
+    
+    # Log action
+    log_admin_action(
+        db=db,
+        admin_id=current_user.id,
+        action_type="checkins_synced",
+        target_type="event",
+        target_id=event.id,
+        details={
+            "scans": len(batch.scans),
+            "checked_in": result.checked_in,
+            "duplicates": result.duplicates,
+            "rejected": result.rejected,
+            "gates": sorted({scan.gate for scan in batch.scans if scan.gate}),
+        },
+        request=request
+    )
+    
+    return result
@@ -1,16 +1,24 @@
 """
 Authentication endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
+from typing import List
+from uuid import UUID
 
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token, get_password_hash
+from app.core.rbac import require_client
+from app.core.security import (
+    verify_password, create_access_token, decode_access_token, get_password_hash, oauth2_scheme
+)
 from app.core.config import settings
 from app.models.user import User
+from app.models.user_session import UserSession
+from app.schemas.session import RefreshRequest, SessionResponse
 from app.schemas.user import UserCreate, UserResponse, Token
+from app.services import sessions
 
 router = APIRouter()
 
@@ -49,6 +57,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -68,20 +77,90 @@ async def login(
             detail="User account is inactive"
         )
     
-    # Create access token
+    session, refresh_token = sessions.create_session(db, user, request)
+    return _token_response(user, session, refresh_token)
+
+
+def _token_response(user: User, session: UserSession, refresh_token: str) -> dict:
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id), "role": user.role},
+        data={"sub": str(user.id), "role": user.role, "sid": str(session.id)},
         expires_delta=access_token_expires
     )
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
+        "expires_in": int(access_token_expires.total_seconds()),
+        "refresh_token": refresh_token,
         "user": user
     }
 
 
+@router.post("/refresh", response_model=Token)
+def refresh(
+    refresh_data: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """Exchange a refresh token for a new access token and a new refresh token (no password check)"""
+    session, user, refresh_token = sessions.rotate(db, refresh_data.refresh_token)
+    return _token_response(user, session, refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    refresh_data: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """End the session a refresh token belongs to"""
+    session = sessions.session_for_token(db, refresh_data.refresh_token)
+    if session is not None:
+        sessions.revoke(db, session, "logout")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/sessions", response_model=List[SessionResponse])
+def get_sessions(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(require_client),
+    db: Session = Depends(get_db)
+):
+    """Active sessions (signed-in devices) of the current user"""
+    current_sid = (decode_access_token(token) or {}).get("sid")
+    user_sessions = db.query(UserSession).filter(
+        UserSession.user_id == current_user.id,
+        UserSession.revoked_at.is_(None),
+        UserSession.expires_at > datetime.now(timezone.utc)
+    ).order_by(UserSession.created_at.desc()).all()
+    
+    return [
+        SessionResponse(**{**s.__dict__, "current": str(s.id) == current_sid})
+        for s in user_sessions
+    ]
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_session(
+    session_id: UUID,
+    current_user: User = Depends(require_client),
+    db: Session = Depends(get_db)
+):
+    """Sign a device out; its refresh token stops working (issued access tokens run until they expire)"""
+    session = db.query(UserSession).filter(
+        UserSession.id == session_id,
+        UserSession.user_id == current_user.id
+    ).first()
+    
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
+        )
+    
+    sessions.revoke(db, session, "revoked")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
     db: Session = Depends(get_db)
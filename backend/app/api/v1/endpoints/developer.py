@@ -1,27 +1,141 @@
 """
 Developer (Super Admin) endpoints - Full system access
 """
+import asyncio
+import json
+import os
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
+from app.api.v1.fields import (
+    EVENT_LIST_FIELDS, REGISTRATION_LIST_FIELDS, event_projection, fields_param, registration_projection
+)
+from app.core import access_log, admission
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.profiler import Recording, profiles, sampler
+from app.core.singleflight import singleflight
 from app.core.rbac import require_developer
 from app.models.user import User
 from app.models.event import Event
 from app.models.registration import Registration
 from app.models.payment import Payment
 from app.models.audit_log import AuditLog
+from app.models.user_import import UserImport
 from app.schemas.user import UserResponse
-from app.schemas.event import EventResponse
-from app.schemas.registration import RegistrationResponse
+from app.schemas.user_import import UserImportResponse
+from app.schemas.event import EventPartialResponse
+from app.schemas.registration import RegistrationResponse, RegistrationUpdate, RegistrationPartialResponse
 from app.schemas.payment import PaymentResponse
 from app.schemas.audit_log import AuditLogResponse
+from app.schemas.dashboard import DeveloperDashboard
+from app.services import analytics_export, object_cache, payment_waiters, user_import
+from app.services.dashboard import load_developer_dashboard
 from app.services.audit import log_admin_action
+from app.services.waitlist import apply_status_change
 
 router = APIRouter()
 
+# Shared by every developer; a few seconds of staleness is fine for an overview
+_dashboard_cache = TTLCache(ttl=settings.DASHBOARD_CACHE_SECONDS, maxsize=1)
+
+
+@router.get("/metrics")
+async def get_metrics(
+    current_user: User = Depends(require_developer)
+):
+    """In-process metrics of the worker that served this request"""
+    return {
+        "singleflight": singleflight.stats(),
+        "object_cache": object_cache.stats(),
+        "access_log": access_log.pipeline.stats(),
+        "admission": admission.controller.stats(),
+        "payment_waiters": payment_waiters.waiters.stats(),
+    }
+
+
+def _profile_response(recording: Recording, name: str, output: str):
+    headers = {"X-Profile-Samples": str(recording.samples)}
+    if output == "collapsed":
+        return PlainTextResponse(recording.collapsed(), headers=headers)
+    return JSONResponse(recording.speedscope(name), headers=headers)
+
+
+@router.post("/profile")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILE_MAX_SECONDS),
+    output: str = Query("speedscope", alias="format", pattern="^(speedscope|collapsed)$"),
+    current_user: User = Depends(require_developer)
+):
+    """Sample the stacks of the worker serving this request for ``seconds`` (speedscope JSON or collapsed stacks)"""
+    recording = sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop(recording)
+    return _profile_response(recording, f"worker {os.getpid()}", output)
+
+
+@router.get("/profile/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    output: str = Query("speedscope", alias="format", pattern="^(speedscope|collapsed)$"),
+    current_user: User = Depends(require_developer)
+):
+    """Profile of a request sent with ``X-Profile: 1`` (id from its ``X-Profile-Id`` response header)"""
+    data = profiles.get(profile_id)
+    if not data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found or expired"
+        )
+    
+    response = _profile_response(Recording.from_dict(data), f"{data['method']} {data['path']}", output)
+    response.headers["X-Profile-Worker"] = str(data["worker_pid"])
+    response.headers["X-Profile-Concurrent-Requests"] = str(data["concurrent_requests"])
+    return response
+
+
+@router.get("/dashboard", response_model=DeveloperDashboard)
+async def get_dashboard(
+    current_user: User = Depends(require_developer),
+    db: Session = Depends(get_db)
+):
+    """Totals, today's sign-ups, revenue by day, top events by fill rate and recent audit actions"""
+    return await _dashboard_cache.get_or_compute("dashboard", lambda: load_developer_dashboard(db))
+
+
+@router.post("/exports/analytics")
+def export_analytics(
+    request: Request,
+    full: bool = Query(False, description="Ignore high-water marks and replace earlier parts"),
+    current_user: User = Depends(require_developer),
+    db: Session = Depends(get_db)
+):
+    """Write rows changed since the last export to Parquet files under EXPORT_DIR"""
+    try:
+        summary = analytics_export.export_all(full=full)
+    except analytics_export.ExportInProgressError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    log_admin_action(
+        db=db,
+        admin_id=current_user.id,
+        action_type="analytics_exported",
+        target_type="analytics_export",
+        target_id=UUID(summary["run_id"]),
+        details={"full": full, "rows": {name: t["rows"] for name, t in summary["tables"].items()}},
+        request=request
+    )
+    return summary
+
 
 @router.get("/users", response_model=List[UserResponse])
 async def get_all_users(
@@ -41,6 +155,71 @@ async def get_all_users(
     return users
 
 
+@router.post("/users/import", response_model=UserImportResponse)
+async def import_users(
+    request: Request,
+    import_id: Optional[UUID] = Query(None, description="Resume this import with the same file"),
+    filename: Optional[str] = Query(None, max_length=255),
+    current_user: User = Depends(require_developer),
+    db: Session = Depends(get_db)
+):
+    """Bulk-create users from a CSV request body (columns: email, full_name, password, optional role)"""
+    if import_id:
+        record = db.query(UserImport).filter(UserImport.id == import_id).first()
+        if not record:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Import not found"
+            )
+        if record.status == "completed":
+            return record
+    else:
+        record = UserImport(created_by=current_user.id, filename=filename, status="running", errors=[])
+        db.add(record)
+        db.commit()
+        db.refresh(record)
+    
+    upload = await user_import.spool_upload(request)
+    try:
+        record = await user_import.run_import(db, record, upload)
+    finally:
+        upload.close()
+    
+    log_admin_action(
+        db=db,
+        admin_id=current_user.id,
+        action_type="users_imported",
+        target_type="user_import",
+        target_id=record.id,
+        details={
+            "filename": record.filename,
+            "resumed": import_id is not None,
+            "created": record.created_count,
+            "skipped": record.skipped_count,
+            "errors": record.error_count
+        },
+        request=request
+    )
+    db.refresh(record)
+    return record
+
+
+@router.get("/users/imports/{import_id}", response_model=UserImportResponse)
+async def get_user_import(
+    import_id: UUID,
+    current_user: User = Depends(require_developer),
+    db: Session = Depends(get_db)
+):
+    """Progress and per-row errors of a bulk user import"""
+    record = db.query(UserImport).filter(UserImport.id == import_id).first()
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import not found"
+        )
+    return record
+
+
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: UUID,
@@ -59,27 +238,24 @@ async def get_user(
     return user
 
 
-@router.get("/users/{user_id}/registrations", response_model=List[RegistrationResponse])
+@router.get(
+    "/users/{user_id}/registrations",
+    response_model=List[RegistrationPartialResponse],
+    response_model_exclude_unset=True
+)
 async def get_user_registrations(
     user_id: UUID,
+    fields: Optional[str] = Depends(fields_param),
     current_user: User = Depends(require_developer),
     db: Session = Depends(get_db)
 ):
     """Get all registrations for a user"""
-    registrations = db.query(Registration).filter(
+    selected = registration_projection.select(fields, REGISTRATION_LIST_FIELDS)
+    registrations = db.query(Registration).options(*registration_projection.options(selected)).filter(
         Registration.user_id == user_id
     ).order_by(Registration.created_at.desc()).all()
     
-    result = []
-    for reg in registrations:
-        reg_dict = {
-            **reg.__dict__,
-            "event_title": reg.event.title if reg.event else None,
-            "user_name": reg.user.full_name if reg.user else None
-        }
-        result.append(RegistrationResponse(**reg_dict))
-    
-    return result
+    return [registration_projection.item(reg, selected) for reg in registrations]
 
 
 @router.get("/users/{user_id}/payments", response_model=List[PaymentResponse])
@@ -96,49 +272,38 @@ async def get_user_payments(
     return payments
 
 
-@router.get("/events", response_model=List[EventResponse])
+@router.get("/events", response_model=List[EventPartialResponse], response_model_exclude_unset=True)
 async def get_all_events(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    fields: Optional[str] = Depends(fields_param),
     current_user: User = Depends(require_developer),
     db: Session = Depends(get_db)
 ):
     """Get all events"""
-    events = db.query(Event).order_by(Event.created_at.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for event in events:
-        event_dict = {
-            **event.__dict__,
-            "creator_name": event.creator.full_name if event.creator else None
-        }
-        result.append(EventResponse(**event_dict))
+    selected = event_projection.select(fields, EVENT_LIST_FIELDS)
+    events = db.query(Event).options(*event_projection.options(selected)).order_by(
+        Event.created_at.desc()
+    ).offset(skip).limit(limit).all()
     
-    return result
+    return [event_projection.item(event, selected) for event in events]
 
 
-@router.get("/registrations", response_model=List[RegistrationResponse])
+@router.get("/registrations", response_model=List[RegistrationPartialResponse], response_model_exclude_unset=True)
 async def get_all_registrations(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    fields: Optional[str] = Depends(fields_param),
     current_user: User = Depends(require_developer),
     db: Session = Depends(get_db)
 ):
     """Get all registrations"""
-    registrations = db.query(Registration).order_by(
+    selected = registration_projection.select(fields, REGISTRATION_LIST_FIELDS)
+    registrations = db.query(Registration).options(*registration_projection.options(selected)).order_by(
         Registration.created_at.desc()
     ).offset(skip).limit(limit).all()
     
-    result = []
-    for reg in registrations:
-        reg_dict = {
-            **reg.__dict__,
-            "event_title": reg.event.title if reg.event else None,
-            "user_name": reg.user.full_name if reg.user else None
-        }
-        result.append(RegistrationResponse(**reg_dict))
-    
-    return result
+    return [registration_projection.item(reg, selected) for reg in registrations]
 
 
 @router.get("/payments", response_model=List[PaymentResponse])
@@ -153,35 +318,80 @@ async def get_all_payments(
     return payments
 
 
+def details_param(
+    details: Optional[str] = Query(None, description='JSON object the details must contain, e.g. {"old_status": "pending"}')
+) -> Optional[Dict[str, Any]]:
+    if details is None:
+        return None
+    try:
+        parsed = json.loads(details)
+    except ValueError:
+        parsed = None
+    if not isinstance(parsed, dict) or not parsed:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="details must be a non-empty JSON object"
+        )
+    return parsed
+
+
+def _audit_log_page(db: Session, filters: List[Any], skip: int, limit: int) -> List[AuditLogResponse]:
+    # Page through ids first (index-only for the per-target timeline, even at a deep offset),
+    # then read just those rows with their admin names in one join
+    page = db.query(AuditLog.id, AuditLog.created_at).filter(*filters).order_by(
+        AuditLog.created_at.desc()
+    ).offset(skip).limit(limit).subquery()
+    rows = db.query(AuditLog, User.full_name).join(
+        page, page.c.id == AuditLog.id
+    ).outerjoin(
+        User, User.id == AuditLog.admin_id
+    ).order_by(page.c.created_at.desc()).all()
+    
+    return [AuditLogResponse(**{**log.__dict__, "admin_name": admin_name}) for log, admin_name in rows]
+
+
 @router.get("/audit-logs", response_model=List[AuditLogResponse])
 async def get_audit_logs(
     admin_id: Optional[UUID] = Query(None),
     action_type: Optional[str] = Query(None),
+    details: Optional[Dict[str, Any]] = Depends(details_param),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(require_developer),
     db: Session = Depends(get_db)
 ):
     """Get audit logs"""
-    query = db.query(AuditLog)
+    filters = []
     
     if admin_id:
-        query = query.filter(AuditLog.admin_id == admin_id)
+        filters.append(AuditLog.admin_id == admin_id)
     
     if action_type:
-        query = query.filter(AuditLog.action_type == action_type)
+        filters.append(AuditLog.action_type == action_type)
     
-    logs = query.order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
+    if details:
+        filters.append(AuditLog.details.contains(details))
     
-    result = []
-    for log in logs:
-        log_dict = {
-            **log.__dict__,
-            "admin_name": log.admin.full_name if log.admin else None
-        }
-        result.append(AuditLogResponse(**log_dict))
+    return _audit_log_page(db, filters, skip, limit)
+
+
+@router.get("/audit-logs/{target_type}/{target_id}", response_model=List[AuditLogResponse])
+async def get_target_audit_logs(
+    target_type: str,
+    target_id: UUID,
+    details: Optional[Dict[str, Any]] = Depends(details_param),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    current_user: User = Depends(require_developer),
+    db: Session = Depends(get_db)
+):
+    """History of one registration, event, user, etc., newest first"""
+    filters = [AuditLog.target_type == target_type, AuditLog.target_id == target_id]
     
-    return result
+    if details:
+        filters.append(AuditLog.details.contains(details))
+    
+    return _audit_log_page(db, filters, skip, limit)
 
 
 @router.patch("/registrations/{registration_id}/override", response_model=RegistrationResponse)
@@ -208,13 +418,7 @@ async def override_registration(
         )
     
     old_status = registration.status
-    registration.status = registration_data.status
-    
-    # Update event participant count
-    if registration_data.status == "accepted" and old_status != "accepted":
-        registration.event.current_participants += 1
-    elif old_status == "accepted" and registration_data.status != "accepted":
-        registration.event.current_participants = max(0, registration.event.current_participants - 1)
+    promoted = apply_status_change(db, registration, registration_data.status)
     
     db.commit()
     db.refresh(registration)
@@ -229,7 +433,8 @@ async def override_registration(
         details={
             "old_status": old_status,
             "new_status": registration_data.status,
-            "override": True
+            "override": True,
+            "promoted_from_waitlist": [str(r.id) for r in promoted]
         },
         request=request
     )
@@ -1,50 +1,56 @@
 """
 Event endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from uuid import UUID
 
+from app.api.v1.batch import NOT_FOUND, OK, batch_ids
+from app.api.v1.changes import encode_cursor, since_param
+from app.api.v1.fields import EVENT_LIST_FIELDS, event_projection, fields_param
 from app.core.database import get_db
 from app.core.rbac import require_client
+from app.core.singleflight import coalesce
 from app.models.user import User
 from app.models.event import Event
-from app.schemas.event import EventCreate, EventUpdate, EventResponse
+from app.schemas.event import (
+    EventCreate, EventUpdate, EventResponse, EventBatchItem, EventChanges, EventPartialResponse
+)
+from app.services import object_cache
+from app.services.change_feed import PUBLISHED_EVENTS, read_changes
+from app.services.live_events import hub, load_snapshots
 
 router = APIRouter()
 
 
-@router.get("/public", response_model=List[EventResponse])
-async def get_public_events(
+@router.get("/public", response_model=List[EventPartialResponse], response_model_exclude_unset=True)
+@coalesce
+def get_public_events(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    fields: Optional[str] = Depends(fields_param),
     db: Session = Depends(get_db)
 ):
     """Get published events (public endpoint, no authentication required)"""
-    events = db.query(Event).filter(
+    selected = event_projection.select(fields, EVENT_LIST_FIELDS)
+    events = db.query(Event).options(*event_projection.options(selected)).filter(
         Event.status == "published"
     ).order_by(Event.event_date.desc()).offset(skip).limit(limit).all()
     
-    # Add creator name
-    result = []
-    for event in events:
-        event_dict = {
-            **event.__dict__,
-            "creator_name": event.creator.full_name if event.creator else None
-        }
-        result.append(EventResponse(**event_dict))
-    
-    return result
+    return [event_projection.item(event, selected) for event in events]
 
 
 @router.get("/public/{event_id}", response_model=EventResponse)
-async def get_public_event(
+@coalesce
+def get_public_event(
     event_id: UUID,
     db: Session = Depends(get_db)
 ):
     """Get a published event (public endpoint, no authentication required)"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = object_cache.get_event(db, event_id)
     
     if not event:
         raise HTTPException(
@@ -59,23 +65,46 @@ async def get_public_event(
             detail="Event not found"
         )
     
-    event_dict = {
-        **event.__dict__,
-        "creator_name": event.creator.full_name if event.creator else None
-    }
-    return EventResponse(**event_dict)
+    return event
+
+
+@router.get("/public/{event_id}/live")
+async def stream_public_event(
+    event_id: UUID,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Server-Sent Events stream of seat availability for a published event"""
+    snapshot = (await run_in_threadpool(load_snapshots, [event_id])).get(str(event_id))
+    
+    if not snapshot or snapshot["status"] != "published":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    
+    # Reconnecting clients only get a snapshot if something changed since their last event
+    resume_from = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    
+    return StreamingResponse(
+        hub.stream(str(event_id), snapshot, resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
-@router.get("", response_model=List[EventResponse])
-async def get_events(
+@router.get("", response_model=List[EventPartialResponse], response_model_exclude_unset=True)
+@coalesce
+def get_events(
     status_filter: Optional[str] = Query(None, alias="status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    fields: Optional[str] = Depends(fields_param),
     current_user: User = Depends(require_client),
     db: Session = Depends(get_db)
 ):
     """Get all events (clients see published, admins/developers see all)"""
-    query = db.query(Event)
+    selected = event_projection.select(fields, EVENT_LIST_FIELDS)
+    query = db.query(Event).options(*event_projection.options(selected))
     
     # Clients only see published events
     if current_user.role == "client":
@@ -85,26 +114,72 @@ async def get_events(
     
     events = query.order_by(Event.event_date.desc()).offset(skip).limit(limit).all()
     
-    # Add creator name
+    return [event_projection.item(event, selected) for event in events]
+
+
+@router.get("/changes", response_model=EventChanges, response_model_exclude_unset=True)
+@coalesce
+def get_event_changes(
+    since: Optional[tuple] = Depends(since_param),
+    limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = Depends(fields_param),
+    current_user: User = Depends(require_client),
+    db: Session = Depends(get_db)
+):
+    """Events created, updated or deleted since the ``since`` cursor (clients see published events)"""
+    selected = event_projection.select(fields, EVENT_LIST_FIELDS)
+    query = db.query(Event).options(*event_projection.options(selected | {"change_xid", "change_seq"}))
+    if current_user.role == "client":
+        # Clients never learn about drafts; an event leaving "published" leaves a
+        # published_events tombstone, which is a deletion from their point of view
+        query = query.filter(Event.status == "published")
+        page = read_changes(db, query, Event, since, limit, tombstone_table=PUBLISHED_EVENTS)
+    else:
+        page = read_changes(db, query, Event, since, limit)
+    
+    return EventChanges(
+        changed=[event_projection.item(event, selected) for event in page.changed],
+        deleted=page.deleted,
+        cursor=encode_cursor(page.cursor),
+        has_more=page.has_more
+    )
+
+
+@router.get("/batch", response_model=List[EventBatchItem])
+async def get_events_batch(
+    ids: List[UUID] = Depends(batch_ids),
+    current_user: User = Depends(require_client),
+    db: Session = Depends(get_db)
+):
+    """Get several events in one request; results follow the order of ``ids``"""
+    events = db.query(Event).options(joinedload(Event.creator)).filter(Event.id.in_(set(ids))).all()
+    by_id = {event.id: event for event in events}
+    
     result = []
-    for event in events:
+    for event_id in ids:
+        event = by_id.get(event_id)
+        # Clients can only see published events; others look like they don't exist
+        if not event or (current_user.role == "client" and event.status != "published"):
+            result.append(EventBatchItem(id=event_id, status=NOT_FOUND))
+            continue
         event_dict = {
             **event.__dict__,
             "creator_name": event.creator.full_name if event.creator else None
         }
-        result.append(EventResponse(**event_dict))
+        result.append(EventBatchItem(id=event_id, status=OK, event=EventResponse(**event_dict)))
     
     return result
 
 
 @router.get("/{event_id}", response_model=EventResponse)
-async def get_event(
+@coalesce
+def get_event(
     event_id: UUID,
     current_user: User = Depends(require_client),
     db: Session = Depends(get_db)
 ):
     """Get a specific event"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = object_cache.get_event(db, event_id)
     
     if not event:
         raise HTTPException(
@@ -119,8 +194,4 @@ async def get_event(
             detail="Event not found"
         )
     
-    event_dict = {
-        **event.__dict__,
-        "creator_name": event.creator.full_name if event.creator else None
-    }
-    return EventResponse(**event_dict)
+    return event
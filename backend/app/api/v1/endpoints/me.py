@@ -0,0 +1,51 @@
+"""
+Current-user endpoints
+"""
+from fastapi import APIRouter, Depends, Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.rbac import require_client
+from app.models.user import User
+from app.schemas.dashboard import ClientDashboard
+from app.services.dashboard import client_dashboard_etag, load_client_dashboard
+
+router = APIRouter()
+
+# Per-user data: browsers may keep it, but must revalidate every time
+_CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+@router.get(
+    "/dashboard",
+    response_model=ClientDashboard,
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "Unchanged since the ETag sent in If-None-Match"}},
+)
+async def get_my_dashboard(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(require_client),
+    db: Session = Depends(get_db)
+):
+    """Registrations with their events and latest payment, plus upcoming deadlines, in one response"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etag = client_dashboard_etag(db, current_user.id)
+        if _etag_matches(if_none_match, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+            )
+    
+    dashboard, etag = load_client_dashboard(db, current_user.id)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = _CACHE_CONTROL
+    return dashboard
@@ -1,9 +1,10 @@
 """
 Payment endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from app.core.database import get_db
@@ -13,8 +14,10 @@ from app.models.user import User
 from app.models.registration import Registration
 from app.models.payment import Payment
 from app.models.event import Event
-from app.schemas.payment import PaymentCreate, PaymentResponse, RazorpayOrderResponse
+from app.schemas.payment import PaymentCreate, PaymentResponse, PaymentStatusResponse, RazorpayOrderResponse
+from app.services.payment_waiters import SETTLED_STATUSES, waiters
 from app.services.razorpay_service import create_order, verify_payment_signature
+from app.services.idempotency import run_idempotent
 from app.core.config import settings
 
 router = APIRouter()
@@ -24,9 +27,25 @@ router = APIRouter()
 async def create_payment_order(
     payment_data: PaymentCreate,
     current_user: User = Depends(require_client),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Create a Razorpay order for payment"""
+    """Create a Razorpay order for payment (retries with the same Idempotency-Key replay the first response)"""
+    return await run_idempotent(
+        db,
+        key=idempotency_key,
+        user_id=current_user.id,
+        route="POST /payments/create-order",
+        payload=payment_data,
+        handler=lambda: _create_payment_order(payment_data, current_user, db),
+    )
+
+
+def _create_payment_order(
+    payment_data: PaymentCreate,
+    current_user: User,
+    db: Session
+) -> RazorpayOrderResponse:
     # Get registration
     registration = db.query(Registration).filter(
         Registration.id == payment_data.registration_id
@@ -165,6 +184,49 @@ async def get_my_payments(
     return payments
 
 
+@router.get("/{order_id}/await", response_model=PaymentStatusResponse)
+async def await_payment(
+    order_id: str,
+    timeout: float = Query(25.0, gt=0, le=settings.PAYMENT_AWAIT_MAX_SECONDS),
+    current_user: User = Depends(require_client),
+    db: Session = Depends(get_db)
+):
+    """Long-poll: answer once the payment's status changes, or with the unchanged status after ``timeout`` seconds"""
+    row = db.execute(
+        select(
+            Payment.razorpay_order_id.label("order_id"),
+            Payment.status,
+            Payment.status_version.label("version"),
+            Registration.user_id,
+        ).join(Registration).where(Payment.razorpay_order_id == order_id)
+    ).mappings().first()
+    # Give the connection back before parking; waiters must not hold the pool
+    db.close()
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payment not found"
+        )
+    
+    # Check ownership
+    if current_user.role == "client" and row["user_id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    state = {"order_id": row["order_id"], "status": row["status"], "version": row["version"]}
+    if state["status"] not in SETTLED_STATUSES:
+        state = await waiters.wait(state, timeout)
+    
+    return PaymentStatusResponse(
+        order_id=state["order_id"],
+        status=state["status"],
+        settled=state["status"] in SETTLED_STATUSES
+    )
+
+
 @router.post("/webhook")
 async def razorpay_webhook(
     request: Request,
@@ -1,18 +1,29 @@
 """
 Registration endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional
 from uuid import UUID
 
+from app.api.v1.batch import FORBIDDEN, NOT_FOUND, OK, batch_ids
+from app.api.v1.changes import encode_cursor, since_param
+from app.api.v1.fields import REGISTRATION_LIST_FIELDS, fields_param, registration_projection
 from app.core.database import get_db
 from app.core.rbac import require_client
 from app.core.security import get_current_user_id
+from app.core.singleflight import coalesce
 from app.models.user import User
 from app.models.event import Event
 from app.models.registration import Registration
-from app.schemas.registration import RegistrationCreate, RegistrationResponse
+from app.schemas.checkin import TicketResponse
+from app.schemas.registration import (
+    RegistrationCreate, RegistrationResponse, RegistrationBatchItem, RegistrationChanges, RegistrationPartialResponse
+)
+from app.services.change_feed import read_changes
+from app.services.idempotency import run_idempotent
+from app.services.tickets import is_eligible, signer
+from app.services.waitlist import is_full, join_waitlist
 
 router = APIRouter()
 
@@ -21,9 +32,26 @@ router = APIRouter()
 async def create_registration(
     registration_data: RegistrationCreate,
     current_user: User = Depends(require_client),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Register for an event"""
+    """Register for an event (retries with the same Idempotency-Key replay the first response)"""
+    return await run_idempotent(
+        db,
+        key=idempotency_key,
+        user_id=current_user.id,
+        route="POST /registrations",
+        payload=registration_data,
+        handler=lambda: _create_registration(registration_data, current_user, db),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+def _create_registration(
+    registration_data: RegistrationCreate,
+    current_user: User,
+    db: Session
+) -> RegistrationResponse:
     # Get event
     event = db.query(Event).filter(Event.id == registration_data.event_id).first()
     if not event:
@@ -51,21 +79,15 @@ async def create_registration(
             detail="Already registered for this event"
         )
     
-    # Check registration deadline
+    # Check registration deadline (the lifecycle job closes registration; the
+    # timestamp check covers the gap until its next run)
     from datetime import datetime, timezone
-    if datetime.now(timezone.utc) > event.registration_deadline:
+    if not event.registration_open or datetime.now(timezone.utc) > event.registration_deadline:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Registration deadline has passed"
         )
     
-    # Check max participants
-    if event.max_participants and event.current_participants >= event.max_participants:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Event is full"
-        )
-    
     # Create registration
     new_registration = Registration(
         event_id=registration_data.event_id,
@@ -74,6 +96,10 @@ async def create_registration(
         payment_status="not_required" if not event.is_paid else "pending"
     )
     
+    # Full events queue new registrations; they are promoted when a seat frees up
+    if is_full(event):
+        join_waitlist(db, event, new_registration)
+    
     db.add(new_registration)
     db.commit()
     db.refresh(new_registration)
@@ -86,30 +112,94 @@ async def create_registration(
     return RegistrationResponse(**registration_dict)
 
 
-@router.get("/my-registrations", response_model=List[RegistrationResponse])
-async def get_my_registrations(
+@router.get("/my-registrations", response_model=List[RegistrationPartialResponse], response_model_exclude_unset=True)
+@coalesce
+def get_my_registrations(
+    fields: Optional[str] = Depends(fields_param),
     current_user: User = Depends(require_client),
     db: Session = Depends(get_db)
 ):
     """Get current user's registrations"""
-    registrations = db.query(Registration).filter(
+    selected = registration_projection.select(fields, REGISTRATION_LIST_FIELDS)
+    registrations = db.query(Registration).options(
+        *registration_projection.options(selected, provided=["user_name"])
+    ).filter(
         Registration.user_id == current_user.id
     ).order_by(Registration.created_at.desc()).all()
     
+    return [
+        registration_projection.item(reg, selected, user_name=current_user.full_name)
+        for reg in registrations
+    ]
+
+
+@router.get(
+    "/my-registrations/changes", response_model=RegistrationChanges, response_model_exclude_unset=True
+)
+@coalesce
+def get_my_registration_changes(
+    since: Optional[tuple] = Depends(since_param),
+    limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = Depends(fields_param),
+    current_user: User = Depends(require_client),
+    db: Session = Depends(get_db)
+):
+    """Current user's registrations created, updated or deleted since the ``since`` cursor"""
+    selected = registration_projection.select(fields, REGISTRATION_LIST_FIELDS)
+    query = db.query(Registration).options(
+        *registration_projection.options(selected | {"change_xid", "change_seq"}, provided=["user_name"])
+    ).filter(
+        Registration.user_id == current_user.id
+    )
+    page = read_changes(db, query, Registration, since, limit, owner_id=current_user.id)
+    
+    return RegistrationChanges(
+        changed=[
+            registration_projection.item(reg, selected, user_name=current_user.full_name)
+            for reg in page.changed
+        ],
+        deleted=page.deleted,
+        cursor=encode_cursor(page.cursor),
+        has_more=page.has_more
+    )
+
+
+@router.get("/batch", response_model=List[RegistrationBatchItem])
+async def get_registrations_batch(
+    ids: List[UUID] = Depends(batch_ids),
+    current_user: User = Depends(require_client),
+    db: Session = Depends(get_db)
+):
+    """Get several registrations in one request; results follow the order of ``ids``"""
+    registrations = db.query(Registration).options(
+        joinedload(Registration.event),
+        joinedload(Registration.user)
+    ).filter(Registration.id.in_(set(ids))).all()
+    by_id = {reg.id: reg for reg in registrations}
+    
     result = []
-    for reg in registrations:
+    for registration_id in ids:
+        reg = by_id.get(registration_id)
+        if not reg:
+            result.append(RegistrationBatchItem(id=registration_id, status=NOT_FOUND))
+            continue
+        # Users can only see their own registrations (unless admin/developer)
+        if current_user.role == "client" and reg.user_id != current_user.id:
+            result.append(RegistrationBatchItem(id=registration_id, status=FORBIDDEN))
+            continue
         reg_dict = {
             **reg.__dict__,
             "event_title": reg.event.title if reg.event else None,
-            "user_name": current_user.full_name
+            "user_name": reg.user.full_name if reg.user else None
         }
-        result.append(RegistrationResponse(**reg_dict))
+        result.append(RegistrationBatchItem(id=registration_id, status=OK, registration=RegistrationResponse(**reg_dict)))
     
     return result
 
 
 @router.get("/{registration_id}", response_model=RegistrationResponse)
-async def get_registration(
+@coalesce
+def get_registration(
     registration_id: UUID,
     current_user: User = Depends(require_client),
     db: Session = Depends(get_db)
@@ -136,3 +226,40 @@ async def get_registration(
         "user_name": registration.user.full_name if registration.user else None
     }
     return RegistrationResponse(**reg_dict)
+
+
+@router.get("/{registration_id}/ticket", response_model=TicketResponse)
+async def get_registration_ticket(
+    registration_id: UUID,
+    current_user: User = Depends(require_client),
+    db: Session = Depends(get_db)
+):
+    """Signed ticket for an accepted (and paid, if required) registration"""
+    registration = db.query(Registration).filter(Registration.id == registration_id).first()
+    
+    if not registration:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Registration not found"
+        )
+    
+    # Users can only see their own tickets (unless admin/developer)
+    if current_user.role == "client" and registration.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    if not is_eligible(registration.status, registration.payment_status):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Tickets are issued for accepted registrations once payment is complete"
+        )
+    
+    return TicketResponse(
+        ticket=signer.issue(registration.id, registration.event_id, registration.ticket_version),
+        registration_id=registration.id,
+        event_id=registration.event_id,
+        ticket_version=registration.ticket_version,
+        kid=signer.active_kid
+    )
@@ -0,0 +1,82 @@
+"""
+Sparse fieldsets for list endpoints
+
+``?fields=title,event_date`` selects which response fields a list returns.
+Only the matching columns are loaded (``load_only``), and name fields that
+come from a related row are joined in only when asked for. Without
+``fields`` a list returns its default set, which leaves out the large JSONB
+columns.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy.orm import joinedload, load_only
+
+from app.models.event import Event
+from app.models.registration import Registration
+from app.models.user import User
+from app.schemas.event import EventPartialResponse
+from app.schemas.registration import RegistrationPartialResponse
+
+
+def fields_param(
+    fields: Optional[str] = Query(None, description="Comma-separated response fields")
+) -> Optional[str]:
+    return fields
+
+
+class Projection:
+    def __init__(self, model, schema: Type[BaseModel], related: Dict[str, Tuple[Any, Any]]):
+        self.model = model
+        self.schema = schema
+        # Response field -> (relationship, column on the related model)
+        self.related = related
+        self.fields: Set[str] = set(schema.model_fields)
+
+    def select(self, fields: Optional[str], default: Iterable[str]) -> Set[str]:
+        """Resolve ``?fields=`` against the allowed fields; ``id`` is always included"""
+        if not fields:
+            return set(default)
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - self.fields
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        return requested | {"id"}
+
+    def options(self, selected: Set[str], provided: Iterable[str] = ()) -> List[Any]:
+        """Loader options for ``selected``; ``provided`` fields are filled in by the caller"""
+        columns = [getattr(self.model, name) for name in selected if name not in self.related]
+        options = [load_only(*columns)]
+        for name in selected & set(self.related) - set(provided):
+            relationship, column = self.related[name]
+            options.append(joinedload(relationship).load_only(column))
+        return options
+
+    def item(self, obj, selected: Set[str], **provided: Any) -> BaseModel:
+        data = {}
+        for name in selected:
+            if name in provided:
+                data[name] = provided[name]
+            elif name in self.related:
+                relationship, column = self.related[name]
+                target = getattr(obj, relationship.key)
+                data[name] = getattr(target, column.key) if target else None
+            else:
+                data[name] = getattr(obj, name)
+        return self.schema(**data)
+
+
+event_projection = Projection(Event, EventPartialResponse, {
+    "creator_name": (Event.creator, User.full_name),
+})
+EVENT_LIST_FIELDS = event_projection.fields - {"form_schema"}
+
+registration_projection = Projection(Registration, RegistrationPartialResponse, {
+    "event_title": (Registration.event, Event.title),
+    "user_name": (Registration.user, User.full_name),
+})
+REGISTRATION_LIST_FIELDS = registration_projection.fields - {"form_data"}
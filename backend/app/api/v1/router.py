@@ -3,7 +3,7 @@ Main API router
 """
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, events, registrations, payments, admin, developer
+from app.api.v1.endpoints import auth, events, registrations, payments, admin, developer, me
 
 api_router = APIRouter()
 
@@ -13,3 +13,4 @@ api_router.include_router(registrations.router, prefix="/registrations", tags=["
 api_router.include_router(payments.router, prefix="/payments", tags=["payments"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
 api_router.include_router(developer.router, prefix="/developer", tags=["developer"])
+api_router.include_router(me.router, prefix="/me", tags=["me"])
@@ -0,0 +1,132 @@
+"""
+Operational commands
+
+Usage: python -m app.cli <command> [options]
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.core.database import engine
+
+
+def cmd_migrate(args: argparse.Namespace) -> int:
+    from app.core import schema
+
+    try:
+        applied = schema.migrate(engine, restamp=args.restamp)
+    except schema.SchemaMismatchError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if applied:
+        print(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+    else:
+        print("Schema is up to date")
+    print(f"Schema version {schema.SCHEMA_VERSION}, fingerprint {schema.SCHEMA_FINGERPRINT[:12]}")
+    return 0
+
+
+def cmd_schema_status(args: argparse.Namespace) -> int:
+    from app.core import schema
+
+    with engine.connect() as conn:
+        version, fingerprint = schema.current_version(conn)
+    print(f"Database:    version {version}, fingerprint {str(fingerprint)[:12]}")
+    print(f"Application: version {schema.SCHEMA_VERSION}, fingerprint {schema.SCHEMA_FINGERPRINT[:12]}")
+    return 0 if (version, fingerprint) == (schema.SCHEMA_VERSION, schema.SCHEMA_FINGERPRINT) else 1
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def cmd_reconcile(args: argparse.Namespace) -> int:
+    from app.core.database import SessionLocal
+    from app.services import reconciliation
+
+    end = args.end or datetime.now(timezone.utc)
+    start = args.start or end - timedelta(hours=args.hours)
+    if args.gateway == "synthetic":
+        gateway = reconciliation.SyntheticGateway(args.synthetic_orders, int(start.timestamp()), int(end.timestamp()))
+    else:
+        gateway = reconciliation.RazorpayGateway()
+
+    db = SessionLocal()
+    try:
+        summary = reconciliation.reconcile(db, gateway, start, end, args.concurrency, dry_run=args.dry_run)
+    finally:
+        db.close()
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+def cmd_explain_check(args: argparse.Namespace) -> int:
+    from app.services import query_plans
+
+    with engine.connect() as conn:
+        results = query_plans.check(conn, seed_scale=0 if args.no_seed else args.scale)
+    failed = 0
+    for name, found in results.items():
+        print(f"{'FAIL' if found else 'ok  '}  {name}{': ' + '; '.join(found) if found else ''}")
+        failed += bool(found)
+    print(f"{len(results) - failed}/{len(results)} hot queries use their indexes")
+    return 1 if failed else 0
+
+
+def cmd_export_analytics(args: argparse.Namespace) -> int:
+    from app.services import analytics_export
+
+    try:
+        summary = analytics_export.export_all(full=args.full, directory=args.dir)
+    except analytics_export.ExportInProgressError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Cascade Forum operational commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate", help="Apply pending schema migrations")
+    migrate.add_argument(
+        "--restamp", action="store_true",
+        help="record the current model fingerprint when the models changed without a migration step",
+    )
+    migrate.set_defaults(func=cmd_migrate)
+    sub.add_parser("schema-status", help="Compare database and application schema versions").set_defaults(func=cmd_schema_status)
+
+    reconcile = sub.add_parser("reconcile", help="Reconcile payments against the gateway and write a drift report")
+    reconcile.add_argument("--start", type=_parse_time, help="window start (ISO 8601, default: end - hours)")
+    reconcile.add_argument("--end", type=_parse_time, help="window end (ISO 8601, default: now)")
+    reconcile.add_argument("--hours", type=int, default=settings.RECONCILE_WINDOW_HOURS)
+    reconcile.add_argument("--concurrency", type=int, default=settings.RECONCILE_CONCURRENCY)
+    reconcile.add_argument("--dry-run", action="store_true", help="report drift without repairing")
+    reconcile.add_argument("--gateway", choices=["razorpay", "synthetic"], default="razorpay")
+    reconcile.add_argument("--synthetic-orders", type=int, default=100_000)
+    reconcile.set_defaults(func=cmd_reconcile)
+
+    explain = sub.add_parser("explain-check", help="Fail if a hot query plans a sequential scan or explicit sort")
+    explain.add_argument("--scale", type=int, default=1000, help="seed size (rolled back afterwards)")
+    explain.add_argument("--no-seed", action="store_true", help="plan against the existing data only")
+    explain.set_defaults(func=cmd_explain_check)
+
+    export = sub.add_parser("export-analytics", help="Write new and changed rows to Parquet for analysts")
+    export.add_argument("--full", action="store_true", help="ignore high-water marks and replace earlier parts")
+    export.add_argument("--dir", default=settings.EXPORT_DIR)
+    export.set_defaults(func=cmd_export_analytics)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+Structured access log
+
+``AccessLogMiddleware`` gives every request an id (the client's
+``X-Request-ID`` if it sent a usable one) and emits one JSON line per
+request: id, method, route template, user, status, response size and where
+the time went — total, SQL statements (timed by engine events) and Razorpay
+calls (timed by a response hook on the gateway's requests session).
+Successful requests can be sampled with ACCESS_LOG_SAMPLE_RATE; errors and
+requests slower than ACCESS_LOG_SLOW_MS are always logged, except that SSE
+streams and long polls (ACCESS_LOG_STREAM_PATHS) are never counted as slow.
+
+Log calls never write to stdout themselves: the ``app`` loggers hand records
+to a bounded queue and one listener thread per worker formats and writes
+them. When the queue is full, records are dropped and counted rather than
+making a request wait on the log pipe.
+"""
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.security import get_bearer_claims
+
+logger = logging.getLogger("app.access")
+query_logger = logging.getLogger("app.sql")
+
+_MAX_REQUEST_ID = 128
+
+
+class RequestTimings:
+    """Time spent by one request outside Python; shared by its event loop task and threadpool calls"""
+
+    __slots__ = ("request_id", "db_seconds", "db_queries", "gateway_seconds", "gateway_calls")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.gateway_seconds = 0.0
+        self.gateway_calls = 0
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    timings = _current.get()
+    return timings.request_id if timings else None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            line["request_id"] = request_id
+        line.update(getattr(record, "fields", {}))
+        return json.dumps(line, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Runs in the logging thread, where the request context is still current
+        record = super().prepare(record)
+        if not hasattr(record, "request_id"):
+            record.request_id = current_request_id()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Queue between the ``app`` loggers and a writer thread"""
+
+    def __init__(self):
+        self._handler: Optional[_QueueHandler] = None
+        self._listener: Optional[QueueListener] = None
+
+    def start(self) -> None:
+        if self._listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter())
+        self._handler = _QueueHandler(queue.Queue(maxsize=settings.ACCESS_LOG_QUEUE_SIZE))
+        self._listener = QueueListener(self._handler.queue, stream)
+        root = logging.getLogger("app")
+        root.setLevel(settings.LOG_LEVEL)
+        root.addHandler(self._handler)
+        root.propagate = False
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Detach from the loggers and flush what is queued"""
+        if self._listener is None:
+            return
+        logging.getLogger("app").removeHandler(self._handler)
+        self._listener.stop()
+        self._listener = None
+
+    def stats(self) -> Dict[str, Any]:
+        if self._handler is None:
+            return {"running": False}
+        return {
+            "running": self._listener is not None,
+            "queued": self._handler.queue.qsize(),
+            "capacity": settings.ACCESS_LOG_QUEUE_SIZE,
+            "dropped": self._handler.dropped,
+        }
+
+
+pipeline = LogPipeline()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Per statement, so a statement that fails leaves nothing behind on the connection
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+    timings = _current.get()
+    if timings is not None:
+        timings.db_seconds += elapsed
+        timings.db_queries += 1
+    if elapsed * 1000 >= settings.ACCESS_LOG_SLOW_QUERY_MS:
+        query_logger.warning("slow query", extra={"fields": {
+            "duration_ms": round(elapsed * 1000, 2),
+            "statement": " ".join(statement.split())[:1000],
+        }})
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count statement execution time towards the current request"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def record_gateway_call(response, *args, **kwargs) -> None:
+    """requests response hook for the payment gateway session"""
+    timings = _current.get()
+    if timings is not None:
+        timings.gateway_seconds += response.elapsed.total_seconds()
+        timings.gateway_calls += 1
+
+
+def _incoming_request_id(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            if 0 < len(value) <= _MAX_REQUEST_ID and value.isascii() and value.decode().isprintable():
+                return value.decode()
+            return None
+    return None
+
+
+class AccessLogMiddleware:
+    """ASGI middleware assigning request ids and logging one line per request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = _incoming_request_id(scope) or uuid.uuid4().hex
+        timings = RequestTimings(request_id)
+        token = _current.set(timings)
+        status_code = 500
+        size = 0
+
+        async def send_with_id(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode()),
+                ]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            total = time.perf_counter() - started
+            self._log(scope, timings, status_code, size, total)
+            _current.reset(token)
+
+    @staticmethod
+    def _log(scope, timings: RequestTimings, status_code: int, size: int, total: float) -> None:
+        slow = total * 1000 >= settings.ACCESS_LOG_SLOW_MS and not any(
+            fnmatchcase(scope["path"], p) for p in settings.ACCESS_LOG_STREAM_PATHS
+        )
+        if status_code < 400 and not slow and random.random() >= settings.ACCESS_LOG_SAMPLE_RATE:
+            return
+        # Set by the router once a route matched
+        route = scope.get("route")
+        claims = get_bearer_claims(scope)
+        logger.info("request", extra={"fields": {
+            "method": scope["method"],
+            "route": getattr(route, "path", None),
+            "path": scope["path"],
+            "status": status_code,
+            "user_id": claims.get("sub") if claims else None,
+            "client_ip": scope["client"][0] if scope.get("client") else None,
+            "bytes": size,
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(timings.db_seconds * 1000, 2),
+            "db_queries": timings.db_queries,
+            "gateway_ms": round(timings.gateway_seconds * 1000, 2),
+            "gateway_calls": timings.gateway_calls,
+            "sample_rate": 1.0 if status_code >= 400 or slow else settings.ACCESS_LOG_SAMPLE_RATE,
+        }})
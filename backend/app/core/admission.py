@@ -0,0 +1,205 @@
+"""
+Per-worker admission control
+
+At most ADMISSION_CONCURRENCY requests run at once in a worker; the rest
+wait in a bounded queue with one lane per priority class and are let in
+highest class first, oldest first within a class:
+
+    payment > registration > authenticated > public
+
+Classes come from ADMISSION_ROUTES ("METHOD /path-prefix" -> class, longest
+prefix wins; a prefix containing ``*`` is a glob matched against the whole
+path); anything else is ``authenticated`` when it carries a valid
+bearer token and ``public`` otherwise. Payment requests may also use
+ADMISSION_PAYMENT_RESERVE slots above the limit, so webhooks and payment
+verification get in even when every regular slot is held by slow reads.
+
+Overload is shed with ``503`` and ``Retry-After``, lowest class first:
+lower classes have shorter ADMISSION_QUEUE_TIMEOUTS, and a full queue makes
+room for a request by dropping the newest waiter of a lower class (or turns
+the request away if there is none). Long-lived streams (ADMISSION_EXEMPT_PATHS)
+would hold a slot for their whole lifetime and are not counted.
+"""
+import asyncio
+import json
+import time
+from collections import Counter, deque
+from fnmatch import fnmatchcase
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import get_bearer_claims
+
+PRIORITY_CLASSES = ("payment", "registration", "authenticated", "public")
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        limit: int,
+        payment_reserve: int,
+        queue_size: int,
+        timeouts: Dict[str, float],
+    ):
+        self.limit = limit
+        self.payment_reserve = payment_reserve
+        self.queue_size = queue_size
+        self.timeouts = timeouts
+        self.active = 0
+        self._queues: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {c: deque() for c in PRIORITY_CLASSES}
+        self.admitted: Counter = Counter()
+        self.shed: Counter = Counter()
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _has_slot(self, priority: str) -> bool:
+        limit = self.limit + (self.payment_reserve if priority == "payment" else 0)
+        return self.active < limit
+
+    def _make_room(self, priority: str) -> bool:
+        """Drop the newest waiter of the lowest class below ``priority``; False if there is none"""
+        rank = PRIORITY_CLASSES.index(priority)
+        for lower in reversed(PRIORITY_CLASSES[rank + 1:]):
+            if self._queues[lower]:
+                future, _ = self._queues[lower].pop()
+                future.set_result(False)
+                self.shed[f"{lower}:evicted"] += 1
+                return True
+        return False
+
+    async def acquire(self, priority: str) -> bool:
+        """Wait for a slot. False means the request was shed."""
+        # Only skip the queue when nobody of the same or a higher class is waiting
+        rank = PRIORITY_CLASSES.index(priority)
+        waiting_ahead = any(self._queues[c] for c in PRIORITY_CLASSES[:rank + 1])
+        if not waiting_ahead and self._has_slot(priority):
+            self.active += 1
+            self.admitted[priority] += 1
+            return True
+        if self.queued >= self.queue_size and not self._make_room(priority):
+            self.shed[f"{priority}:queue_full"] += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, time.monotonic())
+        self._queues[priority].append(entry)
+        try:
+            granted = await asyncio.wait_for(future, self.timeouts.get(priority, 5.0))
+        except asyncio.TimeoutError:
+            self._discard(priority, entry)
+            self.shed[f"{priority}:timeout"] += 1
+            return False
+        except asyncio.CancelledError:
+            # Client went away while queued, or was granted a slot at the same moment
+            granted = future.done() and not future.cancelled() and future.result()
+            if not self._discard(priority, entry) and granted:
+                self.release()
+            raise
+        if granted:
+            self.admitted[priority] += 1
+        return granted
+
+    def _discard(self, priority: str, entry) -> bool:
+        try:
+            self._queues[priority].remove(entry)
+            return True
+        except ValueError:
+            # Already taken off the queue by release() or _make_room()
+            return False
+
+    def release(self) -> None:
+        self.active -= 1
+        for priority in PRIORITY_CLASSES:
+            queue = self._queues[priority]
+            while queue and self._has_slot(priority):
+                future, _ = queue.popleft()
+                if future.done():
+                    continue
+                # Hand the slot straight to the waiter
+                self.active += 1
+                future.set_result(True)
+            if queue:
+                # Lower classes don't overtake a waiting higher one
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "active": self.active,
+            "limit": self.limit,
+            "payment_reserve": self.payment_reserve,
+            "queued": {c: len(q) for c, q in self._queues.items()},
+            "oldest_wait_ms": {
+                c: round((now - q[0][1]) * 1000, 1) for c, q in self._queues.items() if q
+            },
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+        }
+
+
+def parse_routes(raw: Dict[str, str]) -> List[Tuple[str, str, str]]:
+    """``{"POST /api/v1/payments/verify": "payment"}`` -> (method, prefix or glob, class), longest first"""
+    routes = []
+    for route, priority in raw.items():
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown admission class {priority!r} for {route!r}")
+        method, prefix = route.split(" ", 1)
+        routes.append((method, prefix.rstrip("/"), priority))
+    return sorted(routes, key=lambda r: len(r[1]), reverse=True)
+
+
+controller = AdmissionController(
+    settings.ADMISSION_CONCURRENCY,
+    settings.ADMISSION_PAYMENT_RESERVE,
+    settings.ADMISSION_QUEUE_SIZE,
+    settings.ADMISSION_QUEUE_TIMEOUTS,
+)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware queueing requests by priority and shedding overload with 503"""
+
+    def __init__(self, app, admission: Optional[AdmissionController] = None):
+        self.app = app
+        self.admission = admission or controller
+        self.routes = parse_routes(settings.ADMISSION_ROUTES)
+        self.exempt = settings.ADMISSION_EXEMPT_PATHS
+
+    def classify(self, scope) -> str:
+        path = scope["path"]
+        for method, prefix, priority in self.routes:
+            if scope["method"] != method:
+                continue
+            if "*" in prefix:
+                if fnmatchcase(path, prefix):
+                    return priority
+            elif path == prefix or path.startswith(prefix + "/"):
+                return priority
+        return "authenticated" if get_bearer_claims(scope) else "public"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or any(fnmatchcase(scope["path"], p) for p in self.exempt):
+            return await self.app(scope, receive, send)
+
+        if not await self.admission.acquire(self.classify(scope)):
+            return await self._reject(send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.release()
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": "Server is busy, please retry"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
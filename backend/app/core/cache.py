@@ -0,0 +1,231 @@
+"""
+Result and object caching
+
+``TTLCache.get_or_compute`` returns a cached value while it is fresh. When it
+expires, the first caller recomputes it and concurrent callers for the same
+key wait for that result instead of all hitting the database (stampede
+protection). Each worker keeps its own cache.
+
+``TwoTierCache`` holds JSON-serializable snapshots of domain objects in a
+per-worker LRU backed by an optional shared tier (``SharedBackend``) that all
+workers on a host can read. Entries are dropped by ``invalidate``, which the
+caller wires to a cross-worker broadcast.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+class TTLCache:
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+
+    def _fresh(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key`` or run the (blocking) ``compute`` once in the threadpool"""
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry[1]
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                # Someone else may have refreshed it while we waited
+                entry = self._fresh(key)
+                if entry is not None:
+                    return entry[1]
+                value = await run_in_threadpool(compute)
+                self.set(key, value)
+                return value
+        finally:
+            if not lock.locked() and self._locks.get(key) is lock:
+                del self._locks[key]
+
+
+class SharedBackend(ABC):
+    """Cross-process tier of a ``TwoTierCache``; values are JSON strings"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self, prefix: str) -> None:
+        ...
+
+
+class SQLiteSharedBackend(SharedBackend):
+    """Entries in a SQLite file shared by all worker processes on the host"""
+
+    PRUNE_EVERY = 10_000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # Connections must not cross a fork
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)", (key, value, now + ttl))
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM entries WHERE expires < ?", (now,))
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self, prefix):
+        self._conn().execute("DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+
+def create_shared_backend() -> Optional[SharedBackend]:
+    # Same fallback as the rate limiter: without /dev/shm each worker only has its local tier
+    if settings.CACHE_SHARED_BACKEND == "sqlite" and os.path.isdir(os.path.dirname(settings.CACHE_SQLITE_PATH)):
+        return SQLiteSharedBackend(settings.CACHE_SQLITE_PATH)
+    return None
+
+
+class TwoTierCache:
+    """Per-worker LRU in front of an optional shared tier.
+
+    Loaders run outside the lock. ``token()`` is taken before loading and
+    passed to ``set``; an invalidation in between makes ``set`` a no-op, so
+    a row read before a write can't be cached after that write's invalidation.
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int, shared: Optional[SharedBackend] = None):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self.hits = self.shared_hits = self.misses = 0
+
+    def _shared_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def token(self) -> int:
+        return self._epoch
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            epoch = self._epoch
+        if self.shared is not None:
+            raw = self.shared.get(self._shared_key(key))
+            if raw is not None:
+                value = json.loads(raw)
+                self._set_local(key, value, epoch)
+                self.shared_hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def _set_local(self, key: str, value: Any, token: int) -> bool:
+        with self._lock:
+            if token != self._epoch:
+                return False
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return True
+
+    def set(self, key: str, value: Any, token: int) -> None:
+        if self._set_local(key, value, token) and self.shared is not None:
+            self.shared.set(self._shared_key(key), json.dumps(value), self.ttl)
+
+    def get_or_load(self, key: str, load: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """Cached value for ``key``, or ``load()`` (not cached when it returns None)"""
+        value = self.get(key)
+        if value is None:
+            token = self.token()
+            value = load()
+            if value is not None:
+                self.set(key, value, token)
+        return value
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear(self._shared_key(""))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+        }
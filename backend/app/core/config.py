@@ -2,7 +2,7 @@
 Application configuration using Pydantic Settings
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -13,11 +13,23 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Asymmetric signing with kid-based rotation. Keys are PEM strings or file paths.
+    # Signing nodes set JWT_PRIVATE_KEYS + JWT_ACTIVE_KID; verify-only nodes just JWT_PUBLIC_KEYS.
+    JWT_SIGNING_ALGORITHM: str = "RS256"  # RS256 or ES256, for tokens with a kid header
+    JWT_PRIVATE_KEYS: Dict[str, str] = {}
+    JWT_PUBLIC_KEYS: Dict[str, str] = {}
+    JWT_ACTIVE_KID: Optional[str] = None  # unset: sign with SECRET_KEY/ALGORITHM as before
+    JWT_ACCEPT_SECRET_KEY: bool = True  # accept tokens without kid; turn off once rotation is complete
+    JWT_CACHE_SIZE: int = 10_000  # verified tokens kept per worker
+    # Refresh-token sessions (POST /auth/refresh)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14  # sliding: every refresh extends the session
+    REFRESH_REUSE_GRACE_SECONDS: int = 10  # concurrent refreshes from one device within this window aren't theft
     
     # Razorpay
     RAZORPAY_KEY_ID: str
     RAZORPAY_KEY_SECRET: str
     RAZORPAY_WEBHOOK_SECRET: str
+    RAZORPAY_BASE_URL: Optional[str] = None  # point at a local stand-in gateway for testing
     
     # CORS
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
@@ -26,6 +38,122 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     ALLOWED_HOSTS: List[str] = ["*"]
     
+    # Rate limiting: "capacity/seconds" token buckets per route, keyed by client IP and/or user
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "sqlite"  # sqlite (shared by workers on a host) or memory (per worker)
+    RATE_LIMIT_SQLITE_PATH: str = "/dev/shm/cascade_forum_ratelimit.db"
+    RATE_LIMITS: Dict[str, Dict[str, str]] = {
+        "POST /api/v1/auth/login": {"ip": "10/60"},
+        "POST /api/v1/auth/register": {"ip": "5/60"},
+        "POST /api/v1/auth/refresh": {"ip": "30/60"},
+        "POST /api/v1/registrations": {"ip": "60/60", "user": "10/60"},
+    }
+    
+    # Admission control per worker: excess requests queue by priority, overload is shed with 503
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_CONCURRENCY: int = 64
+    ADMISSION_PAYMENT_RESERVE: int = 8  # extra slots only payment requests may use
+    ADMISSION_QUEUE_SIZE: int = 256
+    ADMISSION_QUEUE_TIMEOUTS: Dict[str, float] = {
+        "payment": 30.0, "registration": 10.0, "authenticated": 5.0, "public": 2.0,
+    }
+    ADMISSION_ROUTES: Dict[str, str] = {
+        # Only the short confirmation calls get the reserve; create-order waits on the
+        # gateway and stays in the regular authenticated lane
+        "POST /api/v1/payments/webhook": "payment",
+        "POST /api/v1/payments/verify": "payment",
+        "POST /api/v1/registrations": "registration",
+        "PATCH /api/v1/admin/registrations": "registration",
+        "POST /api/v1/auth": "authenticated",
+        "POST /api/v1/admin/events/*/checkins/batch": "registration",  # check-in sync at the door
+    }
+    ADMISSION_EXEMPT_PATHS: List[str] = [  # long-lived streams and long polls
+        "/health", "/api/v1/events/public/*/live", "/api/v1/payments/*/await",
+    ]
+    ADMISSION_RETRY_AFTER_SECONDS: int = 2
+    
+    # Live event stream (SSE)
+    LIVE_MIN_INTERVAL_SECONDS: float = 1.0  # max one update per event per interval
+    LIVE_HEARTBEAT_SECONDS: float = 15.0
+    LIVE_RETRY_MS: int = 3000
+    
+    # Payment confirmation long-poll (GET /payments/{order_id}/await)
+    PAYMENT_AWAIT_MAX_SECONDS: float = 55.0
+    
+    # Idempotency-Key replay window and how long a duplicate waits for the in-flight original
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    
+    # Background jobs (one worker runs each job, elected with an advisory lock)
+    SCHEDULER_ENABLED: bool = True
+    
+    # Event lifecycle (close registration after the deadline, complete past events)
+    LIFECYCLE_INTERVAL_SECONDS: int = 60
+    LIFECYCLE_BATCH_SIZE: int = 500
+    
+    # Object cache for hot User/Event rows (local LRU + optional shared tier)
+    CACHE_ENABLED: bool = True
+    CACHE_TTL_SECONDS: float = 60.0
+    CACHE_LOCAL_MAXSIZE: int = 10_000
+    CACHE_SHARED_BACKEND: Optional[str] = "sqlite"  # sqlite (shared by workers on a host) or None (local only)
+    CACHE_SQLITE_PATH: str = "/dev/shm/cascade_forum_cache.db"
+    
+    # Delta-sync feeds (GET /events/changes, /registrations/my-registrations/changes)
+    CHANGES_TOMBSTONE_DAYS: int = 30  # deletions are kept this long; older cursors get 410 and resync
+    
+    # Signed tickets (Ed25519) and door check-in; scanners verify offline with GET /admin/tickets/keys
+    TICKET_SIGNING_KEYS: Dict[str, str] = {}  # kid -> Ed25519 private key, PEM string or file path
+    TICKET_PUBLIC_KEYS: Dict[str, str] = {}  # retired kids whose tickets are still accepted
+    TICKET_ACTIVE_KID: Optional[str] = None  # unset: development signs with a key derived from SECRET_KEY
+    CHECKIN_BATCH_MAX: int = 500  # scans per POST /admin/events/{id}/checkins/batch
+    
+    # Batch lookups (GET /events/batch, /registrations/batch)
+    BATCH_MAX_IDS: int = 200
+    
+    # Bulk user import (POST /developer/users/import)
+    IMPORT_BATCH_SIZE: int = 500  # rows hashed, checked and inserted per transaction
+    IMPORT_HASH_WORKERS: int = 0  # password-hashing processes; 0 = one per CPU
+    IMPORT_MAX_BYTES: int = 50 * 1024 * 1024
+    IMPORT_MAX_ERRORS: int = 1000  # per-row errors kept on the import record
+    
+    # Analytics export (Parquet snapshots for analysts; POST /developer/exports/analytics)
+    EXPORT_DIR: str = "exports"
+    EXPORT_BATCH_SIZE: int = 10_000  # rows per server-side cursor fetch and Parquet row group
+    
+    # Sampling profiler (POST /developer/profile, X-Profile request header)
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_SECONDS: float = 60.0
+    PROFILE_KEEP_SECONDS: int = 600  # per-request profiles stay readable this long
+    
+    # Logging: JSON lines on stdout, written by a background thread per worker
+    LOG_LEVEL: str = "INFO"
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0  # fraction of successful requests logged; errors and slow ones always are
+    ACCESS_LOG_SLOW_MS: float = 1000.0
+    ACCESS_LOG_STREAM_PATHS: List[str] = [  # long-lived by design, so never "slow"
+        "/api/v1/events/public/*/live", "/api/v1/payments/*/await",
+    ]
+    ACCESS_LOG_SLOW_QUERY_MS: float = 200.0  # SQL statements slower than this are logged on their own
+    ACCESS_LOG_QUEUE_SIZE: int = 10_000  # records waiting for the writer; beyond this they are dropped
+    
+    # Developer dashboard
+    DASHBOARD_CACHE_SECONDS: float = 5.0
+    DASHBOARD_REVENUE_DAYS: int = 30
+    DASHBOARD_TOP_EVENTS: int = 10
+    DASHBOARD_RECENT_ACTIONS: int = 20
+    
+    # Payment reconciliation against the gateway
+    RECONCILE_INTERVAL_SECONDS: int = 900
+    RECONCILE_WINDOW_HOURS: int = 24
+    RECONCILE_CONCURRENCY: int = 4
+    # Gateway fetch reaches this far past the local window, since a local payment is
+    # stamped after (and the gateway clock may differ from) the gateway's order
+    RECONCILE_MARGIN_SECONDS: int = 600
+    RECONCILE_REPORT_DIR: str = "reports"
+    
+    # Schema
+    SCHEMA_CHECK_ON_STARTUP: bool = True
+    
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
@@ -0,0 +1,129 @@
+"""
+Per-worker PostgreSQL LISTEN/NOTIFY dispatcher
+
+Each worker holds a single dedicated connection that LISTENs on every channel
+with a registered handler. The socket is watched by the event loop, so an idle
+listener costs nothing; notifications are dispatched to in-process handlers
+on the loop thread.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], None]
+
+
+class PgListener:
+    RECONNECT_MAX_DELAY = 30.0
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._reconnect_handlers: List[Callable[[], None]] = []
+        self._conn = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopped = True
+
+    def add_handler(self, channel: str, handler: Handler) -> None:
+        """Call ``handler(payload)`` for every notification on ``channel``"""
+        first = channel not in self._handlers
+        self._handlers.setdefault(channel, []).append(handler)
+        if first and self._conn is not None:
+            self._listen(channel)
+
+    def on_reconnect(self, callback: Callable[[], None]) -> None:
+        """Called after the connection was re-established; notifications may have been missed"""
+        self._reconnect_handlers.append(callback)
+
+    def _listen(self, channel: str) -> None:
+        with self._conn.cursor() as cur:
+            cur.execute(f'LISTEN "{channel}"')
+
+    def _open(self):
+        fairy = self._engine.raw_connection()
+        # Take the connection out of the pool for good; it is never returned
+        fairy.detach()
+        conn = fairy.driver_connection
+        conn.autocommit = True
+        return conn
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopped = False
+        await self._connect(initial=True)
+
+    async def _connect(self, initial: bool = False) -> None:
+        delay = 0.5
+        while not self._stopped:
+            try:
+                self._conn = await self._loop.run_in_executor(None, self._open)
+                for channel in self._handlers:
+                    self._listen(channel)
+                self._loop.add_reader(self._conn.fileno(), self._on_readable)
+                break
+            except Exception:
+                self._conn = None
+                if initial:
+                    raise
+                logger.warning("LISTEN connection failed, retrying in %.1fs", delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+        if not initial and self._conn is not None:
+            for callback in self._reconnect_handlers:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("LISTEN reconnect handler failed")
+
+    def _on_readable(self) -> None:
+        try:
+            self._conn.poll()
+        except Exception:
+            logger.warning("LISTEN connection lost", exc_info=True)
+            self._drop()
+            self._reconnect_task = self._loop.create_task(self._connect())
+            return
+        notifies = self._conn.notifies
+        while notifies:
+            notify = notifies.pop(0)
+            for handler in self._handlers.get(notify.channel, ()):
+                try:
+                    handler(notify.payload)
+                except Exception:
+                    logger.exception("NOTIFY handler for %s failed", notify.channel)
+
+    def _drop(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._loop.remove_reader(self._conn.fileno())
+        except Exception:
+            pass
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        self._drop()
+
+
+def notify(db: Session, channel: str, payload: str) -> None:
+    """Queue a notification; PostgreSQL delivers it when ``db`` commits"""
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+listener = PgListener(engine)
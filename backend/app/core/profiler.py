@@ -0,0 +1,256 @@
+"""
+Sampling profiler
+
+While at least one recording is active, a daemon thread snapshots the Python
+stacks of every thread in the worker (``sys._current_frames()``) each
+PROFILE_INTERVAL_MS and counts identical stacks. No tracing hooks are
+installed and the thread exits when the last recording stops, so an idle
+profiler costs nothing beyond ``ProfileMiddleware`` looking for its header.
+
+- ``POST /developer/profile?seconds=N`` records the worker that serves it.
+- A developer request carrying ``X-Profile: 1`` is recorded while it runs;
+  the response gets ``X-Profile-Id`` and the profile is kept for
+  PROFILE_KEEP_SECONDS, readable from ``GET /developer/profile/{id}`` on any
+  worker of the host (via the shared cache tier when there is one).
+
+Samples cover all threads, so a per-request profile also contains whatever
+else the worker ran at the same time; ``concurrent_requests`` says how busy
+it was. Stacks parked in the standard library's wait primitives are dropped.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import create_shared_backend
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.security import get_bearer_claims
+from app.services import object_cache
+
+MAX_DEPTH = 128
+
+# Leaf frames of threads that are waiting, not working (runners.py: an idle uvloop event loop)
+_IDLE_FILES = (
+    "threading.py", "selectors.py", "queue.py",
+    os.path.join("concurrent", "futures", "thread.py"), os.path.join("asyncio", "runners.py"),
+)
+
+
+@lru_cache(maxsize=8192)
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame, thread_name: str) -> Optional[Tuple[str, ...]]:
+    if frame.f_code.co_filename.endswith(_IDLE_FILES):
+        return None
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(f"thread {thread_name}")
+    labels.reverse()
+    return tuple(labels)
+
+
+class Recording:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = time.monotonic()
+        self.duration = 0.0
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format (flamegraph.pl, speedscope and most viewers read it)"""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        frames: Dict[str, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.most_common():
+            samples.append([frames.setdefault(label, len(frames)) for label in stack])
+            weights.append(round(count * self.interval, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": label} for label in frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(self.duration, 6),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": name,
+            "exporter": "cascade-forum",
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "samples": self.samples,
+            "duration": self.duration,
+            "stacks": [[list(stack), count] for stack, count in self.stacks.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Recording":
+        recording = cls(data["interval"])
+        recording.samples = data["samples"]
+        recording.duration = data["duration"]
+        recording.stacks = Counter({tuple(stack): count for stack, count in data["stacks"]})
+        return recording
+
+
+class Sampler:
+    """One sampling thread per worker, shared by all active recordings"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._recordings: Set[Recording] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> int:
+        return len(self._recordings)
+
+    def start(self) -> Recording:
+        recording = Recording(self.interval)
+        with self._lock:
+            self._recordings.add(recording)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        return recording
+
+    def stop(self, recording: Recording) -> Recording:
+        with self._lock:
+            self._recordings.discard(recording)
+        recording.duration = time.monotonic() - recording.started
+        return recording
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            stacks = [_stack(frame, names.get(ident, str(ident))) for ident, frame in frames.items() if ident != me]
+            # Don't keep other threads' frames (and their locals) alive while sleeping
+            del frames
+            stacks = [stack for stack in stacks if stack is not None]
+            # Under the lock, so a stopped recording is never updated again
+            with self._lock:
+                if not self._recordings:
+                    self._thread = None
+                    return
+                for recording in self._recordings:
+                    recording.samples += 1
+                    recording.stacks.update(stacks)
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Recent per-request profiles: a local ring, plus the host-wide shared tier if available"""
+
+    def __init__(self, keep: int = 50):
+        self._local: "OrderedDict[str, str]" = OrderedDict()
+        self._keep = keep
+        self._shared = create_shared_backend()
+        # put() runs in the threadpool
+        self._lock = threading.Lock()
+
+    def put(self, profile_id: str, data: Dict[str, Any]) -> None:
+        value = json.dumps(data)
+        with self._lock:
+            self._local[profile_id] = value
+            while len(self._local) > self._keep:
+                self._local.popitem(last=False)
+        if self._shared is not None:
+            self._shared.set(f"profile:{profile_id}", value, settings.PROFILE_KEEP_SECONDS)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        value = self._local.get(profile_id)
+        if value is None and self._shared is not None:
+            value = self._shared.get(f"profile:{profile_id}")
+        return json.loads(value) if value else None
+
+
+sampler = Sampler(settings.PROFILE_INTERVAL_MS / 1000)
+profiles = ProfileStore()
+
+
+def _is_developer(user_id: str) -> bool:
+    """Same check as ``require_developer``: the role comes from the cached user, not the token"""
+    db = SessionLocal()
+    try:
+        user = object_cache.get_user(db, user_id)
+    finally:
+        db.close()
+    return user is not None and user.is_active and user.role == "developer"
+
+
+class ProfileMiddleware:
+    """ASGI middleware recording developer requests that send ``X-Profile: 1``"""
+
+    def __init__(self, app):
+        self.app = app
+        self.inflight = 0
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return value in (b"1", b"true")
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        self.inflight += 1
+        try:
+            if not self._requested(scope):
+                return await self.app(scope, receive, send)
+            claims = get_bearer_claims(scope)
+            if not claims or not claims.get("sub") or not await run_in_threadpool(_is_developer, claims["sub"]):
+                return await self.app(scope, receive, send)
+            await self._profile(scope, receive, send)
+        finally:
+            self.inflight -= 1
+
+    async def _profile(self, scope, receive, send):
+        profile_id = uuid.uuid4().hex
+        # Other requests in this worker when the profile started
+        concurrent = self.inflight - 1
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            await send(message)
+
+        recording = sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop(recording)
+            # The store may write to the shared tier (SQLite); keep it off the event loop
+            await run_in_threadpool(profiles.put, profile_id, {
+                **recording.to_dict(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "worker_pid": os.getpid(),
+                "concurrent_requests": concurrent,
+            })
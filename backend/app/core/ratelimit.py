@@ -0,0 +1,204 @@
+"""
+Token-bucket rate limiting middleware
+
+Buckets are keyed per route and per client IP and/or per authenticated user.
+State lives in a pluggable backend: ``memory`` is per-process, ``sqlite``
+keeps buckets in a file (by default on /dev/shm) shared by every gunicorn
+worker on the host. SQLite calls run in the threadpool, and a busy or broken
+database lets the request through rather than failing it.
+"""
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import get_bearer_claims
+
+logger = logging.getLogger(__name__)
+
+
+class BucketSpec:
+    """``capacity`` tokens, refilled evenly over ``period`` seconds"""
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+
+    @classmethod
+    def parse(cls, spec: str) -> "BucketSpec":
+        capacity, period = spec.split("/")
+        return cls(int(capacity), float(period))
+
+
+def _refill(tokens: float, last: float, now: float, spec: BucketSpec) -> float:
+    return min(spec.capacity, tokens + (now - last) * spec.rate)
+
+
+class RateLimitBackend(ABC):
+    """Interface for bucket storage"""
+
+    # take() does I/O and must not run on the event loop
+    blocking = False
+
+    @abstractmethod
+    def take(self, key: str, spec: BucketSpec, cost: float = 1.0) -> Tuple[bool, float]:
+        """Consume ``cost`` tokens. Returns (allowed, seconds until enough tokens are available)."""
+
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process buckets; bounded LRU so a flood of distinct IPs can't grow it forever"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def take(self, key: str, spec: BucketSpec, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (spec.capacity, now))
+            tokens = _refill(tokens, last, now, spec)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (cost - tokens) / spec.rate
+
+
+class SQLiteBackend(RateLimitBackend):
+    """Buckets in a SQLite file shared by all worker processes on the host"""
+
+    blocking = True
+    PRUNE_EVERY = 10_000
+    PRUNE_AGE = 3600
+    # Waiting longer for the write lock than a request is worth; callers fail open instead
+    BUSY_TIMEOUT = 0.05
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # Connections must not cross a fork
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, key: str, spec: BucketSpec, cost: float = 1.0) -> Tuple[bool, float]:
+        conn = self._conn()
+        # Wall clock: monotonic clocks are not comparable across processes
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = spec.capacity if row is None else _refill(row[0], row[1], now, spec)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._calls += 1
+        if self._calls % self.PRUNE_EVERY == 0:
+            # Idle buckets are full again; dropping them is equivalent to keeping them
+            conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.PRUNE_AGE,))
+        return allowed, 0.0 if allowed else (cost - tokens) / spec.rate
+
+
+def create_backend() -> RateLimitBackend:
+    # /dev/shm doesn't exist everywhere (e.g. Windows dev machines); fall back to per-process buckets
+    if settings.RATE_LIMIT_BACKEND == "sqlite" and os.path.isdir(os.path.dirname(settings.RATE_LIMIT_SQLITE_PATH)):
+        return SQLiteBackend(settings.RATE_LIMIT_SQLITE_PATH)
+    return MemoryBackend()
+
+
+Rules = Dict[str, Dict[str, BucketSpec]]
+
+
+def parse_rules(raw: Dict[str, Dict[str, str]]) -> Rules:
+    """``{"POST /api/v1/auth/login": {"ip": "10/60"}}`` -> parsed bucket specs"""
+    return {
+        route: {scope: BucketSpec.parse(spec) for scope, spec in limits.items()}
+        for route, limits in raw.items()
+    }
+
+
+class RateLimitMiddleware:
+    """ASGI middleware rejecting over-limit requests with 429 and Retry-After"""
+
+    def __init__(self, app, rules: Optional[Rules] = None, backend: Optional[RateLimitBackend] = None):
+        self.app = app
+        self.rules = rules if rules is not None else parse_rules(settings.RATE_LIMITS)
+        self.backend = backend or create_backend()
+
+    def _bucket_keys(self, scope, route: str, limits: Dict[str, BucketSpec]) -> List[Tuple[str, BucketSpec]]:
+        keys = []
+        if "ip" in limits and scope.get("client"):
+            keys.append((f"{route}|ip|{scope['client'][0]}", limits["ip"]))
+        if "user" in limits:
+            claims = get_bearer_claims(scope)
+            if claims and claims.get("sub"):
+                keys.append((f"{route}|user|{claims['sub']}", limits["user"]))
+        return keys
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route = f"{scope['method']} {scope['path'].rstrip('/')}"
+        limits = self.rules.get(route)
+        if limits:
+            for key, spec in self._bucket_keys(scope, route, limits):
+                try:
+                    if self.backend.blocking:
+                        allowed, retry_after = await run_in_threadpool(self.backend.take, key, spec)
+                    else:
+                        allowed, retry_after = self.backend.take(key, spec)
+                except sqlite3.OperationalError:
+                    # Locked or unavailable bucket file: serving unlimited beats failing the request
+                    logger.warning("Rate limit backend unavailable, allowing %s", route, exc_info=True)
+                    continue
+                if not allowed:
+                    return await self._reject(send, retry_after)
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send, retry_after: float):
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.security import get_current_user_id
 from app.models.user import User
+from app.services import object_cache
 
 
 class RoleChecker:
@@ -21,7 +22,8 @@ class RoleChecker:
         current_user_id: str = Depends(get_current_user_id),
         db: Session = Depends(get_db)
     ) -> User:
-        user = db.query(User).filter(User.id == current_user_id).first()
+        # Cached snapshot; invalidated on every users UPDATE/DELETE
+        user = object_cache.get_user(db, current_user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
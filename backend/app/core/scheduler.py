@@ -0,0 +1,98 @@
+"""
+Periodic background jobs with leader election across workers
+
+Every worker runs the same schedule. Each attempt first takes a PostgreSQL
+session advisory lock named after the job, so runs never overlap, and then
+claims the run in ``scheduled_jobs``: the job's ``last_run_at`` only moves
+to ``now()`` if the previous run started at least ``interval`` ago. Workers
+that find the lock taken or the job not yet due skip the attempt, so a job
+runs about once per interval however many workers there are.
+"""
+import asyncio
+import logging
+import random
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[Session], Any]
+
+
+# Database clock, so workers on different hosts agree on when a job is due
+_CLAIM_SQL = """
+    INSERT INTO scheduled_jobs (name, last_run_at) VALUES (:name, now())
+    ON CONFLICT (name) DO UPDATE SET last_run_at = now()
+    WHERE scheduled_jobs.last_run_at <= now() - make_interval(secs => :interval)
+    RETURNING name
+"""
+
+
+class _ScheduledJob:
+    def __init__(self, name: str, interval: float, func: Job):
+        self.name = name
+        self.interval = interval
+        self.func = func
+
+
+class Scheduler:
+    def __init__(self, engine: Engine):
+        self._engine = engine
+        self._jobs: List[_ScheduledJob] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, interval: float, func: Job) -> None:
+        """Run ``func(db)`` every ``interval`` seconds on exactly one worker"""
+        self._jobs.append(_ScheduledJob(name, interval, func))
+
+    def _run_locked(self, job: _ScheduledJob) -> Optional[Any]:
+        with self._engine.connect() as conn:
+            locked = conn.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": f"cascade_job:{job.name}"}
+            ).scalar()
+            conn.commit()
+            if not locked:
+                return None
+            try:
+                # Another worker may have just finished this job; only run it if it is due
+                claimed = conn.execute(text(_CLAIM_SQL), {"name": job.name, "interval": job.interval}).first()
+                conn.commit()
+                if claimed is None:
+                    return None
+                db = SessionLocal()
+                try:
+                    return job.func(db)
+                finally:
+                    db.close()
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": f"cascade_job:{job.name}"})
+                conn.commit()
+
+    async def _loop(self, job: _ScheduledJob) -> None:
+        # Spread workers so they don't all race for the lock at the same instant
+        await asyncio.sleep(random.uniform(0, job.interval))
+        while True:
+            try:
+                result = await run_in_threadpool(self._run_locked, job)
+                if result is not None:
+                    logger.info("job %s: %s", job.name, result)
+            except Exception:
+                logger.exception("job %s failed", job.name)
+            await asyncio.sleep(job.interval)
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._loop(job)) for job in self._jobs]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+
+scheduler = Scheduler(engine)
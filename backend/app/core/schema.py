@@ -0,0 +1,567 @@
+"""
+Versioned schema management
+
+Schema changes are applied by an explicit step (``python -m app.cli migrate``)
+instead of ``create_all`` on every worker boot. Workers only compare the
+fingerprint recorded by the last migration with the one computed from the
+model metadata, which is a single-row read.
+"""
+import hashlib
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Index, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.core.database import Base
+
+# Register every model on Base.metadata
+from app.models import user, event, registration, payment, audit_log, idempotency_key, user_session, user_import, tombstone, checkin, scheduled_job  # noqa: F401
+
+
+class SchemaMismatchError(RuntimeError):
+    """Raised when the database schema does not match the application models"""
+
+
+def _create_tables(conn: Connection) -> None:
+    Base.metadata.create_all(bind=conn, checkfirst=True)
+
+
+def _updated_at_triggers(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION update_updated_at_column()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.updated_at = CURRENT_TIMESTAMP;
+            RETURN NEW;
+        END;
+        $$ language 'plpgsql'
+    """))
+    for table in ("users", "events", "registrations", "payments"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS update_{table}_updated_at ON {table}"))
+        conn.execute(text(
+            f"CREATE TRIGGER update_{table}_updated_at BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()"
+        ))
+
+
+def _initial(conn: Connection) -> None:
+    _create_tables(conn)
+    _updated_at_triggers(conn)
+
+
+def _event_capacity_notify(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION notify_event_capacity()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('event_capacity', json_build_object(
+                'id', NEW.id,
+                'status', NEW.status,
+                'current_participants', NEW.current_participants,
+                'max_participants', NEW.max_participants,
+                'version', (extract(epoch FROM NEW.updated_at) * 1000000)::bigint
+            )::text);
+            RETURN NEW;
+        END;
+        $$ language 'plpgsql'
+    """))
+    conn.execute(text("DROP TRIGGER IF EXISTS notify_events_capacity ON events"))
+    conn.execute(text("""
+        CREATE TRIGGER notify_events_capacity AFTER UPDATE ON events
+            FOR EACH ROW
+            WHEN (OLD.current_participants IS DISTINCT FROM NEW.current_participants
+                  OR OLD.max_participants IS DISTINCT FROM NEW.max_participants
+                  OR OLD.status IS DISTINCT FROM NEW.status)
+            EXECUTE FUNCTION notify_event_capacity()
+    """))
+
+
+def _waitlist(conn: Connection) -> None:
+    conn.execute(text("CREATE SEQUENCE IF NOT EXISTS registration_waitlist_seq"))
+    conn.execute(text("ALTER TABLE events ADD COLUMN IF NOT EXISTS waitlist_count INTEGER DEFAULT 0"))
+    conn.execute(text("ALTER TABLE registrations ADD COLUMN IF NOT EXISTS waitlist_position BIGINT"))
+    conn.execute(text("ALTER TABLE registrations DROP CONSTRAINT IF EXISTS registrations_status_check"))
+    conn.execute(text(
+        "ALTER TABLE registrations ADD CONSTRAINT registrations_status_check "
+        "CHECK (status IN ('pending', 'accepted', 'rejected', 'waitlisted', 'cancelled'))"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_registrations_waitlist "
+        "ON registrations(event_id, waitlist_position) WHERE status = 'waitlisted'"
+    ))
+
+
+def _idempotency_keys(conn: Connection) -> None:
+    _create_tables(conn)
+
+
+def _event_lifecycle(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE events ADD COLUMN IF NOT EXISTS registration_open BOOLEAN DEFAULT TRUE"))
+    conn.execute(text(
+        "UPDATE events SET registration_open = FALSE WHERE registration_deadline <= now() AND registration_open"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_events_published_date ON events(event_date DESC) WHERE status = 'published'"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_events_open_deadline ON events(registration_deadline) "
+        "WHERE status = 'published' AND registration_open"
+    ))
+
+
+def _index(table: str, name: str) -> Index:
+    return next(i for i in Base.metadata.tables[table].indexes if i.name == name)
+
+
+def _cache_invalidation_notify(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION notify_cache_invalidate()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('cache_invalidate', json_build_object(
+                'table', TG_TABLE_NAME,
+                'id', OLD.id
+            )::text);
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql'
+    """))
+    for table in ("users", "events"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS cache_invalidate_{table} ON {table}"))
+        conn.execute(text(
+            f"CREATE TRIGGER cache_invalidate_{table} AFTER UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidate()"
+        ))
+
+
+# Single-column indexes superseded by the composite set in migration 6, under
+# both the model names (ix_) and the database_schema.sql names (idx_)
+_SUPERSEDED_INDEXES = [
+    "ix_events_status", "idx_events_status",
+    "ix_events_created_by", "idx_events_created_by",
+    "ix_registrations_user_id", "idx_registrations_user_id",
+    "ix_registrations_event_id", "idx_registrations_event_id",
+    "ix_payments_registration_id", "idx_payments_registration_id",
+    "ix_audit_logs_admin_id", "idx_audit_logs_admin_id",
+    "ix_audit_logs_action_type", "idx_audit_logs_action_type",
+    "ix_users_role", "idx_users_role",
+]
+
+_ACCESS_PATH_INDEXES = [
+    ("events", "idx_events_status_date"),
+    ("events", "idx_events_created_by_created_at"),
+    ("events", "idx_events_created_at"),
+    ("registrations", "idx_registrations_user_created_at"),
+    ("registrations", "idx_registrations_event_created_at"),
+    ("registrations", "idx_registrations_created_at"),
+    ("payments", "idx_payments_registration_created_at"),
+    ("payments", "idx_payments_created_at"),
+    ("audit_logs", "idx_audit_logs_admin_created_at"),
+    ("audit_logs", "idx_audit_logs_action_created_at"),
+    ("users", "idx_users_role_created_at"),
+    ("users", "idx_users_created_at"),
+]
+
+
+def _user_sessions(conn: Connection) -> None:
+    _create_tables(conn)
+
+
+def _user_imports(conn: Connection) -> None:
+    _create_tables(conn)
+
+
+def _change_feeds(conn: Connection) -> None:
+    _create_tables(conn)
+    # Replaced by the commit-ordered change indexes in step 16
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_events_updated_at_id ON events(updated_at, id)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_registrations_user_updated_at_id ON registrations(user_id, updated_at, id)"
+    ))
+    # TG_ARGV[0] names the owner column; read through jsonb so tables without one still compile
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION record_tombstone()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            INSERT INTO tombstones (table_name, row_id, owner_id, deleted_at)
+            VALUES (
+                TG_TABLE_NAME,
+                OLD.id,
+                CASE WHEN TG_NARGS > 0 THEN (to_jsonb(OLD) ->> TG_ARGV[0])::uuid END,
+                CURRENT_TIMESTAMP
+            )
+            ON CONFLICT (table_name, row_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql'
+    """))
+    for table, owner in (("events", ""), ("registrations", "'user_id'")):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS tombstone_{table} ON {table}"))
+        conn.execute(text(
+            f"CREATE TRIGGER tombstone_{table} AFTER DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION record_tombstone({owner})"
+        ))
+
+
+def _audit_log_indexes(conn: Connection) -> None:
+    conn.execute(CreateIndex(_index("audit_logs", "idx_audit_logs_target_created_at"), if_not_exists=True))
+    conn.execute(CreateIndex(_index("audit_logs", "idx_audit_logs_details"), if_not_exists=True))
+    # Superseded by idx_audit_logs_target_created_at
+    conn.execute(text("DROP INDEX IF EXISTS idx_audit_logs_target"))
+
+
+def _access_path_indexes(conn: Connection) -> None:
+    # Plain CREATE INDEX (not CONCURRENTLY) since migrations run in one transaction;
+    # on a large production database create these by hand with CONCURRENTLY first.
+    for table, name in _ACCESS_PATH_INDEXES:
+        conn.execute(CreateIndex(_index(table, name), if_not_exists=True))
+    for name in _SUPERSEDED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def _payment_status_notify(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION notify_payment_status()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('payment_status', json_build_object(
+                'order_id', NEW.razorpay_order_id,
+                'status', NEW.status,
+                'version', (extract(epoch FROM NEW.updated_at) * 1000000)::bigint
+            )::text);
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql'
+    """))
+    conn.execute(text("DROP TRIGGER IF EXISTS notify_payments_status ON payments"))
+    conn.execute(text("""
+        CREATE TRIGGER notify_payments_status AFTER UPDATE ON payments
+            FOR EACH ROW
+            WHEN (OLD.status IS DISTINCT FROM NEW.status)
+            EXECUTE FUNCTION notify_payment_status()
+    """))
+
+
+def _tickets_and_checkins(conn: Connection) -> None:
+    conn.execute(text(
+        "ALTER TABLE registrations ADD COLUMN IF NOT EXISTS ticket_version INTEGER NOT NULL DEFAULT 1"
+    ))
+    _create_tables(conn)
+    # A status change invalidates tickets issued before it, whichever code path made it
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION bump_ticket_version()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.ticket_version = OLD.ticket_version + 1;
+            RETURN NEW;
+        END;
+        $$ language 'plpgsql'
+    """))
+    conn.execute(text("DROP TRIGGER IF EXISTS bump_registrations_ticket_version ON registrations"))
+    conn.execute(text("""
+        CREATE TRIGGER bump_registrations_ticket_version BEFORE UPDATE ON registrations
+            FOR EACH ROW
+            WHEN (OLD.status IS DISTINCT FROM NEW.status
+                  OR OLD.payment_status IS DISTINCT FROM NEW.payment_status)
+            EXECUTE FUNCTION bump_ticket_version()
+    """))
+
+
+def _scheduled_jobs(conn: Connection) -> None:
+    _create_tables(conn)
+
+
+def _event_live_version(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE events ADD COLUMN IF NOT EXISTS live_version INTEGER NOT NULL DEFAULT 1"))
+    # updated_at is the transaction start time, so two commits can publish it out of order
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION bump_live_version()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.live_version = OLD.live_version + 1;
+            RETURN NEW;
+        END;
+        $$ language 'plpgsql'
+    """))
+    conn.execute(text("DROP TRIGGER IF EXISTS bump_events_live_version ON events"))
+    conn.execute(text("""
+        CREATE TRIGGER bump_events_live_version BEFORE UPDATE ON events
+            FOR EACH ROW
+            WHEN (OLD.current_participants IS DISTINCT FROM NEW.current_participants
+                  OR OLD.max_participants IS DISTINCT FROM NEW.max_participants
+                  OR OLD.status IS DISTINCT FROM NEW.status)
+            EXECUTE FUNCTION bump_live_version()
+    """))
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION notify_event_capacity()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('event_capacity', json_build_object(
+                'id', NEW.id,
+                'status', NEW.status,
+                'current_participants', NEW.current_participants,
+                'max_participants', NEW.max_participants,
+                'version', NEW.live_version
+            )::text);
+            RETURN NEW;
+        END;
+        $$ language 'plpgsql'
+    """))
+
+
+_CHANGE_FEED_TABLES = ("events", "registrations", "tombstones")
+
+
+def _add_change_stamps(conn: Connection, tables) -> None:
+    """change_xid/change_seq columns on ``tables``, kept current by the stamp_change() trigger"""
+    conn.execute(text("CREATE SEQUENCE IF NOT EXISTS change_feed_seq"))
+    for table in tables:
+        # Existing rows sort before every new write; the defaults only backfill them
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS change_xid BIGINT NOT NULL DEFAULT 0"))
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('change_feed_seq')"
+        ))
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN change_xid DROP DEFAULT, ALTER COLUMN change_seq DROP DEFAULT"))
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION stamp_change()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.change_xid = pg_current_xact_id()::text::bigint;
+            NEW.change_seq = nextval('change_feed_seq');
+            RETURN NEW;
+        END;
+        $$ language 'plpgsql'
+    """))
+    for table in tables:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS stamp_{table}_change ON {table}"))
+        conn.execute(text(
+            f"CREATE TRIGGER stamp_{table}_change BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION stamp_change()"
+        ))
+
+
+def _commit_ordered_change_feeds(conn: Connection) -> None:
+    _add_change_stamps(conn, _CHANGE_FEED_TABLES)
+    for table, name in (
+        ("events", "idx_events_change"),
+        ("registrations", "idx_registrations_user_change"),
+        ("tombstones", "idx_tombstones_table_change"),
+        ("tombstones", "idx_tombstones_owner_change"),
+    ):
+        conn.execute(CreateIndex(_index(table, name), if_not_exists=True))
+    for name in (
+        "idx_events_updated_at_id",
+        "idx_registrations_user_updated_at_id",
+        "idx_tombstones_table_deleted",
+        "idx_tombstones_owner_deleted",
+    ):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def _analytics_change_stamps(conn: Connection) -> None:
+    # The analytics export pages every table by its change position, like the feeds
+    _add_change_stamps(conn, ("users", "payments", "audit_logs"))
+    for table, name in (
+        ("users", "idx_users_change"),
+        ("registrations", "idx_registrations_change"),
+        ("payments", "idx_payments_change"),
+        ("audit_logs", "idx_audit_logs_change"),
+    ):
+        conn.execute(CreateIndex(_index(table, name), if_not_exists=True))
+
+
+def _payment_status_version(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE payments ADD COLUMN IF NOT EXISTS status_version INTEGER NOT NULL DEFAULT 1"))
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION bump_status_version()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.status_version = OLD.status_version + 1;
+            RETURN NEW;
+        END;
+        $$ language 'plpgsql'
+    """))
+    conn.execute(text("DROP TRIGGER IF EXISTS bump_payments_status_version ON payments"))
+    conn.execute(text("""
+        CREATE TRIGGER bump_payments_status_version BEFORE UPDATE ON payments
+            FOR EACH ROW
+            WHEN (OLD.status IS DISTINCT FROM NEW.status)
+            EXECUTE FUNCTION bump_status_version()
+    """))
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION notify_payment_status()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('payment_status', json_build_object(
+                'order_id', NEW.razorpay_order_id,
+                'status', NEW.status,
+                'version', NEW.status_version
+            )::text);
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql'
+    """))
+
+
+def _published_event_tombstones(conn: Connection) -> None:
+    conn.execute(CreateIndex(_index("events", "idx_events_published_change"), if_not_exists=True))
+    # Clients' feed hides unpublished events, so leaving "published" is their deletion
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION record_unpublished_event()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            INSERT INTO tombstones (table_name, row_id, owner_id, deleted_at)
+            VALUES ('published_events', OLD.id, NULL, CURRENT_TIMESTAMP)
+            ON CONFLICT (table_name, row_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql'
+    """))
+    conn.execute(text("DROP TRIGGER IF EXISTS tombstone_events_unpublished ON events"))
+    conn.execute(text("""
+        CREATE TRIGGER tombstone_events_unpublished AFTER UPDATE ON events
+            FOR EACH ROW
+            WHEN (OLD.status = 'published' AND NEW.status IS DISTINCT FROM 'published')
+            EXECUTE FUNCTION record_unpublished_event()
+    """))
+    conn.execute(text("DROP TRIGGER IF EXISTS tombstone_events_published_deleted ON events"))
+    conn.execute(text("""
+        CREATE TRIGGER tombstone_events_published_deleted AFTER DELETE ON events
+            FOR EACH ROW
+            WHEN (OLD.status = 'published')
+            EXECUTE FUNCTION record_unpublished_event()
+    """))
+    # A republished event is a change again, not a deletion
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION clear_unpublished_event()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            DELETE FROM tombstones WHERE table_name = 'published_events' AND row_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql'
+    """))
+    conn.execute(text("DROP TRIGGER IF EXISTS untombstone_events_republished ON events"))
+    conn.execute(text("""
+        CREATE TRIGGER untombstone_events_republished AFTER UPDATE ON events
+            FOR EACH ROW
+            WHEN (NEW.status = 'published' AND OLD.status IS DISTINCT FROM 'published')
+            EXECUTE FUNCTION clear_unpublished_event()
+    """))
+
+
+# Ordered migration steps. Every step must be idempotent (IF NOT EXISTS / OR REPLACE)
+# because a fresh database runs all of them after the tables already match the models.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "initial schema", _initial),
+    (2, "event capacity notifications", _event_capacity_notify),
+    (3, "registration waitlist", _waitlist),
+    (4, "idempotency keys", _idempotency_keys),
+    (5, "event lifecycle", _event_lifecycle),
+    (6, "composite access-path indexes", _access_path_indexes),
+    (7, "object cache invalidation notifications", _cache_invalidation_notify),
+    (8, "refresh-token sessions", _user_sessions),
+    (9, "user imports", _user_imports),
+    (10, "delta-sync cursors and tombstones", _change_feeds),
+    (11, "audit log timeline and details indexes", _audit_log_indexes),
+    (12, "payment status notifications", _payment_status_notify),
+    (13, "signed tickets and check-ins", _tickets_and_checkins),
+    (14, "scheduled job run claims", _scheduled_jobs),
+    (15, "commit-ordered live event versions", _event_live_version),
+    (16, "commit-ordered change feeds", _commit_ordered_change_feeds),
+    (17, "commit-ordered payment status versions", _payment_status_version),
+    (18, "change stamps for the analytics export", _analytics_change_stamps),
+    (19, "published event tombstones for client feeds", _published_event_tombstones),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def compute_fingerprint() -> str:
+    """Hash of the PostgreSQL DDL generated from the model metadata"""
+    dialect = postgresql.dialect()
+    digest = hashlib.sha256()
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    return digest.hexdigest()
+
+
+# Computed once at import; with preload_app this happens in the gunicorn master
+SCHEMA_FINGERPRINT = compute_fingerprint()
+
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            fingerprint VARCHAR(64) NOT NULL,
+            description VARCHAR(255),
+            applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+def current_version(conn: Connection) -> Tuple[int, Optional[str]]:
+    """Return the latest applied (version, fingerprint), or (0, None) for an unmanaged database"""
+    exists = conn.execute(text("SELECT to_regclass('schema_version')")).scalar()
+    if exists is None:
+        return 0, None
+    row = conn.execute(text(
+        "SELECT version, fingerprint FROM schema_version ORDER BY version DESC LIMIT 1"
+    )).first()
+    if row is None:
+        return 0, None
+    return row.version, row.fingerprint
+
+
+def migrate(engine: Engine, restamp: bool = False) -> List[int]:
+    """Apply pending migrations and stamp the current fingerprint. Returns applied versions.
+
+    A model change without a new MIGRATIONS step raises SchemaMismatchError:
+    the database would silently lack whatever the models now declare. Pass
+    ``restamp`` only after checking the change needs no DDL (e.g. a comment).
+    """
+    applied = []
+    with engine.begin() as conn:
+        # Serialize concurrent migrators
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('cascade_schema_migrate'))"))
+        _ensure_version_table(conn)
+        version, fingerprint = current_version(conn)
+        for step, description, apply in MIGRATIONS:
+            if step <= version:
+                continue
+            apply(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, fingerprint, description) "
+                     "VALUES (:version, :fingerprint, :description)"),
+                {"version": step, "fingerprint": SCHEMA_FINGERPRINT, "description": description},
+            )
+            applied.append(step)
+        if not applied and fingerprint != SCHEMA_FINGERPRINT:
+            if not restamp:
+                raise SchemaMismatchError(
+                    f"Models changed (fingerprint {str(fingerprint)[:12]} -> {SCHEMA_FINGERPRINT[:12]}) "
+                    f"without a new migration step after version {version}. Add one to MIGRATIONS, "
+                    f"or run `python -m app.cli migrate --restamp` if the change needs no DDL."
+                )
+            conn.execute(
+                text("UPDATE schema_version SET fingerprint = :fingerprint WHERE version = :version"),
+                {"version": version, "fingerprint": SCHEMA_FINGERPRINT},
+            )
+    return applied
+
+
+def check_schema(engine: Engine) -> None:
+    """Cheap boot-time check that the database was migrated for this build"""
+    with engine.connect() as conn:
+        version, fingerprint = current_version(conn)
+    if version != SCHEMA_VERSION or fingerprint != SCHEMA_FINGERPRINT:
+        raise SchemaMismatchError(
+            f"Database schema is at version {version} (fingerprint {str(fingerprint)[:12]}), "
+            f"application expects version {SCHEMA_VERSION} (fingerprint {SCHEMA_FINGERPRINT[:12]}). "
+            f"Run `python -m app.cli migrate`."
+        )
@@ -1,8 +1,13 @@
 """
 Security utilities: JWT, password hashing, etc.
 """
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from cryptography.hazmat.primitives import serialization
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -24,6 +29,131 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def read_pem(value: str) -> str:
+    """Keys are configured either inline as PEM or as a path to a PEM file"""
+    if value.lstrip().startswith("-----BEGIN"):
+        return value
+    with open(value) as f:
+        return f.read()
+
+
+def _public_pem(private_pem: str) -> str:
+    private_key = serialization.load_pem_private_key(private_pem.encode(), password=None)
+    return private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+
+class KeyRing:
+    """JWT signing and verification keys.
+
+    Tokens with a ``kid`` header are verified with that key's public half, so
+    verify-only nodes never hold a signing secret. Tokens without one are
+    HMAC tokens signed with ``SECRET_KEY`` (accepted while rotating away from it).
+    """
+
+    def __init__(
+        self,
+        secret_key: str,
+        hmac_algorithm: str,
+        signing_algorithm: str,
+        private_keys: Dict[str, str],
+        public_keys: Dict[str, str],
+        active_kid: Optional[str],
+        accept_secret_key: bool,
+    ):
+        self.secret_key = secret_key
+        self.hmac_algorithm = hmac_algorithm
+        self.signing_algorithm = signing_algorithm
+        self.private_keys = private_keys
+        # A signing node can verify its own tokens without separately configured public keys
+        self.public_keys = {kid: _public_pem(pem) for kid, pem in private_keys.items()}
+        self.public_keys.update(public_keys)
+        self.active_kid = active_kid
+        self.accept_secret_key = accept_secret_key
+        if active_kid is not None and active_kid not in private_keys:
+            raise ValueError(f"JWT_ACTIVE_KID {active_kid!r} has no entry in JWT_PRIVATE_KEYS")
+
+    @classmethod
+    def from_settings(cls) -> "KeyRing":
+        return cls(
+            secret_key=settings.SECRET_KEY,
+            hmac_algorithm=settings.ALGORITHM,
+            signing_algorithm=settings.JWT_SIGNING_ALGORITHM,
+            private_keys={kid: read_pem(v) for kid, v in settings.JWT_PRIVATE_KEYS.items()},
+            public_keys={kid: read_pem(v) for kid, v in settings.JWT_PUBLIC_KEYS.items()},
+            active_kid=settings.JWT_ACTIVE_KID,
+            accept_secret_key=settings.JWT_ACCEPT_SECRET_KEY,
+        )
+
+    def sign(self, claims: dict) -> str:
+        if self.active_kid is None:
+            return jwt.encode(claims, self.secret_key, algorithm=self.hmac_algorithm)
+        return jwt.encode(
+            claims,
+            self.private_keys[self.active_kid],
+            algorithm=self.signing_algorithm,
+            headers={"kid": self.active_kid},
+        )
+
+    def verify(self, token: str) -> dict:
+        """Verified claims; raises JWTError"""
+        kid = jwt.get_unverified_header(token).get("kid")
+        # The key decides the algorithm, never the token header
+        if kid is None:
+            if not self.accept_secret_key:
+                raise JWTError("Tokens without kid are no longer accepted")
+            return jwt.decode(token, self.secret_key, algorithms=[self.hmac_algorithm])
+        if kid not in self.public_keys:
+            raise JWTError(f"Unknown signing key {kid!r}")
+        return jwt.decode(token, self.public_keys[kid], algorithms=[self.signing_algorithm])
+
+
+keyring = KeyRing.from_settings()
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified claims keyed by token digest; entries leave at ``exp``"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return entry[1]
+
+    def put(self, digest: bytes, claims: dict) -> None:
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            # Without exp there is nothing to evict on; don't cache
+            return
+        with self._lock:
+            self._entries[digest] = (exp, claims)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = VerifiedTokenCache(settings.JWT_CACHE_SIZE)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -33,17 +163,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return keyring.sign(to_encode)
 
 
 def decode_access_token(token: str) -> Optional[dict]:
-    """Decode and verify a JWT token"""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError:
-        return None
+    """Decode and verify a JWT token (verified claims are cached until they expire)"""
+    digest = token_cache.digest(token)
+    claims = token_cache.get(digest)
+    if claims is None:
+        try:
+            claims = keyring.verify(token)
+        except JWTError:
+            return None
+        token_cache.put(digest, claims)
+    # Callers get their own copy so the cached claims can't be modified
+    return dict(claims)
+
+
+def get_bearer_claims(scope) -> Optional[dict]:
+    """Verified JWT claims from a raw ASGI scope's Authorization header (for middleware)"""
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return decode_access_token(token)
+            return None
+    return None
 
 
 async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
@@ -0,0 +1,97 @@
+"""
+Single-flight coalescing for read handlers
+
+Concurrent identical requests share one in-flight computation instead of
+each running the same queries and serialization. The request key is the
+handler plus its normalised parameters (and the caller's user id when the
+handler depends on ``current_user``, since access rules differ per user).
+Nothing is cached: the next request after the computation finishes runs it
+again. The computation outlives the request that started it, so it runs on
+its own database session rather than the leader's ``db`` dependency, which is
+closed when the leader's request ends.
+
+Usage on a synchronous handler body (run in the threadpool)::
+
+    @router.get("/public/{event_id}", response_model=EventResponse)
+    @coalesce
+    def get_public_event(event_id: UUID, db: Session = Depends(get_db)):
+        ...
+"""
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import SessionLocal
+
+# Handler arguments that are per-request plumbing, not part of the request identity
+_IGNORED_PARAMS = {"db", "request", "current_user"}
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # name -> [calls, executions]
+        self._counts: Dict[str, List[int]] = {}
+
+    async def do(self, name: str, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the in-flight computation for ``key``, starting it if there is none"""
+        counts = self._counts.setdefault(name, [0, 0])
+        counts[0] += 1
+        future = self._inflight.get(key)
+        if future is None:
+            counts[1] += 1
+            # Run detached so a disconnecting leader doesn't cancel it for everyone else
+            future = asyncio.ensure_future(compute())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for name, (calls, executions) in sorted(self._counts.items()):
+            result[name] = {
+                "calls": calls,
+                "executions": executions,
+                "coalesced": calls - executions,
+                "coalescing_ratio": round((calls - executions) / calls, 4) if calls else 0.0,
+            }
+        return result
+
+
+singleflight = SingleFlight()
+
+
+def _normalise(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_normalise(v) for v in value)
+    return value if isinstance(value, Hashable) else repr(value)
+
+
+def _run_detached(func: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+    if "db" not in kwargs:
+        return func(**kwargs)
+    db = SessionLocal()
+    try:
+        return func(**{**kwargs, "db": db})
+    finally:
+        db.close()
+
+
+def coalesce(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """Decorate a synchronous read handler so identical concurrent requests share one run"""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(**kwargs):
+        user = kwargs.get("current_user")
+        key = (
+            name,
+            getattr(user, "id", None),
+            tuple(sorted((k, _normalise(v)) for k, v in kwargs.items() if k not in _IGNORED_PARAMS)),
+        )
+        # The request's own session is never used, so it never checks out a connection
+        return await singleflight.do(name, key, lambda: run_in_threadpool(_run_detached, func, kwargs))
+
+    return wrapper
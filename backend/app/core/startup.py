@@ -0,0 +1,33 @@
+"""
+Per-worker startup timing
+"""
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Reset by the gunicorn post_fork hook; otherwise measured from first import
+_started_at = time.perf_counter()
+_preloaded = False
+_ready_ms: Optional[float] = None
+
+
+def mark_forked() -> None:
+    """Start the clock for a worker forked from a preloaded master"""
+    global _started_at, _preloaded
+    _started_at = time.perf_counter()
+    _preloaded = True
+
+
+def mark_ready() -> float:
+    """Record and report how long this worker took to become ready"""
+    global _ready_ms
+    _ready_ms = (time.perf_counter() - _started_at) * 1000
+    logger.info("worker pid=%s ready in %.1f ms (preloaded=%s)", os.getpid(), _ready_ms, _preloaded)
+    return _ready_ms
+
+
+def startup_report() -> Dict[str, Any]:
+    return {"pid": os.getpid(), "preloaded": _preloaded, "startup_ms": _ready_ms}
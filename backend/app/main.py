@@ -7,52 +7,113 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from contextlib import asynccontextmanager
 
+from app.core import access_log
+from app.core.access_log import AccessLogMiddleware
+from app.core.admission import AdmissionMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine
+from app.core.notify import listener
+from app.core.scheduler import scheduler
+from app.core.profiler import ProfileMiddleware
+from app.core.ratelimit import RateLimitMiddleware
+from app.core.schema import check_schema
+from app.core.startup import mark_ready, startup_report
+from app.services import (
+    change_feed, event_lifecycle, idempotency, live_events, object_cache, payment_waiters, reconciliation, sessions,
+    user_import,
+)
 from app.api.v1.router import api_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
-    # Startup: Create tables
-    Base.metadata.create_all(bind=engine)
+    access_log.pipeline.start()
+    # Startup: verify the schema was migrated (tables are managed by `python -m app.cli migrate`)
+    if settings.SCHEMA_CHECK_ON_STARTUP:
+        check_schema(engine)
+    # One LISTEN connection per worker feeds all in-process subscribers
+    listener.add_handler(live_events.CHANNEL, live_events.hub.on_notify)
+    listener.on_reconnect(live_events.hub.on_reconnect)
+    listener.add_handler(object_cache.CHANNEL, object_cache.on_notify)
+    listener.on_reconnect(object_cache.on_reconnect)
+    listener.add_handler(payment_waiters.CHANNEL, payment_waiters.waiters.on_notify)
+    listener.on_reconnect(payment_waiters.waiters.on_reconnect)
+    await listener.start()
+    # Background jobs; each run is leader-elected across workers
+    if settings.SCHEDULER_ENABLED:
+        scheduler.add_job("event_lifecycle", settings.LIFECYCLE_INTERVAL_SECONDS, event_lifecycle.advance_events)
+        scheduler.add_job("purge_idempotency_keys", 3600, idempotency.purge_expired)
+        scheduler.add_job("purge_sessions", 3600, sessions.purge_expired)
+        scheduler.add_job("purge_tombstones", 3600, change_feed.purge_tombstones)
+        scheduler.add_job("reconcile_payments", settings.RECONCILE_INTERVAL_SECONDS, reconciliation.reconcile_recent)
+        await scheduler.start()
+    mark_ready()
     yield
-    # Shutdown: Cleanup if needed
-    pass
+    # Shutdown
+    await scheduler.stop()
+    await listener.stop()
+    user_import.shutdown()
+    access_log.pipeline.stop()
 
 
-app = FastAPI(
-    title="Cascade Forum API",
-    description="College Forum Committee Management Platform",
-    version="1.0.0",
-    lifespan=lifespan,
-)
+def create_app() -> FastAPI:
+    """Build the ASGI application.
 
-# Security middleware
-app.add_middleware(
-    TrustedHostMiddleware,
-    allowed_hosts=["*"] if settings.ENVIRONMENT == "development" else settings.ALLOWED_HOSTS,
-)
+    Everything here is import-time work, so with gunicorn ``preload_app`` it runs
+    once in the master and the result is shared copy-on-write with the workers.
+    """
+    app = FastAPI(
+        title="Cascade Forum API",
+        description="College Forum Committee Management Platform",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # Per-request profiling (innermost, so it records the app rather than the middleware)
+    app.add_middleware(ProfileMiddleware)
+
+    # Security middleware
+    app.add_middleware(
+        TrustedHostMiddleware,
+        allowed_hosts=["*"] if settings.ENVIRONMENT == "development" else settings.ALLOWED_HOSTS,
+    )
+
+    # Admission control (inside rate limiting, so over-limit clients never take a queue spot)
+    if settings.ADMISSION_ENABLED:
+        app.add_middleware(AdmissionMiddleware)
+
+    # Rate limiting (added before CORS so 429 responses still carry CORS headers)
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(RateLimitMiddleware)
+
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Profile-Id", "X-Request-ID"],
+    )
+
+    # Request ids and access log (outermost, so the timing and status cover everything above)
+    if settings.ACCESS_LOG_ENABLED:
+        access_log.instrument_engine(engine)
+        app.add_middleware(AccessLogMiddleware)
+
+    # Include API router
+    app.include_router(api_router, prefix="/api/v1")
 
-# Include API router
-app.include_router(api_router, prefix="/api/v1")
+    @app.get("/")
+    async def root():
+        return {"message": "Cascade Forum API", "version": "1.0.0"}
 
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy", "worker": startup_report()}
 
-@app.get("/")
-async def root():
-    return {"message": "Cascade Forum API", "version": "1.0.0"}
+    return app
 
 
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+app = create_app()
@@ -1,7 +1,7 @@
 """
 Audit log model for tracking admin actions
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, BigInteger, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -14,14 +14,38 @@ class AuditLog(Base):
     __tablename__ = "audit_logs"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    admin_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="RESTRICT"), nullable=False, index=True)
-    action_type = Column(String(50), nullable=False, index=True)  # registration_approved, registration_rejected, etc.
+    admin_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="RESTRICT"), nullable=False)
+    action_type = Column(String(50), nullable=False)  # registration_approved, registration_rejected, etc.
     target_type = Column(String(50), nullable=False)  # registration, event, user, etc.
     target_id = Column(UUID(as_uuid=True), nullable=False)
     details = Column(JSONB, nullable=True)
     ip_address = Column(String(45), nullable=True)
     user_agent = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Stamped by a trigger on every write; analytics export position (see app.services.analytics_export)
+    change_xid = Column(BigInteger, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    
+    __table_args__ = (
+        # Incremental analytics export
+        Index("idx_audit_logs_change", "change_xid", "change_seq"),
+        # Audit log filters, newest first
+        Index("idx_audit_logs_admin_created_at", "admin_id", created_at.desc()),
+        Index("idx_audit_logs_action_created_at", "action_type", created_at.desc()),
+        # Per-target timeline; id is included so paging is an index-only scan
+        Index(
+            "idx_audit_logs_target_created_at",
+            "target_type", "target_id", created_at.desc(),
+            postgresql_include=["id"],
+        ),
+        # details @> '{...}' filters
+        Index(
+            "idx_audit_logs_details",
+            "details",
+            postgresql_using="gin",
+            postgresql_ops={"details": "jsonb_path_ops"},
+        ),
+    )
     
     # Relationships
     admin = relationship("User", foreign_keys=[admin_id])
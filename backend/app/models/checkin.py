@@ -0,0 +1,26 @@
+"""
+Check-in model: one row per registration admitted at an event's door
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class Checkin(Base):
+    __tablename__ = "checkins"
+    
+    # The primary key is what dedupes scans of one ticket across gates and retried uploads
+    registration_id = Column(UUID(as_uuid=True), ForeignKey("registrations.id", ondelete="CASCADE"), primary_key=True)
+    event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+    ticket_version = Column(Integer, nullable=False)
+    gate = Column(String(50), nullable=True)
+    scanned_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    scanned_at = Column(DateTime(timezone=True), nullable=False)  # scanner's clock
+    synced_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # Per-event attendance, in door order
+        Index("idx_checkins_event_scanned_at", "event_id", scanned_at),
+    )
@@ -1,7 +1,7 @@
 """
 Event model
 """
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Numeric, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, BigInteger, Numeric, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -22,11 +22,46 @@ class Event(Base):
     price = Column(Numeric(10, 2), default=0.00)
     max_participants = Column(Integer, nullable=True)
     current_participants = Column(Integer, default=0)
-    status = Column(String(20), default="draft", index=True)  # draft, published, cancelled, completed
-    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    waitlist_count = Column(Integer, default=0)
+    status = Column(String(20), default="draft")  # draft, published, cancelled, completed
+    registration_open = Column(Boolean, default=True)  # closed by the lifecycle job after registration_deadline
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     form_schema = Column(JSONB, nullable=True)  # Dynamic form schema
+    live_version = Column(Integer, nullable=False, default=1, server_default=text("1"))  # Bumped on capacity/status changes
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Stamped by a trigger on every write; delta-sync position (see app.services.change_feed)
+    change_xid = Column(BigInteger, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    
+    __table_args__ = (
+        # Listings by status (admin/developer filter), newest event first
+        Index("idx_events_status_date", "status", event_date.desc()),
+        # Admin "my events" and the developer event list, newest first
+        Index("idx_events_created_by_created_at", "created_by", created_at.desc()),
+        Index("idx_events_created_at", created_at.desc()),
+        # Delta-sync cursor (GET /events/changes)
+        Index("idx_events_change", "change_xid", "change_seq"),
+        # Clients' delta-sync feed only pages through published events
+        Index(
+            "idx_events_published_change",
+            "change_xid",
+            "change_seq",
+            postgresql_where=text("status = 'published'"),
+        ),
+        # Hot public listing; past events leave it once the lifecycle job completes them
+        Index(
+            "idx_events_published_date",
+            event_date.desc(),
+            postgresql_where=text("status = 'published'"),
+        ),
+        # Events whose registration the lifecycle job still has to close
+        Index(
+            "idx_events_open_deadline",
+            "registration_deadline",
+            postgresql_where=text("status = 'published' AND registration_open"),
+        ),
+    )
     
     # Relationships
     creator = relationship("User", foreign_keys=[created_by])
@@ -0,0 +1,22 @@
+"""
+Idempotency key model for replaying retried POSTs
+"""
+from sqlalchemy import Column, String, DateTime, Integer
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    route = Column(String(100), primary_key=True)  # e.g. "POST /registrations"
+    key = Column(String(255), primary_key=True)  # client-supplied Idempotency-Key header
+    request_hash = Column(String(64), nullable=False)  # sha256 of the canonical request body
+    status = Column(String(20), nullable=False)  # in_progress, completed
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(JSONB, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,7 +1,7 @@
 """
 Payment model
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey, Numeric, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Numeric, Boolean, Integer, BigInteger, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -14,18 +14,32 @@ class Payment(Base):
     __tablename__ = "payments"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    registration_id = Column(UUID(as_uuid=True), ForeignKey("registrations.id", ondelete="CASCADE"), nullable=False, index=True)
+    registration_id = Column(UUID(as_uuid=True), ForeignKey("registrations.id", ondelete="CASCADE"), nullable=False)
     razorpay_order_id = Column(String(255), unique=True, nullable=False, index=True)
     razorpay_payment_id = Column(String(255), unique=True, nullable=True)
     razorpay_signature = Column(String(255), nullable=True)
     amount = Column(Numeric(10, 2), nullable=False)
     currency = Column(String(3), default="INR")
     status = Column(String(20), nullable=False, index=True)  # created, paid, failed, refunded
+    # Bumped by a trigger whenever status changes; orders the payment_status notifications
+    status_version = Column(Integer, nullable=False, default=1, server_default=text("1"))
     webhook_received = Column(Boolean, default=False)
     webhook_verified = Column(Boolean, default=False)
     payment_metadata = Column("metadata", JSONB, nullable=True)  # "metadata" is reserved in SQLAlchemy, so we use payment_metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Stamped by a trigger on every write; analytics export position (see app.services.analytics_export)
+    change_xid = Column(BigInteger, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    
+    __table_args__ = (
+        # Payments of a registration (also serves the user payment history join), newest first
+        Index("idx_payments_registration_created_at", "registration_id", created_at.desc()),
+        # Developer payment list
+        Index("idx_payments_created_at", created_at.desc()),
+        # Incremental analytics export
+        Index("idx_payments_change", "change_xid", "change_seq"),
+    )
     
     # Relationships
     registration = relationship("Registration", back_populates="payments")
@@ -1,7 +1,7 @@
 """
 Registration model
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint, BigInteger, Integer, Index, Sequence, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -9,23 +9,50 @@ import uuid
 
 from app.core.database import Base
 
+# Global, monotonically increasing waitlist order (only the relative order within an event matters)
+waitlist_seq = Sequence("registration_waitlist_seq", metadata=Base.metadata)
+
 
 class Registration(Base):
     __tablename__ = "registrations"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), nullable=False, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    status = Column(String(20), default="pending", index=True)  # pending, accepted, rejected
+    event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(20), default="pending", index=True)  # pending, accepted, rejected, waitlisted, cancelled
     form_data = Column(JSONB, nullable=False)  # User's form submission
     payment_status = Column(String(20), default="not_required", index=True)  # not_required, pending, completed, failed, refunded
     payment_order_id = Column(String(255), nullable=True)
     payment_id = Column(String(255), nullable=True)
+    waitlist_position = Column(BigInteger, nullable=True)  # set while status is waitlisted
+    # Bumped by a trigger whenever status or payment_status changes; signed into tickets
+    ticket_version = Column(Integer, nullable=False, default=1, server_default=text("1"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Stamped by a trigger on every write; delta-sync position (see app.services.change_feed)
+    change_xid = Column(BigInteger, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
     
     # Unique constraint: one registration per user per event
-    __table_args__ = (UniqueConstraint("event_id", "user_id", name="unique_event_user_registration"),)
+    __table_args__ = (
+        UniqueConstraint("event_id", "user_id", name="unique_event_user_registration"),
+        # "My registrations" and the per-event registration list, newest first
+        Index("idx_registrations_user_created_at", "user_id", created_at.desc()),
+        Index("idx_registrations_event_created_at", "event_id", created_at.desc()),
+        # Developer registration list
+        Index("idx_registrations_created_at", created_at.desc()),
+        # Per-user delta-sync cursor (GET /registrations/my-registrations/changes)
+        Index("idx_registrations_user_change", "user_id", "change_xid", "change_seq"),
+        # Incremental analytics export
+        Index("idx_registrations_change", "change_xid", "change_seq"),
+        # Waitlist head lookup per event
+        Index(
+            "idx_registrations_waitlist",
+            "event_id",
+            "waitlist_position",
+            postgresql_where=text("status = 'waitlisted'"),
+        ),
+    )
     
     # Relationships
     event = relationship("Event", back_populates="registrations")
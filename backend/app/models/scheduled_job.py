@@ -0,0 +1,13 @@
+"""
+Scheduled job model: when each background job last started, across all workers
+"""
+from sqlalchemy import Column, String, DateTime
+
+from app.core.database import Base
+
+
+class ScheduledJob(Base):
+    __tablename__ = "scheduled_jobs"
+    
+    name = Column(String(100), primary_key=True)
+    last_run_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,29 @@
+"""
+Tombstone model recording deleted rows for the delta-sync feeds
+"""
+from sqlalchemy import Column, String, DateTime, BigInteger, Index, Sequence
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+# Feeds order writes by (transaction id, change_feed_seq); stamped by the stamp_change() trigger
+change_feed_seq = Sequence("change_feed_seq", metadata=Base.metadata)
+
+
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+    
+    # Written by the record_tombstone() trigger, so cascaded deletes are covered too
+    table_name = Column(String(50), primary_key=True)  # events, registrations, published_events
+    row_id = Column(UUID(as_uuid=True), primary_key=True)
+    owner_id = Column(UUID(as_uuid=True), nullable=True)  # registrations: user_id, for per-user feeds
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    change_xid = Column(BigInteger, nullable=False)  # stamped like the live rows' change position
+    change_seq = Column(BigInteger, nullable=False)
+    
+    __table_args__ = (
+        # Change feeds page through tombstones in the same (change_xid, change_seq) order as live rows
+        Index("idx_tombstones_table_change", "table_name", "change_xid", "change_seq"),
+        Index("idx_tombstones_owner_change", "table_name", "owner_id", "change_xid", "change_seq"),
+    )
@@ -1,7 +1,7 @@
 """
 User model
 """
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, BigInteger, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -16,7 +16,18 @@ class User(Base):
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     full_name = Column(String(255), nullable=False)
-    role = Column(String(20), nullable=False, index=True)  # client, admin, developer
+    role = Column(String(20), nullable=False)  # client, admin, developer
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Stamped by a trigger on every write; analytics export position (see app.services.analytics_export)
+    change_xid = Column(BigInteger, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    
+    __table_args__ = (
+        # Developer user list (optionally by role), newest first
+        Index("idx_users_role_created_at", "role", created_at.desc()),
+        Index("idx_users_created_at", created_at.desc()),
+        # Incremental analytics export
+        Index("idx_users_change", "change_xid", "change_seq"),
+    )
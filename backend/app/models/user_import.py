@@ -0,0 +1,25 @@
+"""
+User import model for tracking (and resuming) bulk CSV imports
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+import uuid
+
+from app.core.database import Base
+
+
+class UserImport(Base):
+    __tablename__ = "user_imports"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="RESTRICT"), nullable=False)
+    filename = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=False, default="running")  # running, completed, failed
+    rows_processed = Column(Integer, nullable=False, default=0)  # data rows committed; a resume skips these
+    created_count = Column(Integer, nullable=False, default=0)
+    skipped_count = Column(Integer, nullable=False, default=0)  # email already registered
+    error_count = Column(Integer, nullable=False, default=0)
+    errors = Column(JSONB, nullable=False, default=list)  # [{"row", "email", "error"}], capped
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,34 @@
+"""
+User session model for rotating refresh tokens (one row per signed-in device)
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+import uuid
+
+from app.core.database import Base
+
+
+class UserSession(Base):
+    __tablename__ = "user_sessions"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    token_hash = Column(String(64), nullable=False)  # sha256 of the current refresh secret
+    previous_token_hash = Column(String(64), nullable=True)  # rotated-out secret, for reuse detection
+    user_agent = Column(String, nullable=True)
+    ip_address = Column(String(45), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    rotated_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_reason = Column(String(50), nullable=True)  # logout, revoked, reuse_detected
+    
+    __table_args__ = (
+        # Active sessions of a user, newest first
+        Index("idx_user_sessions_user_created_at", "user_id", created_at.desc()),
+    )
+    
+    # Relationships
+    user = relationship("User")
@@ -0,0 +1,54 @@
+"""
+Ticket and check-in Pydantic schemas
+"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from uuid import UUID
+
+from app.core.config import settings
+
+
+class TicketResponse(BaseModel):
+    ticket: str  # encode as a QR code; verifiable offline with the keys from GET /admin/tickets/keys
+    registration_id: UUID
+    event_id: UUID
+    ticket_version: int
+    kid: str
+
+
+class TicketKey(BaseModel):
+    kid: str
+    public_key: str  # raw 32-byte Ed25519 public key, base64url without padding
+
+
+class TicketKeysResponse(BaseModel):
+    algorithm: str
+    active_kid: str
+    keys: List[TicketKey]
+
+
+class CheckinScan(BaseModel):
+    ticket: str = Field(..., max_length=256)
+    scanned_at: datetime
+    gate: Optional[str] = Field(None, max_length=50)
+
+
+class CheckinBatch(BaseModel):
+    scans: List[CheckinScan] = Field(..., min_length=1, max_length=settings.CHECKIN_BATCH_MAX)
+
+
+class CheckinResult(BaseModel):
+    registration_id: Optional[UUID] = None
+    # checked_in, duplicate (admitted by an earlier scan), invalid, wrong_event, not_found,
+    # revoked (status changed after the ticket was issued)
+    result: str
+    checked_in_at: Optional[datetime] = None  # scan that admitted the ticket
+    gate: Optional[str] = None
+
+
+class CheckinBatchResponse(BaseModel):
+    results: List[CheckinResult]  # same order as the submitted scans
+    checked_in: int
+    duplicates: int
+    rejected: int
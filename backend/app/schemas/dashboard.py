@@ -0,0 +1,93 @@
+"""
+Dashboard Pydantic schemas
+"""
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+
+class DashboardTotals(BaseModel):
+    users: int
+    users_today: int
+    events: int
+    published_events: int
+    registrations: int
+    registrations_today: int
+    paid_payments: int
+    revenue: Decimal
+
+
+class RevenueDay(BaseModel):
+    day: date
+    amount: Decimal
+    payments: int
+
+
+class TopEvent(BaseModel):
+    id: UUID
+    title: str
+    event_date: datetime
+    current_participants: int
+    max_participants: int
+    fill_rate: float
+
+
+class RecentAuditAction(BaseModel):
+    id: UUID
+    admin_id: UUID
+    admin_name: Optional[str] = None
+    action_type: str
+    target_type: str
+    target_id: UUID
+    created_at: datetime
+
+
+class DeveloperDashboard(BaseModel):
+    generated_at: datetime
+    totals: DashboardTotals
+    revenue_by_day: List[RevenueDay]
+    top_events: List[TopEvent]
+    recent_audit_actions: List[RecentAuditAction]
+
+
+class ClientDashboardPayment(BaseModel):
+    id: UUID
+    razorpay_order_id: str
+    amount: Decimal
+    currency: str
+    status: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ClientDashboardRegistration(BaseModel):
+    id: UUID
+    event_id: UUID
+    event_title: str
+    event_date: datetime
+    registration_deadline: datetime
+    event_price: Decimal
+    is_paid: bool
+    status: str
+    payment_status: str
+    waitlist_position: Optional[int] = None
+    created_at: datetime
+    payment: Optional[ClientDashboardPayment] = None  # latest payment attempt
+
+
+class UpcomingDeadline(BaseModel):
+    registration_id: UUID
+    event_id: UUID
+    event_title: str
+    kind: str  # payment_due (before registration closes) or event
+    due_at: datetime
+
+
+class ClientDashboard(BaseModel):
+    registrations: List[ClientDashboardRegistration]
+    upcoming: List[UpcomingDeadline]
+    updated_at: Optional[datetime] = None
@@ -2,7 +2,7 @@
 Event Pydantic schemas
 """
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from uuid import UUID
 from decimal import Decimal
@@ -39,6 +39,8 @@ class EventUpdate(BaseModel):
 class EventResponse(EventBase):
     id: UUID
     current_participants: int
+    waitlist_count: int = 0
+    registration_open: bool = True
     created_by: UUID
     creator_name: Optional[str] = None
     created_at: datetime
@@ -46,3 +48,37 @@ class EventResponse(EventBase):
     
     class Config:
         from_attributes = True
+
+
+class EventPartialResponse(BaseModel):
+    """List item; only the fields selected with ``?fields=`` are present"""
+    id: UUID
+    title: Optional[str] = None
+    description: Optional[str] = None
+    event_date: Optional[datetime] = None
+    registration_deadline: Optional[datetime] = None
+    is_paid: Optional[bool] = None
+    price: Optional[Decimal] = None
+    max_participants: Optional[int] = None
+    status: Optional[str] = None
+    form_schema: Optional[Dict[str, Any]] = None
+    current_participants: Optional[int] = None
+    waitlist_count: Optional[int] = None
+    registration_open: Optional[bool] = None
+    created_by: Optional[UUID] = None
+    creator_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class EventChanges(BaseModel):
+    changed: List[EventPartialResponse]  # created or updated, oldest change first
+    deleted: List[UUID]  # deleted, or no longer visible to the caller
+    cursor: Optional[str] = None  # pass as ?since= on the next poll
+    has_more: bool
+
+
+class EventBatchItem(BaseModel):
+    id: UUID
+    status: str  # ok, not_found
+    event: Optional[EventResponse] = None
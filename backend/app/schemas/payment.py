@@ -26,6 +26,12 @@ class PaymentResponse(BaseModel):
         from_attributes = True
 
 
+class PaymentStatusResponse(BaseModel):
+    order_id: str
+    status: str
+    settled: bool  # paid, failed or refunded; otherwise wait again
+
+
 class RazorpayOrderResponse(BaseModel):
     order_id: str
     amount: Decimal
@@ -2,7 +2,7 @@
 Registration Pydantic schemas
 """
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -16,7 +16,7 @@ class RegistrationCreate(RegistrationBase):
 
 
 class RegistrationUpdate(BaseModel):
-    status: Optional[str] = None  # pending, accepted, rejected
+    status: Optional[str] = None  # pending, accepted, rejected, waitlisted, cancelled
 
 
 class RegistrationResponse(RegistrationBase):
@@ -27,6 +27,7 @@ class RegistrationResponse(RegistrationBase):
     payment_status: str
     payment_order_id: Optional[str] = None
     payment_id: Optional[str] = None
+    waitlist_position: Optional[int] = None
     event_title: Optional[str] = None
     user_name: Optional[str] = None
     created_at: datetime
@@ -34,3 +35,33 @@ class RegistrationResponse(RegistrationBase):
     
     class Config:
         from_attributes = True
+
+
+class RegistrationPartialResponse(BaseModel):
+    """List item; only the fields selected with ``?fields=`` are present"""
+    id: UUID
+    event_id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
+    status: Optional[str] = None
+    form_data: Optional[Dict[str, Any]] = None
+    payment_status: Optional[str] = None
+    payment_order_id: Optional[str] = None
+    payment_id: Optional[str] = None
+    waitlist_position: Optional[int] = None
+    event_title: Optional[str] = None
+    user_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class RegistrationChanges(BaseModel):
+    changed: List[RegistrationPartialResponse]  # created or updated, oldest change first
+    deleted: List[UUID]
+    cursor: Optional[str] = None  # pass as ?since= on the next poll
+    has_more: bool
+
+
+class RegistrationBatchItem(BaseModel):
+    id: UUID
+    status: str  # ok, not_found, forbidden
+    registration: Optional[RegistrationResponse] = None
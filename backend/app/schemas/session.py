@@ -0,0 +1,24 @@
+"""
+Session Pydantic schemas
+"""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class SessionResponse(BaseModel):
+    id: UUID
+    user_agent: Optional[str] = None
+    ip_address: Optional[str] = None
+    created_at: datetime
+    rotated_at: datetime
+    expires_at: datetime
+    current: bool = False
+    
+    class Config:
+        from_attributes = True
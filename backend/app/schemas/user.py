@@ -35,4 +35,6 @@ class UserResponse(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    expires_in: Optional[int] = None  # access token lifetime in seconds
+    refresh_token: Optional[str] = None
     user: UserResponse
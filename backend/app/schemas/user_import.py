@@ -0,0 +1,29 @@
+"""
+User import Pydantic schemas
+"""
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class UserImportRowError(BaseModel):
+    row: int  # 1-based data row (the header is row 0)
+    email: Optional[str] = None
+    error: str
+
+
+class UserImportResponse(BaseModel):
+    id: UUID
+    filename: Optional[str] = None
+    status: str
+    rows_processed: int
+    created_count: int
+    skipped_count: int
+    error_count: int
+    errors: List[UserImportRowError]
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,272 @@
+"""
+Columnar analytics export
+
+Writes the main tables to Parquet files for analysts, so ad-hoc queries no
+longer run against production. Each table is read through a server-side
+cursor EXPORT_BATCH_SIZE rows at a time and every batch becomes one Parquet
+row group, so memory stays bounded whatever the table size.
+
+Runs are incremental: ``_state.json`` keeps a ``(change_xid, change_seq)``
+high-water mark per table and the next run exports only rows past it, into
+a new part file. Every insert or update restamps those columns (the
+``stamp_change()`` trigger), so a row that changed shows up again in a later
+part; readers keep the latest version per ``id``. A run only exports writes
+of transactions older than the oldest one still running
+(``pg_snapshot_xmin``), so a long transaction that commits later still sorts
+past the mark instead of behind it. Marks in the older (timestamp, id) form
+are dropped and their table is exported again from the start.
+
+Registration ``form_data`` differs per event, so it is flattened into a
+separate ``registration_answers`` table with one row per answered field.
+
+Layout::
+
+    <EXPORT_DIR>/_state.json
+    <EXPORT_DIR>/<table>/part-<run time>-<run id>.parquet
+"""
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Integer, Numeric, Table, select, text, tuple_
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.audit_log import AuditLog
+from app.models.event import Event
+from app.models.payment import Payment
+from app.models.registration import Registration
+from app.models.user import User
+
+STATE_FILE = "_state.json"
+ANSWERS_TABLE = "registration_answers"
+
+
+class ExportInProgressError(RuntimeError):
+    """Another worker or CLI run holds the export lock"""
+
+
+_HORIZON_SQL = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+
+@dataclass
+class ExportTable:
+    table: Table
+    columns: List[str]  # exported columns; credentials and signatures are left out
+
+
+EXPORT_TABLES: List[ExportTable] = [
+    ExportTable(User.__table__, ["id", "email", "full_name", "role", "is_active", "created_at", "updated_at"]),
+    ExportTable(Event.__table__, ["id", "title", "event_date", "registration_deadline", "is_paid", "price",
+                                  "max_participants", "current_participants", "waitlist_count", "status",
+                                  "registration_open", "created_by", "created_at", "updated_at"]),
+    ExportTable(Registration.__table__, ["id", "event_id", "user_id", "status", "payment_status",
+                                         "waitlist_position", "created_at", "updated_at"]),
+    ExportTable(Payment.__table__, ["id", "registration_id", "razorpay_order_id", "razorpay_payment_id", "amount",
+                                    "currency", "status", "webhook_received", "webhook_verified", "metadata",
+                                    "created_at", "updated_at"]),
+    ExportTable(AuditLog.__table__, ["id", "admin_id", "action_type", "target_type", "target_id", "details",
+                                     "ip_address", "created_at"]),
+]
+
+
+def _pyarrow():
+    # Only the exporter needs pyarrow; keep it out of the API workers' import path
+    import pyarrow
+    import pyarrow.parquet
+
+    return pyarrow
+
+
+def _arrow_field(pa, column) -> Any:
+    sql_type = column.type
+    if isinstance(sql_type, DateTime):
+        arrow_type = pa.timestamp("us", tz="UTC")
+    elif isinstance(sql_type, Boolean):
+        arrow_type = pa.bool_()
+    elif isinstance(sql_type, BigInteger):
+        arrow_type = pa.int64()
+    elif isinstance(sql_type, Integer):
+        arrow_type = pa.int32()
+    elif isinstance(sql_type, Numeric):
+        arrow_type = pa.decimal128(sql_type.precision or 18, sql_type.scale or 2)
+    else:
+        # UUIDs, strings and JSONB (as JSON text)
+        arrow_type = pa.string()
+    return pa.field(column.name, arrow_type)
+
+
+def _converter(column) -> Callable[[Any], Any]:
+    if isinstance(column.type, UUID):
+        return lambda v: None if v is None else str(v)
+    if isinstance(column.type, JSONB):
+        return lambda v: None if v is None else json.dumps(v, default=str)
+    return lambda v: v
+
+
+def _answers_schema(pa):
+    return pa.schema([
+        pa.field("registration_id", pa.string()),
+        pa.field("event_id", pa.string()),
+        pa.field("updated_at", pa.timestamp("us", tz="UTC")),
+        pa.field("field", pa.string()),
+        pa.field("value", pa.string()),
+    ])
+
+
+def _answer_rows(rows) -> Dict[str, list]:
+    out = {"registration_id": [], "event_id": [], "updated_at": [], "field": [], "value": []}
+    for row in rows:
+        for field, value in (row.form_data or {}).items():
+            out["registration_id"].append(str(row.id))
+            out["event_id"].append(str(row.event_id))
+            out["updated_at"].append(row.updated_at)
+            out["field"].append(field)
+            out["value"].append(value if isinstance(value, str) or value is None else json.dumps(value, default=str))
+    return out
+
+
+class _PartWriter:
+    """Parquet part file that is only created once there is a row, and renamed into place on close"""
+
+    def __init__(self, pa, directory: str, run_stamp: str, schema):
+        self.pa = pa
+        self.path = os.path.join(directory, f"part-{run_stamp}.parquet")
+        self.schema = schema
+        self.writer = None
+        self.rows = 0
+
+    def write(self, columns: Dict[str, list]) -> None:
+        batch = self.pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        if batch.num_rows == 0:
+            return
+        if self.writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.writer = self.pa.parquet.ParquetWriter(self.path + ".tmp", self.schema, compression="zstd")
+        self.writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self) -> Optional[str]:
+        if self.writer is None:
+            return None
+        self.writer.close()
+        os.replace(self.path + ".tmp", self.path)
+        return self.path
+
+    def abort(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            os.remove(self.path + ".tmp")
+
+
+def _load_state(directory: str) -> Dict[str, Dict[str, int]]:
+    try:
+        with open(os.path.join(directory, STATE_FILE)) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {}
+    # (timestamp, id) marks can't be mapped to a change position
+    return {table: mark for table, mark in state.items() if "seq" in mark}
+
+
+def _save_state(directory: str, state: Dict[str, Dict[str, int]]) -> None:
+    path = os.path.join(directory, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _remove_older_parts(directory: str, keep: Optional[str]) -> None:
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith("part-") and name.endswith(".parquet") and path != keep:
+            os.remove(path)
+
+
+def export_table(
+    conn: Connection,
+    spec: ExportTable,
+    directory: str,
+    run_stamp: str,
+    horizon: int,
+    since: Optional[Dict[str, int]],
+) -> Dict[str, Any]:
+    """Export rows of one table written after its high-water mark by transactions below ``horizon``"""
+    pa = _pyarrow()
+    table = spec.table
+    columns = [table.c[name] for name in spec.columns]
+    change_xid, change_seq = table.c.change_xid, table.c.change_seq
+    flatten = table.name == Registration.__tablename__
+    selected = columns + [change_xid, change_seq] + ([table.c.form_data] if flatten else [])
+
+    stmt = select(*selected).where(change_xid < horizon).order_by(change_xid, change_seq)
+    if since:
+        stmt = stmt.where(tuple_(change_xid, change_seq) > (since["xid"], since["seq"]))
+
+    rows_writer = _PartWriter(pa, os.path.join(directory, table.name), run_stamp,
+                              pa.schema([_arrow_field(pa, c) for c in columns]))
+    answers_writer = _PartWriter(pa, os.path.join(directory, ANSWERS_TABLE), run_stamp, _answers_schema(pa))
+    converters = [(c.name, _converter(c)) for c in columns]
+    last = None
+    try:
+        # stream_results makes psycopg2 use a named (server-side) cursor
+        result = conn.execution_options(stream_results=True, max_row_buffer=settings.EXPORT_BATCH_SIZE).execute(stmt)
+        for rows in result.partitions(settings.EXPORT_BATCH_SIZE):
+            rows_writer.write({name: [convert(row._mapping[name]) for row in rows] for name, convert in converters})
+            if flatten:
+                answers_writer.write(_answer_rows(rows))
+            last = rows[-1]
+        conn.commit()
+    except BaseException:
+        rows_writer.abort()
+        answers_writer.abort()
+        conn.rollback()
+        raise
+
+    summary = {"rows": rows_writer.rows, "file": rows_writer.close()}
+    if flatten:
+        summary["answers"] = {"rows": answers_writer.rows, "file": answers_writer.close()}
+    summary["watermark"] = since if last is None else {"xid": last.change_xid, "seq": last.change_seq}
+    return summary
+
+
+def export_all(full: bool = False, directory: Optional[str] = None) -> Dict[str, Any]:
+    """Export every analytics table; ``full`` ignores the high-water marks and replaces earlier parts"""
+    directory = directory or settings.EXPORT_DIR
+    os.makedirs(directory, exist_ok=True)
+    state = {} if full else _load_state(directory)
+    run_id = uuid.uuid4()
+    summary: Dict[str, Any] = {"run_id": str(run_id), "full": full, "tables": {}}
+
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(hashtext('cascade_analytics_export'))")).scalar():
+            raise ExportInProgressError("An analytics export is already running")
+        try:
+            # One horizon for every table, so a run is a consistent cut
+            horizon = conn.execute(text(_HORIZON_SQL)).scalar()
+            conn.commit()
+            # The run id keeps two runs within the same second from overwriting each other's parts
+            run_stamp = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{run_id.hex}"
+            summary["horizon"] = horizon
+            for spec in EXPORT_TABLES:
+                result = export_table(conn, spec, directory, run_stamp, horizon, state.get(spec.table.name))
+                if full:
+                    _remove_older_parts(os.path.join(directory, spec.table.name), result["file"])
+                    if "answers" in result:
+                        _remove_older_parts(os.path.join(directory, ANSWERS_TABLE), result["answers"]["file"])
+                if result["watermark"]:
+                    state[spec.table.name] = result["watermark"]
+                # Checkpoint per table so a failure later on doesn't re-export finished tables
+                _save_state(directory, state)
+                summary["tables"][spec.table.name] = result
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext('cascade_analytics_export'))"))
+            conn.commit()
+    return summary
@@ -0,0 +1,183 @@
+"""
+Dashboard aggregates
+
+Everything the developer console overview needs comes from one CTE-based
+statement, so the page costs a single round trip instead of one request and
+several lazy loads per panel.
+
+A student's home screen (``GET /me/dashboard``) is one eager-loaded query
+over their registrations, events and payments. Its ETag is derived from the
+row counts plus the sums of the registrations' and events' ``change_seq``
+and the payments' ``status_version``. Every committed write raises one of
+those (the sequence and the counters only grow), whenever its transaction
+started, and counts catch deletions. A single index-backed aggregate
+recomputes it, so an unchanged dashboard is answered with ``304`` without
+loading it.
+"""
+import hashlib
+from datetime import datetime, time, timedelta, timezone
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.models.event import Event
+from app.models.payment import Payment
+from app.models.registration import Registration
+from app.schemas.dashboard import (
+    ClientDashboard, ClientDashboardPayment, ClientDashboardRegistration, DeveloperDashboard, UpcomingDeadline
+)
+
+# Bump when the ClientDashboard shape changes, so clients don't keep a stale body
+_CLIENT_DASHBOARD_VERSION = 1
+
+_DASHBOARD_SQL = """
+    WITH totals AS (
+        SELECT
+            (SELECT count(*) FROM users) AS users,
+            (SELECT count(*) FROM users WHERE created_at >= :today) AS users_today,
+            (SELECT count(*) FROM events) AS events,
+            (SELECT count(*) FROM events WHERE status = 'published') AS published_events,
+            (SELECT count(*) FROM registrations) AS registrations,
+            (SELECT count(*) FROM registrations WHERE created_at >= :today) AS registrations_today,
+            (SELECT count(*) FROM payments WHERE status = 'paid') AS paid_payments,
+            (SELECT COALESCE(sum(amount), 0) FROM payments WHERE status = 'paid') AS revenue
+    ), days AS (
+        SELECT generate_series(CAST(:since AS date), CAST(:today AS date), interval '1 day')::date AS day
+    ), revenue AS (
+        SELECT d.day, COALESCE(sum(p.amount), 0) AS amount, count(p.id) AS payments
+        FROM days d
+        LEFT JOIN payments p
+          ON p.status = 'paid'
+         AND p.created_at >= d.day AND p.created_at < d.day + 1
+        GROUP BY d.day
+    ), top_events AS (
+        SELECT id, title, event_date, current_participants, max_participants,
+               current_participants::float / max_participants AS fill_rate
+        FROM events
+        WHERE status = 'published' AND max_participants > 0
+        ORDER BY fill_rate DESC, event_date
+        LIMIT :top_events
+    ), recent AS (
+        SELECT a.id, a.admin_id, u.full_name AS admin_name, a.action_type, a.target_type, a.target_id, a.created_at
+        FROM audit_logs a
+        LEFT JOIN users u ON u.id = a.admin_id
+        ORDER BY a.created_at DESC
+        LIMIT :recent_actions
+    )
+    SELECT
+        row_to_json(totals) AS totals,
+        (SELECT COALESCE(json_agg(r ORDER BY r.day), '[]') FROM revenue r) AS revenue_by_day,
+        (SELECT COALESCE(json_agg(e ORDER BY e.fill_rate DESC, e.event_date), '[]') FROM top_events e) AS top_events,
+        (SELECT COALESCE(json_agg(a ORDER BY a.created_at DESC), '[]') FROM recent a) AS recent_audit_actions
+    FROM totals
+"""
+
+
+def load_developer_dashboard(db: Session) -> DeveloperDashboard:
+    now = datetime.now(timezone.utc)
+    today = datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+    row = db.execute(text(_DASHBOARD_SQL), {
+        "today": today,
+        "since": today - timedelta(days=settings.DASHBOARD_REVENUE_DAYS - 1),
+        "top_events": settings.DASHBOARD_TOP_EVENTS,
+        "recent_actions": settings.DASHBOARD_RECENT_ACTIONS,
+    }).mappings().one()
+    return DeveloperDashboard(generated_at=now, **row)
+
+
+def _client_etag(user_id: UUID, registrations: int, payments: int, changes: int, payment_versions: int) -> str:
+    key = f"{_CLIENT_DASHBOARD_VERSION}:{user_id}:{registrations}:{payments}:{changes}:{payment_versions}"
+    return f'W/"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def client_dashboard_etag_query(user_id: UUID) -> Select:
+    """Aggregate behind the client dashboard ETag (also checked by ``explain-check``)"""
+    def payments(column):
+        return select(column).select_from(Payment).join(
+            Registration, Registration.id == Payment.registration_id
+        ).where(Registration.user_id == user_id).scalar_subquery()
+
+    # A user has one registration per event, so the join doesn't repeat events
+    return select(
+        func.count(Registration.id),
+        func.coalesce(func.sum(Registration.change_seq + Event.change_seq), 0),
+        payments(func.count(Payment.id)),
+        payments(func.coalesce(func.sum(Payment.status_version), 0)),
+    ).select_from(Registration).join(Event, Event.id == Registration.event_id).where(
+        Registration.user_id == user_id
+    )
+
+
+def client_dashboard_etag(db: Session, user_id: UUID) -> str:
+    """ETag of the user's dashboard, from one aggregate instead of loading it"""
+    registrations, changes, payments, payment_versions = db.execute(client_dashboard_etag_query(user_id)).one()
+    return _client_etag(user_id, registrations, payments, int(changes), int(payment_versions))
+
+
+def _latest(values: Iterable[Optional[datetime]]) -> Optional[datetime]:
+    return max((v for v in values if v is not None), default=None)
+
+
+def load_client_dashboard(db: Session, user_id: UUID) -> Tuple[ClientDashboard, str]:
+    """The user's dashboard and its ETag"""
+    registrations = db.query(Registration).options(
+        load_only(
+            Registration.id, Registration.event_id, Registration.status, Registration.payment_status,
+            Registration.waitlist_position, Registration.created_at, Registration.updated_at,
+            Registration.change_seq
+        ),
+        joinedload(Registration.event, innerjoin=True).load_only(
+            Event.title, Event.event_date, Event.registration_deadline, Event.is_paid, Event.price,
+            Event.status, Event.registration_open, Event.updated_at, Event.change_seq
+        ),
+        joinedload(Registration.payments).load_only(
+            Payment.razorpay_order_id, Payment.amount, Payment.currency, Payment.status,
+            Payment.created_at, Payment.updated_at, Payment.status_version
+        ),
+    ).filter(
+        Registration.user_id == user_id
+    ).order_by(Registration.created_at.desc()).all()
+
+    items, upcoming, stamps = [], [], []
+    payment_count = changes = payment_versions = 0
+    for reg in registrations:
+        event = reg.event
+        payment = max(reg.payments, key=lambda p: p.created_at, default=None)
+        payment_count += len(reg.payments)
+        changes += reg.change_seq + event.change_seq
+        payment_versions += sum(p.status_version for p in reg.payments)
+        stamps += [reg.updated_at, event.updated_at] + [p.updated_at for p in reg.payments]
+        items.append(ClientDashboardRegistration(
+            **reg.__dict__,
+            event_title=event.title,
+            event_date=event.event_date,
+            registration_deadline=event.registration_deadline,
+            event_price=event.price,
+            is_paid=event.is_paid,
+            payment=ClientDashboardPayment.model_validate(payment) if payment else None,
+        ))
+        # Only stored state decides what is upcoming (the lifecycle job closes
+        # registration and completes events), so the ETag stays valid over time
+        if reg.status in ("rejected", "cancelled") or event.status != "published":
+            continue
+        if reg.payment_status == "pending" and event.registration_open:
+            upcoming.append(UpcomingDeadline(
+                registration_id=reg.id, event_id=reg.event_id, event_title=event.title,
+                kind="payment_due", due_at=event.registration_deadline,
+            ))
+        if reg.status in ("pending", "accepted"):
+            upcoming.append(UpcomingDeadline(
+                registration_id=reg.id, event_id=reg.event_id, event_title=event.title,
+                kind="event", due_at=event.event_date,
+            ))
+
+    dashboard = ClientDashboard(
+        registrations=items,
+        upcoming=sorted(upcoming, key=lambda u: u.due_at),
+        updated_at=_latest(stamps),
+    )
+    return dashboard, _client_etag(user_id, len(registrations), payment_count, changes, payment_versions)
@@ -0,0 +1,55 @@
+"""
+Event lifecycle transitions
+
+Closes registration once ``registration_deadline`` passes and marks events
+``completed`` after ``event_date``, in bounded set-based batches. Runs as a
+scheduled job on one worker at a time.
+"""
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+_CLOSE_REGISTRATION_SQL = """
+    UPDATE events SET registration_open = FALSE
+    WHERE id IN (
+        SELECT id FROM events
+        WHERE status = 'published' AND registration_open AND registration_deadline <= now()
+        ORDER BY registration_deadline
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+"""
+
+_COMPLETE_SQL = """
+    UPDATE events SET status = 'completed', registration_open = FALSE
+    WHERE id IN (
+        SELECT id FROM events
+        WHERE status = 'published' AND event_date <= now()
+        ORDER BY event_date
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+"""
+
+
+def _run_batches(db: Session, sql: str, batch_size: int) -> int:
+    total = 0
+    while True:
+        count = db.execute(text(sql), {"batch_size": batch_size}).rowcount
+        # Commit per batch so row locks are held briefly
+        db.commit()
+        total += count
+        if count < batch_size:
+            return total
+
+
+def advance_events(db: Session) -> Dict[str, int]:
+    """Scheduled job: apply due deadline and completion transitions"""
+    batch_size = settings.LIFECYCLE_BATCH_SIZE
+    return {
+        "registration_closed": _run_batches(db, _CLOSE_REGISTRATION_SQL, batch_size),
+        "completed": _run_batches(db, _COMPLETE_SQL, batch_size),
+    }
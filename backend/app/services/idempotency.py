@@ -0,0 +1,200 @@
+"""
+Idempotency-Key handling for retried POSTs
+
+The first request with a given key claims it by inserting an ``in_progress``
+row, runs the handler and stores the serialized response. Retries within the
+TTL get that response back without running the handler again. A duplicate
+that arrives while the first is still running waits for it: in-process
+through a shared future, across workers by polling the row.
+
+The handler and every query here run in the threadpool: handlers are
+synchronous and may call the payment gateway, and the event loop must keep
+serving other requests meanwhile.
+"""
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+POLL_INTERVAL_SECONDS = 0.1
+
+# Keys currently being executed by this worker
+_inflight: Dict[Tuple[UUID, str, str], asyncio.Future] = {}
+
+
+def request_fingerprint(payload: Any) -> str:
+    canonical = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _claim(db: Session, user_id: UUID, route: str, key: str, request_hash: str) -> bool:
+    """Insert the in-progress marker, or take over an expired one. True if this request owns the key."""
+    now = datetime.now(timezone.utc)
+    values = dict(
+        user_id=user_id,
+        route=route,
+        key=key,
+        request_hash=request_hash,
+        status=IN_PROGRESS,
+        response_status=None,
+        response_body=None,
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    )
+    stmt = insert(IdempotencyKey).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.user_id, IdempotencyKey.route, IdempotencyKey.key],
+        set_={
+            **{k: stmt.excluded[k] for k in ("request_hash", "status", "response_status", "response_body", "expires_at")},
+            "created_at": now,
+        },
+        where=IdempotencyKey.expires_at < now,
+    ).returning(IdempotencyKey.key)
+    claimed = db.execute(stmt).first() is not None
+    db.commit()
+    return claimed
+
+
+def _lookup(db: Session, user_id: UUID, route: str, key: str):
+    return db.execute(
+        select(
+            IdempotencyKey.request_hash,
+            IdempotencyKey.status,
+            IdempotencyKey.response_status,
+            IdempotencyKey.response_body,
+        ).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.route == route,
+            IdempotencyKey.key == key,
+        )
+    ).first()
+
+
+def _row_filter(user_id: UUID, route: str, key: str):
+    return and_(IdempotencyKey.user_id == user_id, IdempotencyKey.route == route, IdempotencyKey.key == key)
+
+
+def _release(db: Session, ident: Tuple[UUID, str, str]) -> None:
+    # Let the client retry once the error is resolved
+    db.rollback()
+    db.execute(delete(IdempotencyKey).where(_row_filter(*ident)))
+    db.commit()
+
+
+def _complete(db: Session, ident: Tuple[UUID, str, str], status_code: int, result: Any) -> None:
+    db.execute(
+        update(IdempotencyKey).where(_row_filter(*ident)).values(
+            status=COMPLETED,
+            response_status=status_code,
+            response_body=jsonable_encoder(result),
+        )
+    )
+    db.commit()
+
+
+async def _await_original(db: Session, ident: Tuple[UUID, str, str], request_hash: str) -> JSONResponse:
+    future = _inflight.get(ident)
+    if future is not None:
+        await asyncio.shield(future)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        record = await run_in_threadpool(_lookup, db, *ident)
+        if record is None:
+            # The original failed and released the key
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The original request with this Idempotency-Key failed; retry it"
+            )
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        if record.status == COMPLETED:
+            return JSONResponse(
+                content=record.response_body,
+                status_code=record.response_status,
+                headers={"Idempotent-Replayed": "true"},
+            )
+        if loop.time() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+
+async def run_idempotent(
+    db: Session,
+    *,
+    key: Optional[str],
+    user_id: UUID,
+    route: str,
+    payload: Any,
+    handler: Callable[[], Any],
+    status_code: int = status.HTTP_200_OK,
+) -> Any:
+    """Run ``handler()`` at most once per (user, route, Idempotency-Key)"""
+    if not key:
+        return await run_in_threadpool(handler)
+    if len(key) > 255:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key is too long"
+        )
+
+    ident = (user_id, route, key)
+    request_hash = request_fingerprint(payload)
+
+    if ident in _inflight or not await run_in_threadpool(_claim, db, user_id, route, key, request_hash):
+        return await _await_original(db, ident, request_hash)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[ident] = future
+    try:
+        try:
+            result = await run_in_threadpool(handler)
+        except Exception:
+            await run_in_threadpool(_release, db, ident)
+            raise
+
+        await run_in_threadpool(_complete, db, ident, status_code, result)
+        return result
+    finally:
+        _inflight.pop(ident, None)
+        future.set_result(None)
+
+
+def purge_expired(db: Session) -> int:
+    """Delete expired keys. Returns the number removed."""
+    now = datetime.now(timezone.utc)
+    result = db.execute(
+        delete(IdempotencyKey).where(
+            or_(
+                IdempotencyKey.expires_at < now,
+                # Abandoned in-progress markers (worker killed mid-request)
+                and_(IdempotencyKey.status == IN_PROGRESS,
+                     IdempotencyKey.created_at < now - timedelta(hours=1)),
+            )
+        )
+    )
+    db.commit()
+    return result.rowcount
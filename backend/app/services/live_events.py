@@ -0,0 +1,166 @@
+"""
+In-memory fan-out of event capacity/status changes to SSE subscribers
+
+A database trigger publishes every change to ``events.current_participants``,
+``max_participants`` or ``status`` on the ``event_capacity`` channel. The hub
+keeps only the latest state per watched event and wakes all of its
+subscribers at most once per ``LIVE_MIN_INTERVAL_SECONDS``.
+
+States are ordered by ``events.live_version``, which a trigger bumps on each
+of those changes. Updates of one row are serialised by its row lock, so the
+counter follows commit order (``updated_at`` is the transaction start time
+and doesn't).
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+CHANNEL = "event_capacity"
+
+_SNAPSHOT_SQL = """
+    SELECT id, status, current_participants, max_participants, live_version AS version
+    FROM events WHERE id = ANY(:ids)
+"""
+
+
+def load_snapshots(event_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Current live state for the given events, in the same shape as the trigger payload"""
+    db = SessionLocal()
+    try:
+        rows = db.execute(text(_SNAPSHOT_SQL), {"ids": list(event_ids)}).mappings().all()
+    finally:
+        db.close()
+    return {str(row["id"]): {**row, "id": str(row["id"])} for row in rows}
+
+
+class _EventChannel:
+    __slots__ = ("state", "pending", "changed", "subscribers", "last_flush", "flush_handle")
+
+    def __init__(self, state: Dict[str, Any]):
+        self.state = state
+        self.pending: Optional[Dict[str, Any]] = None
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+        self.last_flush = 0.0
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+class LiveEventHub:
+    def __init__(self, min_interval: float, heartbeat: float):
+        self.min_interval = min_interval
+        self.heartbeat = heartbeat
+        self._channels: Dict[str, _EventChannel] = {}
+
+    def on_notify(self, payload: str) -> None:
+        data = json.loads(payload)
+        channel = self._channels.get(data["id"])
+        if channel is None:
+            return
+        self._offer(channel, data)
+
+    def on_reconnect(self) -> None:
+        """Re-read watched events after the LISTEN connection dropped"""
+        if not self._channels:
+            return
+        loop = asyncio.get_running_loop()
+
+        async def refresh():
+            snapshots = await loop.run_in_executor(None, load_snapshots, list(self._channels))
+            for event_id, state in snapshots.items():
+                channel = self._channels.get(event_id)
+                if channel is not None:
+                    self._offer(channel, state)
+
+        loop.create_task(refresh())
+
+    def _offer(self, channel: _EventChannel, state: Dict[str, Any]) -> None:
+        latest = channel.pending or channel.state
+        if state["version"] < latest["version"]:
+            return
+        channel.pending = state
+        if channel.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            delay = max(0.0, channel.last_flush + self.min_interval - loop.time())
+            channel.flush_handle = loop.call_later(delay, self._flush, channel)
+
+    def _flush(self, channel: _EventChannel) -> None:
+        channel.flush_handle = None
+        if channel.pending is None:
+            return
+        channel.state, channel.pending = channel.pending, None
+        channel.last_flush = asyncio.get_running_loop().time()
+        # Swap the Event so new waits block until the next change
+        changed, channel.changed = channel.changed, asyncio.Event()
+        changed.set()
+
+    def _subscribe(self, event_id: str, snapshot: Dict[str, Any]) -> Tuple[_EventChannel, bool]:
+        """The event's channel, and whether this call created it"""
+        channel = self._channels.get(event_id)
+        created = channel is None
+        if created:
+            channel = self._channels[event_id] = _EventChannel(snapshot)
+        elif snapshot["version"] > channel.state["version"]:
+            self._offer(channel, snapshot)
+        channel.subscribers += 1
+        return channel, created
+
+    def _unsubscribe(self, event_id: str, channel: _EventChannel) -> None:
+        channel.subscribers -= 1
+        if channel.subscribers == 0:
+            if channel.flush_handle is not None:
+                channel.flush_handle.cancel()
+            self._channels.pop(event_id, None)
+
+    async def stream(
+        self, event_id: str, snapshot: Dict[str, Any], last_event_id: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Server-Sent Events for one subscriber"""
+        channel, created = self._subscribe(event_id, snapshot)
+        sent = last_event_id
+        try:
+            if created:
+                # Notifications for events without a channel are dropped, so a change
+                # committed after ``snapshot`` was read but before now would be lost
+                fresh = await asyncio.get_running_loop().run_in_executor(None, load_snapshots, [event_id])
+                if event_id in fresh:
+                    self._offer(channel, fresh[event_id])
+            yield f"retry: {settings.LIVE_RETRY_MS}\n\n"
+            while True:
+                changed = channel.changed
+                state = channel.state
+                # Versions only grow; any other id is stale or from before a restore
+                if state["version"] != sent:
+                    sent = state["version"]
+                    yield _format(state)
+                try:
+                    await asyncio.wait_for(changed.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+        finally:
+            self._unsubscribe(event_id, channel)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "events": len(self._channels),
+            "subscribers": sum(c.subscribers for c in self._channels.values()),
+        }
+
+
+def _format(state: Dict[str, Any]) -> str:
+    max_participants = state["max_participants"]
+    data = {
+        "event_id": state["id"],
+        "status": state["status"],
+        "current_participants": state["current_participants"],
+        "max_participants": max_participants,
+        "seats_left": None if not max_participants else max(0, max_participants - state["current_participants"]),
+    }
+    return f"id: {state['version']}\nevent: capacity\ndata: {json.dumps(data)}\n\n"
+
+
+hub = LiveEventHub(settings.LIVE_MIN_INTERVAL_SECONDS, settings.LIVE_HEARTBEAT_SECONDS)
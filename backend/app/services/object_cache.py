@@ -0,0 +1,91 @@
+"""
+Cached snapshots of hot ``User`` and ``Event`` rows
+
+``RoleChecker`` and the event detail endpoints read through these caches
+instead of loading the same rows on every request. A trigger on ``users``
+and ``events`` publishes ``{"table", "id"}`` on the ``cache_invalidate``
+channel after every update or delete, whichever code path made it (admin and
+developer endpoints, the lifecycle job, the CLI, manual SQL); every worker's
+listener then drops the entry from its local tier and the shared tier.
+Entries also expire after ``CACHE_TTL_SECONDS``, which bounds staleness if a
+notification is missed.
+"""
+import json
+import logging
+import uuid
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.cache import TwoTierCache, create_shared_backend
+from app.core.config import settings
+from app.models.event import Event
+from app.models.user import User
+from app.schemas.event import EventResponse
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidate"
+
+_shared = create_shared_backend()
+user_cache = TwoTierCache("users", settings.CACHE_TTL_SECONDS, settings.CACHE_LOCAL_MAXSIZE, _shared)
+event_cache = TwoTierCache("events", settings.CACHE_TTL_SECONDS, settings.CACHE_LOCAL_MAXSIZE, _shared)
+
+_CACHES = {"users": user_cache, "events": event_cache}
+
+# Columns RoleChecker and the handlers read from current_user (never the password hash)
+_USER_FIELDS = ("email", "full_name", "role", "is_active")
+
+
+def get_user(db: Session, user_id: Any) -> Optional[User]:
+    """The user as a detached ``User`` (attribute reads only), or None"""
+    key = str(user_id)
+
+    def load() -> Optional[Dict[str, Any]]:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        return {"id": key, **{field: getattr(user, field) for field in _USER_FIELDS}}
+
+    snapshot = user_cache.get_or_load(key, load) if settings.CACHE_ENABLED else load()
+    if snapshot is None:
+        return None
+    return User(id=uuid.UUID(snapshot["id"]), **{field: snapshot[field] for field in _USER_FIELDS})
+
+
+def get_event(db: Session, event_id: UUID) -> Optional[EventResponse]:
+    """Full event response including ``creator_name``, or None"""
+
+    def load() -> Optional[Dict[str, Any]]:
+        event = db.query(Event).options(joinedload(Event.creator)).filter(Event.id == event_id).first()
+        if event is None:
+            return None
+        event_dict = {
+            **event.__dict__,
+            "creator_name": event.creator.full_name if event.creator else None
+        }
+        return EventResponse(**event_dict).model_dump(mode="json")
+
+    snapshot = event_cache.get_or_load(str(event_id), load) if settings.CACHE_ENABLED else load()
+    return EventResponse(**snapshot) if snapshot is not None else None
+
+
+def on_notify(payload: str) -> None:
+    try:
+        message = json.loads(payload)
+        cache = _CACHES[message["table"]]
+    except (ValueError, KeyError):
+        logger.warning("ignoring malformed cache invalidation: %r", payload)
+        return
+    cache.invalidate(message["id"])
+
+
+def on_reconnect() -> None:
+    # Invalidations may have been missed while the listener was down
+    for cache in _CACHES.values():
+        cache.clear()
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    return {name: cache.stats() for name, cache in _CACHES.items()}
@@ -0,0 +1,121 @@
+"""
+In-process registry of requests waiting for a payment to change
+
+A database trigger publishes every change to ``payments.status`` on the
+``payment_status`` channel. ``GET /payments/{order_id}/await`` parks on the
+order's entry here until a newer version arrives or its timeout passes, so a
+checkout page makes one long-poll instead of a stream of reads. A parked
+request is a suspended coroutine and a timer: it holds no thread and no
+database connection, and notifications for orders nobody waits on are
+dropped after one dict lookup.
+
+States are ordered by ``payments.status_version``, a counter the same trigger
+setup bumps on each status change; the row lock serialises those updates, so
+it follows commit order.
+"""
+import asyncio
+import json
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+
+CHANNEL = "payment_status"
+
+# Statuses a payment doesn't leave on its own; waiting on them is pointless
+SETTLED_STATUSES = ("paid", "failed", "refunded")
+
+_VERSIONS_SQL = """
+    SELECT razorpay_order_id AS order_id, status, status_version AS version
+    FROM payments WHERE razorpay_order_id = ANY(:order_ids)
+"""
+
+
+def load_states(order_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Current status and version of the given orders, in the same shape as the trigger payload"""
+    db = SessionLocal()
+    try:
+        rows = db.execute(text(_VERSIONS_SQL), {"order_ids": list(order_ids)}).mappings().all()
+    finally:
+        db.close()
+    return {row["order_id"]: dict(row) for row in rows}
+
+
+class _Order:
+    __slots__ = ("state", "changed", "waiters")
+
+    def __init__(self, state: Dict[str, Any]):
+        self.state = state
+        self.changed = asyncio.Event()
+        self.waiters = 0
+
+
+class PaymentWaiters:
+    def __init__(self):
+        self._orders: Dict[str, _Order] = {}
+
+    def on_notify(self, payload: str) -> None:
+        data = json.loads(payload)
+        order = self._orders.get(data["order_id"])
+        if order is not None:
+            self._offer(order, data)
+
+    def on_reconnect(self) -> None:
+        """Re-read waited-on orders after the LISTEN connection dropped"""
+        if not self._orders:
+            return
+        loop = asyncio.get_running_loop()
+
+        async def refresh():
+            states = await loop.run_in_executor(None, load_states, list(self._orders))
+            for order_id, state in states.items():
+                order = self._orders.get(order_id)
+                if order is not None:
+                    self._offer(order, state)
+
+        loop.create_task(refresh())
+
+    @staticmethod
+    def _offer(order: _Order, state: Dict[str, Any]) -> None:
+        if state["version"] <= order.state["version"]:
+            return
+        order.state = state
+        # Swap the Event so later waits block until the next change
+        changed, order.changed = order.changed, asyncio.Event()
+        changed.set()
+
+    async def wait(self, state: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Wait until the order has a version newer than ``state`` (read from the database), or ``timeout``
+
+        Must be called right after reading ``state``, without awaiting in
+        between: notifications are handled on the event loop, so one for a
+        commit after that read can't be missed.
+        """
+        order_id = state["order_id"]
+        order = self._orders.get(order_id)
+        if order is None:
+            order = self._orders[order_id] = _Order(state)
+        else:
+            self._offer(order, state)
+        order.waiters += 1
+        try:
+            if order.state["version"] <= state["version"]:
+                try:
+                    await asyncio.wait_for(order.changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return order.state
+        finally:
+            order.waiters -= 1
+            if order.waiters == 0:
+                self._orders.pop(order_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "orders": len(self._orders),
+            "waiters": sum(o.waiters for o in self._orders.values()),
+        }
+
+
+waiters = PaymentWaiters()
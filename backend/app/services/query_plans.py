@@ -0,0 +1,207 @@
+"""
+Query-plan regression check for the hot read paths
+
+Each entry mirrors the query an endpoint issues. ``check`` runs ``EXPLAIN``
+for all of them and reports sequential scans and explicit sorts, which mean
+the composite index set no longer covers that access path. By default the
+database is first seeded with synthetic rows inside a transaction that is
+rolled back afterwards, so the planner sees realistic table sizes.
+"""
+import json
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List
+
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+
+from app.models.audit_log import AuditLog
+from app.models.event import Event
+from app.models.payment import Payment
+from app.models.registration import Registration
+from app.models.user import User
+from app.services.dashboard import client_dashboard_etag_query
+
+
+@dataclass
+class HotQuery:
+    name: str
+    build: Callable[[Dict[str, Any]], Select]
+    # Plan nodes that are expected for this query; say why next to the entry
+    allow_sort: bool = False
+    allow_seq_scan: FrozenSet[str] = field(default_factory=frozenset)
+
+
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery("events.public", lambda p: select(Event).where(
+        Event.status == "published").order_by(Event.event_date.desc()).limit(100)),
+    HotQuery("events.list_by_status", lambda p: select(Event).where(
+        Event.status == "draft").order_by(Event.event_date.desc()).limit(100)),
+    HotQuery("events.list_all", lambda p: select(Event).order_by(Event.event_date.desc()).limit(100)),
+    HotQuery("events.changes", lambda p: select(Event).where(
+        Event.change_xid < text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint"),
+        tuple_(Event.change_xid, Event.change_seq) > tuple_(text("0"), text("0"))
+    ).order_by(Event.change_xid, Event.change_seq).limit(101)),
+    HotQuery("events.client_changes", lambda p: select(Event).where(
+        Event.status == "published",
+        Event.change_xid < text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint"),
+        tuple_(Event.change_xid, Event.change_seq) > tuple_(text("0"), text("0"))
+    ).order_by(Event.change_xid, Event.change_seq).limit(101)),
+    HotQuery("admin.my_events", lambda p: select(Event).where(
+        Event.created_by == p["admin_id"]).order_by(Event.created_at.desc())),
+    HotQuery("developer.events", lambda p: select(Event).order_by(Event.created_at.desc()).limit(100)),
+    HotQuery("registrations.my", lambda p: select(Registration).where(
+        Registration.user_id == p["user_id"]).order_by(Registration.created_at.desc())),
+    HotQuery("me.dashboard_etag", lambda p: client_dashboard_etag_query(p["user_id"])),
+    HotQuery("registrations.existing", lambda p: select(Registration).where(
+        Registration.event_id == p["event_id"], Registration.user_id == p["user_id"]).limit(1)),
+    HotQuery("admin.event_registrations", lambda p: select(Registration).where(
+        Registration.event_id == p["event_id"]).order_by(Registration.created_at.desc())),
+    HotQuery("registrations.waitlist_head", lambda p: select(Registration).where(
+        Registration.event_id == p["event_id"], Registration.status == "waitlisted"
+    ).order_by(Registration.waitlist_position).limit(10)),
+    HotQuery("registrations.my_changes", lambda p: select(Registration).where(
+        Registration.user_id == p["user_id"],
+        Registration.change_xid < text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint"),
+        tuple_(Registration.change_xid, Registration.change_seq) > tuple_(text("0"), text("0"))
+    ).order_by(Registration.change_xid, Registration.change_seq).limit(101)),
+    HotQuery("developer.registrations", lambda p: select(Registration).order_by(
+        Registration.created_at.desc()).limit(100)),
+    # Payments of one user span several registrations, so ordering them by
+    # payment time needs a (small) sort unless user_id is denormalized onto payments
+    HotQuery("payments.my", lambda p: select(Payment).join(Registration).where(
+        Registration.user_id == p["user_id"]).order_by(Payment.created_at.desc()), allow_sort=True),
+    HotQuery("payments.existing", lambda p: select(Payment).where(
+        Payment.registration_id == p["registration_id"], Payment.status.in_(["created", "paid"])).limit(1)),
+    HotQuery("developer.payments", lambda p: select(Payment).order_by(Payment.created_at.desc()).limit(100)),
+    HotQuery("developer.users", lambda p: select(User).order_by(User.created_at.desc()).limit(100)),
+    HotQuery("developer.users_by_role", lambda p: select(User).where(
+        User.role == "admin").order_by(User.created_at.desc()).limit(100)),
+    HotQuery("auth.login", lambda p: select(User).where(User.email == p["email"]).limit(1)),
+    HotQuery("developer.audit_logs", lambda p: select(AuditLog).order_by(AuditLog.created_at.desc()).limit(100)),
+    HotQuery("developer.audit_logs_by_admin", lambda p: select(AuditLog).where(
+        AuditLog.admin_id == p["admin_id"]).order_by(AuditLog.created_at.desc()).limit(100)),
+    HotQuery("developer.audit_logs_by_action", lambda p: select(AuditLog).where(
+        AuditLog.action_type == "registration_approved").order_by(AuditLog.created_at.desc()).limit(100)),
+    HotQuery("developer.audit_logs_by_target", lambda p: select(AuditLog.id, AuditLog.created_at).where(
+        AuditLog.target_type == "registration", AuditLog.target_id == p["audit_target_id"]
+    ).order_by(AuditLog.created_at.desc()).limit(100)),
+    # The GIN index finds matching rows in no particular order, so they are sorted afterwards
+    HotQuery("developer.audit_logs_by_details", lambda p: select(AuditLog.id, AuditLog.created_at).where(
+        AuditLog.details.contains({"registration_id": str(p["registration_id"])})
+    ).order_by(AuditLog.created_at.desc()).limit(100), allow_sort=True),
+    HotQuery("lifecycle.close_registration", lambda p: select(Event.id).where(
+        Event.status == "published", Event.registration_open, Event.registration_deadline <= text("now()")
+    ).order_by(Event.registration_deadline).limit(500)),
+    HotQuery("lifecycle.complete", lambda p: select(Event.id).where(
+        Event.status == "published", Event.event_date <= text("now()")
+    ).order_by(Event.event_date).limit(500)),
+]
+
+
+# Rows per table are multiples of ``scale``; each event gets ~10 registrations
+# and each user ~2, so per-key lookups are selective.
+_SEED_SQL = [
+    """
+    INSERT INTO users (id, email, password_hash, full_name, role, is_active, created_at, updated_at)
+    SELECT gen_random_uuid(), 'plan-check-' || g || '@example.invalid', 'x', 'Plan Check ' || g,
+           (ARRAY['client', 'client', 'client', 'client', 'client', 'client', 'client', 'client', 'admin', 'developer'])[1 + g % 10],
+           TRUE, now() - g * interval '1 minute', now()
+    FROM generate_series(1, :scale * 10) g
+    """,
+    """
+    INSERT INTO events (id, title, description, event_date, registration_deadline, is_paid, price,
+                        max_participants, current_participants, waitlist_count, status, registration_open,
+                        created_by, created_at, updated_at)
+    SELECT gen_random_uuid(), 'Plan check event ' || g, NULL,
+           now() + (g - :scale) * interval '1 hour', now() + (g - :scale - 24) * interval '1 hour',
+           g % 3 = 0, 100, 100, 0, 0,
+           (ARRAY['draft', 'published', 'cancelled', 'completed'])[1 + g % 4], TRUE,
+           (SELECT id FROM users WHERE role = 'admin' AND email LIKE 'plan-check-%' OFFSET g % :scale LIMIT 1),
+           now() - g * interval '1 minute', now()
+    FROM generate_series(1, :scale * 2) g
+    """,
+    """
+    INSERT INTO registrations (id, event_id, user_id, status, form_data, payment_status, created_at, updated_at)
+    SELECT gen_random_uuid(), e.id, u.id, 'pending', '{}'::jsonb, 'not_required',
+           now() - (e.n * 100 + u.n) * interval '1 second', now()
+    FROM (SELECT id, row_number() OVER () AS n FROM events WHERE title LIKE 'Plan check event %') e
+    JOIN (SELECT id, row_number() OVER () AS n FROM users WHERE email LIKE 'plan-check-%') u
+      ON u.n % (:scale * 2) = e.n % (:scale * 2) OR u.n % (:scale * 2) = (e.n * 7) % (:scale * 2)
+    """,
+    """
+    INSERT INTO payments (id, registration_id, razorpay_order_id, amount, currency, status,
+                          webhook_received, webhook_verified, created_at, updated_at)
+    SELECT gen_random_uuid(), r.id, 'order_PLAN' || r.id, 100, 'INR', 'paid', FALSE, FALSE, r.created_at, now()
+    FROM registrations r JOIN events e ON e.id = r.event_id
+    WHERE e.is_paid AND e.title LIKE 'Plan check event %'
+    """,
+    """
+    INSERT INTO audit_logs (id, admin_id, action_type, target_type, target_id, details, created_at)
+    SELECT gen_random_uuid(), u.id,
+           (ARRAY['registration_approved', 'registration_rejected', 'event_updated'])[1 + r.n % 3],
+           'registration', r.id, jsonb_build_object('registration_id', r.id), now() - r.n * interval '1 second'
+    FROM (SELECT id, row_number() OVER () AS n FROM registrations) r
+    JOIN LATERAL (SELECT id FROM users WHERE role = 'admin' AND email LIKE 'plan-check-%'
+                  OFFSET r.n % :scale LIMIT 1) u ON TRUE
+    """,
+]
+
+
+def seed(conn: Connection, scale: int) -> None:
+    """Insert synthetic rows and refresh planner statistics (caller rolls back)"""
+    for sql in _SEED_SQL:
+        conn.execute(text(sql), {"scale": scale})
+    for table in ("users", "events", "registrations", "payments", "audit_logs"):
+        conn.execute(text(f"ANALYZE {table}"))
+
+
+def _sample_params(conn: Connection) -> Dict[str, Any]:
+    row = conn.execute(text("""
+        SELECT r.id AS registration_id, r.event_id, r.user_id, u.email, e.created_by AS admin_id,
+               (SELECT target_id FROM audit_logs LIMIT 1) AS audit_target_id
+        FROM registrations r JOIN users u ON u.id = r.user_id JOIN events e ON e.id = r.event_id
+        LIMIT 1
+    """)).first()
+    if row is None:
+        raise RuntimeError("No registrations to sample parameters from; run with seeding enabled")
+    return dict(row._mapping)
+
+
+def _explain(conn: Connection, stmt: Select) -> Dict[str, Any]:
+    compiled = stmt.compile(dialect=conn.dialect)
+    # Bypass SQLAlchemy bind processing so UUIDs and JSONB values go to the driver as text literals
+    params = {
+        k: str(v) if isinstance(v, uuid.UUID) else json.dumps(v) if isinstance(v, dict) else v
+        for k, v in compiled.params.items()
+    }
+    return conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, params).scalar()[0]["Plan"]
+
+
+def _walk(plan: Dict[str, Any]):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def problems(query: HotQuery, plan: Dict[str, Any]) -> List[str]:
+    found = []
+    for node in _walk(plan):
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") not in query.allow_seq_scan:
+            found.append(f"Seq Scan on {node.get('Relation Name')}")
+        elif node["Node Type"] == "Sort" and not query.allow_sort:
+            found.append(f"Sort on {', '.join(node.get('Sort Key', []))}")
+    return found
+
+
+def check(conn: Connection, seed_scale: int = 1000) -> Dict[str, List[str]]:
+    """EXPLAIN every hot query. Returns problems by query name (empty lists mean the plan is fine)."""
+    trans = conn.begin()
+    try:
+        if seed_scale:
+            seed(conn, seed_scale)
+        params = _sample_params(conn)
+        return {q.name: problems(q, _explain(conn, q.build(params))) for q in HOT_QUERIES}
+    finally:
+        trans.rollback()
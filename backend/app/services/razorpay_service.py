@@ -4,12 +4,32 @@ Razorpay payment service
 import razorpay
 import hmac
 import hashlib
+import threading
 from decimal import Decimal
-from typing import Dict, Any
+from typing import Dict, Any, List
 
+from app.core.access_log import record_gateway_call
 from app.core.config import settings
 
-client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+
+# Request handlers run in the threadpool, so each thread keeps its own client
+_local = threading.local()
+
+
+def get_client() -> razorpay.Client:
+    """Razorpay client of the calling thread, built on its first use"""
+    if not hasattr(_local, "client"):
+        _local.client = new_client()
+    return _local.client
+
+
+def new_client() -> razorpay.Client:
+    """A fresh client (requests sessions shouldn't be shared between threads)"""
+    options = {"base_url": settings.RAZORPAY_BASE_URL} if settings.RAZORPAY_BASE_URL else {}
+    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET), **options)
+    # Gateway time shows up in the access log line of the request that made the call
+    client.session.hooks["response"].append(record_gateway_call)
+    return client
 
 
 def create_order(amount: Decimal, currency: str = "INR", receipt: str = None) -> Dict[str, Any]:
@@ -21,14 +41,14 @@ def create_order(amount: Decimal, currency: str = "INR", receipt: str = None) ->
     if receipt:
         data["receipt"] = receipt
     
-    order = client.order.create(data=data)
+    order = get_client().order.create(data=data)
     return order
 
 
 def verify_webhook_signature(payload: str, signature: str) -> bool:
     """Verify Razorpay webhook signature"""
     try:
-        client.utility.verify_webhook_signature(
+        get_client().utility.verify_webhook_signature(
             payload,
             signature,
             settings.RAZORPAY_WEBHOOK_SECRET
@@ -41,7 +61,7 @@ def verify_webhook_signature(payload: str, signature: str) -> bool:
 def verify_payment_signature(order_id: str, payment_id: str, signature: str) -> bool:
     """Verify Razorpay payment signature"""
     try:
-        client.utility.verify_payment_signature({
+        get_client().utility.verify_payment_signature({
             "razorpay_order_id": order_id,
             "razorpay_payment_id": payment_id,
             "razorpay_signature": signature
@@ -53,4 +73,14 @@ def verify_payment_signature(order_id: str, payment_id: str, signature: str) ->
 
 def get_payment_details(payment_id: str) -> Dict[str, Any]:
     """Get payment details from Razorpay"""
-    return client.payment.fetch(payment_id)
+    return get_client().payment.fetch(payment_id)
+
+
+def list_orders(client: razorpay.Client, start: int, end: int, skip: int, count: int = 100) -> List[Dict[str, Any]]:
+    """One page of orders created in [start, end) (unix seconds)"""
+    return client.order.all(data={"from": start, "to": end, "skip": skip, "count": count})["items"]
+
+
+def list_payments(client: razorpay.Client, start: int, end: int, skip: int, count: int = 100) -> List[Dict[str, Any]]:
+    """One page of payments created in [start, end) (unix seconds)"""
+    return client.payment.all(data={"from": start, "to": end, "skip": skip, "count": count})["items"]
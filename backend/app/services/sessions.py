@@ -0,0 +1,135 @@
+"""
+Refresh-token sessions
+
+A refresh token is ``<session id>.<random secret>``; only a SHA-256 of the
+secret is stored (it is high-entropy, so no slow hash is needed). Every
+refresh rotates the secret. Presenting the previous secret again means the
+token was copied, and the whole session is revoked, so both the thief and
+the legitimate client have to log in again.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import delete, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User
+from app.models.user_session import UserSession
+
+
+def _hash(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def _parse(refresh_token: str) -> Optional[Tuple[UUID, str]]:
+    session_id, _, secret = refresh_token.partition(".")
+    try:
+        return UUID(session_id), secret
+    except ValueError:
+        return None
+
+
+def _invalid() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def create_session(db: Session, user: User, request: Optional[Request] = None) -> Tuple[UserSession, str]:
+    """Start a session for a freshly authenticated user. Returns it with its refresh token."""
+    secret = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    session = UserSession(
+        user_id=user.id,
+        token_hash=_hash(secret),
+        user_agent=request.headers.get("user-agent") if request else None,
+        ip_address=request.client.host if request and request.client else None,
+        rotated_at=now,
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session, f"{session.id}.{secret}"
+
+
+def rotate(db: Session, refresh_token: str) -> Tuple[UserSession, User, str]:
+    """Exchange a refresh token for a new one. Returns the session, its user and the new token."""
+    parsed = _parse(refresh_token)
+    if parsed is None:
+        raise _invalid()
+    session_id, secret = parsed
+    presented = _hash(secret)
+    now = datetime.now(timezone.utc)
+
+    # Row lock serializes concurrent refreshes of the same session
+    session = db.query(UserSession).filter(UserSession.id == session_id).with_for_update().first()
+    if session is None or session.revoked_at is not None or session.expires_at <= now:
+        db.rollback()
+        raise _invalid()
+
+    if not secrets.compare_digest(presented, session.token_hash):
+        if session.previous_token_hash and secrets.compare_digest(presented, session.previous_token_hash):
+            if now - session.rotated_at < timedelta(seconds=settings.REFRESH_REUSE_GRACE_SECONDS):
+                # Two tabs refreshing at once; the other one already got the new token
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Refresh token was just rotated; use the latest one"
+                )
+            session.revoked_at = now
+            session.revoked_reason = "reuse_detected"
+            db.commit()
+        else:
+            db.rollback()
+        raise _invalid()
+
+    user = db.query(User).filter(User.id == session.user_id).first()
+    if not user or not user.is_active:
+        session.revoked_at = now
+        session.revoked_reason = "user_inactive"
+        db.commit()
+        raise _invalid()
+
+    new_secret = secrets.token_urlsafe(32)
+    session.previous_token_hash = session.token_hash
+    session.token_hash = _hash(new_secret)
+    session.rotated_at = now
+    session.expires_at = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    db.commit()
+    return session, user, f"{session.id}.{new_secret}"
+
+
+def revoke(db: Session, session: UserSession, reason: str) -> None:
+    if session.revoked_at is None:
+        session.revoked_at = datetime.now(timezone.utc)
+        session.revoked_reason = reason
+        db.commit()
+
+
+def session_for_token(db: Session, refresh_token: str) -> Optional[UserSession]:
+    """The session a refresh token belongs to, if its secret is current"""
+    parsed = _parse(refresh_token)
+    if parsed is None:
+        return None
+    session = db.query(UserSession).filter(UserSession.id == parsed[0]).first()
+    if session is None or not secrets.compare_digest(_hash(parsed[1]), session.token_hash):
+        return None
+    return session
+
+
+def purge_expired(db: Session) -> int:
+    """Delete sessions that expired or were revoked over a day ago. Returns the number removed."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=1)
+    result = db.execute(
+        delete(UserSession).where(or_(UserSession.expires_at < cutoff, UserSession.revoked_at < cutoff))
+    )
+    db.commit()
+    return result.rowcount
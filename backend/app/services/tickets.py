@@ -0,0 +1,243 @@
+"""
+Signed tickets and door check-in
+
+A ticket is ``<kid>.<base64url(payload + signature)>`` (no padding), where
+the 37-byte payload is::
+
+    format (1 byte, = 1) | registration id (16) | event id (16) | ticket_version (4, big-endian)
+
+and the signature is Ed25519 over the payload with the key ``kid``. That is
+about 140 characters, small enough for a low-density QR code. Scanners
+download the public keys once (``GET /admin/tickets/keys``) and verify
+tickets with no network at all.
+
+Tickets are only issued for accepted registrations that are paid or free.
+Any later change of ``status`` or ``payment_status`` bumps the
+registration's ``ticket_version`` (a trigger), so a ticket issued before a
+cancellation still verifies offline but is reported ``revoked`` once the
+scan is synced.
+
+Scanners queue their scans and upload them in bulk with
+``POST /admin/events/{id}/checkins/batch`` whenever they have connectivity.
+The ``checkins`` primary key admits each registration once across all gates,
+and a scan that is uploaded again (a retried batch) is recognised by its
+scan time and gate, so retries are harmless.
+"""
+import base64
+import binascii
+import hashlib
+import struct
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import read_pem
+from app.models.checkin import Checkin
+from app.models.registration import Registration
+from app.schemas.checkin import CheckinBatchResponse, CheckinResult, CheckinScan
+
+ALGORITHM = "Ed25519"
+TICKET_FORMAT = 1
+_PAYLOAD = struct.Struct(">B16s16sI")
+_SIGNATURE_SIZE = 64
+# kid of the key derived from SECRET_KEY when no ticket keys are configured (development only)
+DERIVED_KID = "s"
+
+CHECKED_IN = "checked_in"
+DUPLICATE = "duplicate"
+INVALID = "invalid"
+WRONG_EVENT = "wrong_event"
+NOT_FOUND = "not_found"
+REVOKED = "revoked"
+
+
+def is_eligible(status: str, payment_status: str) -> bool:
+    return status == "accepted" and payment_status in ("not_required", "completed")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _load_private(pem: str) -> Ed25519PrivateKey:
+    key = serialization.load_pem_private_key(pem.encode(), password=None)
+    if not isinstance(key, Ed25519PrivateKey):
+        raise ValueError("Ticket signing keys must be Ed25519")
+    return key
+
+
+def _load_public(pem: str) -> Ed25519PublicKey:
+    key = serialization.load_pem_public_key(pem.encode())
+    if not isinstance(key, Ed25519PublicKey):
+        raise ValueError("Ticket verification keys must be Ed25519")
+    return key
+
+
+class TicketSigner:
+    """Ticket signing key and every key whose tickets are still accepted, by kid"""
+
+    def __init__(
+        self,
+        private_keys: Dict[str, Ed25519PrivateKey],
+        public_keys: Dict[str, Ed25519PublicKey],
+        active_kid: str,
+    ):
+        if active_kid not in private_keys:
+            raise ValueError(f"TICKET_ACTIVE_KID {active_kid!r} has no entry in TICKET_SIGNING_KEYS")
+        self.active_kid = active_kid
+        self._signing_key = private_keys[active_kid]
+        self.public_keys = {kid: key.public_key() for kid, key in private_keys.items()}
+        self.public_keys.update(public_keys)
+
+    @classmethod
+    def from_settings(cls) -> "TicketSigner":
+        private_keys = {kid: _load_private(read_pem(v)) for kid, v in settings.TICKET_SIGNING_KEYS.items()}
+        public_keys = {kid: _load_public(read_pem(v)) for kid, v in settings.TICKET_PUBLIC_KEYS.items()}
+        active_kid = settings.TICKET_ACTIVE_KID
+        if active_kid is None:
+            # Anyone who learns SECRET_KEY could forge tickets with this key, so it is development-only
+            if settings.ENVIRONMENT != "development":
+                raise ValueError("TICKET_ACTIVE_KID and TICKET_SIGNING_KEYS must be configured outside development")
+            seed = hashlib.sha256(b"cascade-forum-tickets:" + settings.SECRET_KEY.encode()).digest()
+            private_keys[DERIVED_KID] = Ed25519PrivateKey.from_private_bytes(seed)
+            active_kid = DERIVED_KID
+        return cls(private_keys, public_keys, active_kid)
+
+    def issue(self, registration_id: UUID, event_id: UUID, ticket_version: int) -> str:
+        payload = _PAYLOAD.pack(TICKET_FORMAT, registration_id.bytes, event_id.bytes, ticket_version)
+        return f"{self.active_kid}.{_b64encode(payload + self._signing_key.sign(payload))}"
+
+    def verify(self, ticket: str) -> Optional[Tuple[UUID, UUID, int]]:
+        """(registration id, event id, ticket_version), or None if the ticket is malformed or forged"""
+        kid, _, body = ticket.strip().partition(".")
+        key = self.public_keys.get(kid)
+        if key is None:
+            return None
+        try:
+            data = _b64decode(body)
+        except (binascii.Error, ValueError):
+            return None
+        if len(data) != _PAYLOAD.size + _SIGNATURE_SIZE:
+            return None
+        payload, signature = data[:_PAYLOAD.size], data[_PAYLOAD.size:]
+        try:
+            key.verify(signature, payload)
+        except InvalidSignature:
+            return None
+        fmt, registration_id, event_id, ticket_version = _PAYLOAD.unpack(payload)
+        if fmt != TICKET_FORMAT:
+            return None
+        return UUID(bytes=registration_id), UUID(bytes=event_id), ticket_version
+
+    def public_keys_raw(self) -> Dict[str, str]:
+        return {
+            kid: _b64encode(key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw))
+            for kid, key in self.public_keys.items()
+        }
+
+
+signer = TicketSigner.from_settings()
+
+
+def _aware(value: datetime) -> datetime:
+    # Scanner clocks without a zone are taken as UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def record_checkins(db: Session, event_id: UUID, scans: List[CheckinScan], scanned_by: UUID) -> CheckinBatchResponse:
+    """Verify and record a batch of scans for one event; results follow the order of ``scans``"""
+    results: List[Optional[CheckinResult]] = [None] * len(scans)
+    decoded: Dict[int, Tuple[UUID, int]] = {}
+    for i, scan in enumerate(scans):
+        claims = signer.verify(scan.ticket)
+        if claims is None:
+            results[i] = CheckinResult(result=INVALID)
+        elif claims[1] != event_id:
+            results[i] = CheckinResult(registration_id=claims[0], result=WRONG_EVENT)
+        else:
+            decoded[i] = (claims[0], claims[2])
+
+    registrations = {}
+    if decoded:
+        registrations = {
+            row.id: row for row in db.query(
+                Registration.id, Registration.status, Registration.payment_status, Registration.ticket_version
+            ).filter(
+                Registration.event_id == event_id,
+                Registration.id.in_({registration_id for registration_id, _ in decoded.values()})
+            )
+        }
+
+    # The earliest valid scan of each registration is the one that admits it
+    admitting: Dict[UUID, int] = {}
+    for i, (registration_id, ticket_version) in decoded.items():
+        registration = registrations.get(registration_id)
+        if registration is None:
+            results[i] = CheckinResult(registration_id=registration_id, result=NOT_FOUND)
+        elif registration.ticket_version != ticket_version or not is_eligible(
+            registration.status, registration.payment_status
+        ):
+            results[i] = CheckinResult(registration_id=registration_id, result=REVOKED)
+        elif registration_id not in admitting or _aware(scans[i].scanned_at) < _aware(
+            scans[admitting[registration_id]].scanned_at
+        ):
+            admitting[registration_id] = i
+
+    inserted = set()
+    if admitting:
+        stmt = insert(Checkin).values([
+            {
+                "registration_id": registration_id,
+                "event_id": event_id,
+                "ticket_version": decoded[i][1],
+                "gate": scans[i].gate,
+                "scanned_by": scanned_by,
+                "scanned_at": _aware(scans[i].scanned_at),
+            }
+            for registration_id, i in admitting.items()
+        ]).on_conflict_do_nothing(index_elements=[Checkin.registration_id]).returning(Checkin.registration_id)
+        inserted = set(db.execute(stmt).scalars())
+
+    # Admitted earlier (another gate, or this batch sent before)
+    earlier = [registration_id for registration_id in admitting if registration_id not in inserted]
+    admitted_by: Dict[UUID, Tuple[Optional[datetime], Optional[str]]] = {
+        registration_id: (_aware(scans[i].scanned_at), scans[i].gate)
+        for registration_id, i in admitting.items() if registration_id in inserted
+    }
+    if earlier:
+        for checkin in db.query(Checkin).filter(Checkin.registration_id.in_(earlier)):
+            admitted_by[checkin.registration_id] = (checkin.scanned_at, checkin.gate)
+    db.commit()
+
+    for i, (registration_id, _) in decoded.items():
+        if results[i] is not None:
+            continue
+        checked_in_at, gate = admitted_by.get(registration_id, (None, None))
+        # The admitting scan itself, possibly re-sent, is a check-in; any other scan is a duplicate
+        same_scan = checked_in_at == _aware(scans[i].scanned_at) and gate == scans[i].gate
+        results[i] = CheckinResult(
+            registration_id=registration_id,
+            result=CHECKED_IN if same_scan else DUPLICATE,
+            checked_in_at=checked_in_at,
+            gate=gate,
+        )
+
+    checked_in = sum(1 for r in results if r.result == CHECKED_IN)
+    duplicates = sum(1 for r in results if r.result == DUPLICATE)
+    return CheckinBatchResponse(
+        results=results,
+        checked_in=checked_in,
+        duplicates=duplicates,
+        rejected=len(results) - checked_in - duplicates,
+    )
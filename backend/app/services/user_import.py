@@ -0,0 +1,228 @@
+"""
+Bulk user import from CSV
+
+The upload is spooled to a temporary file as it streams in and then read in
+batches. Per batch, passwords are hashed across a process pool (bcrypt is
+CPU-bound, so threads would serialize on the GIL), already registered emails
+are found with one query and the new users go in with one multi-row
+``INSERT ... ON CONFLICT DO NOTHING``. Progress is committed with every
+batch, so an interrupted import is resumed by uploading the same file again
+with its import id; rows before the checkpoint are skipped without hashing.
+"""
+import asyncio
+import csv
+import io
+import multiprocessing
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.user import User
+from app.models.user_import import UserImport
+
+REQUIRED_COLUMNS = ("email", "full_name", "password")
+# Developers are created by hand; imports onboard students and committee admins
+IMPORTABLE_ROLES = ("client", "admin")
+
+# Uploads larger than this are spooled to disk instead of memory
+_SPOOL_MEMORY_BYTES = 1024 * 1024
+
+_email = TypeAdapter(EmailStr)
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _workers() -> int:
+    return settings.IMPORT_HASH_WORKERS or os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: don't fork a worker that holds an event loop and DB connections
+        _pool = ProcessPoolExecutor(max_workers=_workers(), mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _hash_chunk(passwords: List[str]) -> List[str]:
+    return [get_password_hash(p) for p in passwords]
+
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    """bcrypt-hash passwords in parallel, one chunk per pool process, preserving order"""
+    if not passwords:
+        return []
+    loop = asyncio.get_running_loop()
+    size = -(-len(passwords) // _workers())
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    results = await asyncio.gather(*(loop.run_in_executor(_get_pool(), _hash_chunk, c) for c in chunks))
+    return [h for chunk in results for h in chunk]
+
+
+async def spool_upload(request: Request) -> tempfile.SpooledTemporaryFile:
+    """Copy the streamed request body to a temporary file, enforcing the size limit"""
+    upload = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MEMORY_BYTES)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > settings.IMPORT_MAX_BYTES:
+            upload.close()
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"CSV exceeds {settings.IMPORT_MAX_BYTES} bytes"
+            )
+        upload.write(chunk)
+    upload.seek(0)
+    return upload
+
+
+def read_rows(upload) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """(row number, row) for each data row, after validating the header"""
+    reader = csv.DictReader(io.TextIOWrapper(upload, encoding="utf-8-sig", newline=""))
+    try:
+        header = reader.fieldnames or []
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV must be UTF-8")
+    reader.fieldnames = [name.strip().lower() for name in header]
+    missing = [c for c in REQUIRED_COLUMNS if c not in reader.fieldnames]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSV is missing columns: {', '.join(missing)}"
+        )
+    return enumerate(reader, start=1)
+
+
+def _validate(row: Dict[str, str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    email = (row.get("email") or "").strip()
+    record = {
+        "email": email,
+        "full_name": (row.get("full_name") or "").strip(),
+        "password": row.get("password") or "",
+        "role": (row.get("role") or "").strip().lower() or "client",
+    }
+    try:
+        record["email"] = _email.validate_python(email)
+    except ValidationError:
+        return record, "Invalid email"
+    if not record["full_name"]:
+        return record, "full_name is required"
+    if not record["password"]:
+        return record, "password is required"
+    if record["role"] not in IMPORTABLE_ROLES:
+        return record, f"role must be one of: {', '.join(IMPORTABLE_ROLES)}"
+    return record, None
+
+
+def _batched(rows: Iterator, size: int) -> Iterator[List]:
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+async def _import_batch(
+    db: Session,
+    user_import: UserImport,
+    batch: List[Tuple[int, Dict[str, str]]],
+    seen: set,
+    errors: List[Dict[str, Any]],
+) -> None:
+    expected_rows = user_import.rows_processed
+    errors_before = len(errors)
+    valid = []
+    for number, row in batch:
+        record, error = _validate(row)
+        if error is None and record["email"] in seen:
+            error = "Duplicate email in file"
+        if error is not None:
+            errors.append({"row": number, "email": record["email"] or None, "error": error})
+            continue
+        seen.add(record["email"])
+        valid.append(record)
+
+    emails = [r["email"] for r in valid]
+    existing = {e for (e,) in db.query(User.email).filter(User.email.in_(emails))} if emails else set()
+    new = [r for r in valid if r["email"] not in existing]
+    # Don't hold a connection (or a transaction) open while hashing
+    db.rollback()
+    hashes = await hash_passwords([r["password"] for r in new])
+
+    # The row lock keeps two uploads resuming the same import from interleaving
+    locked = db.query(UserImport).filter(UserImport.id == user_import.id).with_for_update().one()
+    if locked.rows_processed != expected_rows:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This import is being resumed by another request"
+        )
+
+    created = 0
+    if new:
+        stmt = insert(User).values([
+            {"id": uuid.uuid4(), "email": r["email"], "password_hash": h, "full_name": r["full_name"],
+             "role": r["role"], "is_active": True}
+            for r, h in zip(new, hashes)
+        ]).on_conflict_do_nothing(index_elements=[User.email]).returning(User.id)
+        created = len(db.execute(stmt).all())
+
+    locked.rows_processed = batch[-1][0]
+    locked.created_count += created
+    # Registered before this import, or concurrently since the lookup above
+    locked.skipped_count += len(valid) - created
+    locked.error_count += len(errors) - errors_before
+    locked.errors = errors[:settings.IMPORT_MAX_ERRORS]
+    db.commit()
+
+
+async def run_import(db: Session, user_import: UserImport, upload) -> UserImport:
+    """Import the rows of ``upload`` after the import's checkpoint. Returns the updated import."""
+    rows = read_rows(upload)
+    errors = list(user_import.errors or [])
+    seen: set = set()
+    resume_after = user_import.rows_processed
+    pending = (item for item in rows if item[0] > resume_after)
+
+    user_import.status = "running"
+    db.commit()
+    try:
+        for batch in _batched(pending, settings.IMPORT_BATCH_SIZE):
+            await _import_batch(db, user_import, batch, seen, errors)
+    except HTTPException:
+        raise
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Rows before the bad one are committed; fix the file and resume
+        db.rollback()
+        user_import.status = "failed"
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unreadable CSV after row {user_import.rows_processed}: {e}"
+        )
+    except Exception:
+        db.rollback()
+        user_import.status = "failed"
+        db.commit()
+        raise
+
+    user_import.status = "completed"
+    db.commit()
+    db.refresh(user_import)
+    return user_import
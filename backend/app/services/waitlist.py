@@ -0,0 +1,84 @@
+"""
+Event waitlist and registration status transitions
+
+Participant and waitlist counters are updated with SQL expressions so
+concurrent moderators never overwrite each other's changes. Freed seats go
+to the head of the waitlist; heads are dequeued with ``FOR UPDATE SKIP LOCKED``
+so two moderators freeing seats at the same time promote different people.
+"""
+from typing import List
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.event import Event
+from app.models.registration import Registration, waitlist_seq
+
+WAITLISTED = "waitlisted"
+
+
+def is_full(event: Event) -> bool:
+    """New registrations queue if seats are gone or someone is already waiting"""
+    if event.waitlist_count:
+        return True
+    return bool(event.max_participants) and event.current_participants >= event.max_participants
+
+
+def join_waitlist(db: Session, event: Event, registration: Registration) -> None:
+    """Put a new registration at the back of the event's waitlist"""
+    registration.status = WAITLISTED
+    registration.waitlist_position = db.scalar(select(waitlist_seq.next_value()))
+    event.waitlist_count = Event.waitlist_count + 1
+
+
+def fill_from_waitlist(db: Session, event: Event) -> List[Registration]:
+    """Promote waitlisted registrations into any free seats. Returns the promoted registrations."""
+    # Push pending counter expressions so the values below are read back from the row
+    db.flush()
+    if not event.waitlist_count:
+        return []
+    if event.max_participants:
+        free = event.max_participants - event.current_participants
+    else:
+        # Capacity limit removed: everyone waiting gets in
+        free = event.waitlist_count
+    if free <= 0:
+        return []
+
+    heads = db.query(Registration).filter(
+        Registration.event_id == event.id,
+        Registration.status == WAITLISTED
+    ).order_by(Registration.waitlist_position).limit(free).with_for_update(skip_locked=True).all()
+
+    for registration in heads:
+        registration.status = "accepted"
+        registration.waitlist_position = None
+
+    if heads:
+        event.current_participants = Event.current_participants + len(heads)
+        event.waitlist_count = Event.waitlist_count - len(heads)
+    return heads
+
+
+def apply_status_change(db: Session, registration: Registration, new_status: str) -> List[Registration]:
+    """Change a registration's status, keep the event counters in sync and
+    hand any freed seat to the waitlist. Returns the promoted registrations."""
+    old_status = registration.status
+    event = registration.event
+    registration.status = new_status
+
+    if old_status == WAITLISTED and new_status != WAITLISTED:
+        registration.waitlist_position = None
+        event.waitlist_count = Event.waitlist_count - 1
+    elif new_status == WAITLISTED and old_status != WAITLISTED:
+        registration.waitlist_position = db.scalar(select(waitlist_seq.next_value()))
+        event.waitlist_count = Event.waitlist_count + 1
+
+    # Update event participant count
+    if new_status == "accepted" and old_status != "accepted":
+        event.current_participants = Event.current_participants + 1
+    elif old_status == "accepted" and new_status != "accepted":
+        event.current_participants = func.greatest(Event.current_participants - 1, 0)
+        return fill_from_waitlist(db, event)
+
+    return []
@@ -1,6 +1,7 @@
 """
 Gunicorn configuration for production
 """
+import gc
 import multiprocessing
 
 bind = "0.0.0.0:8000"
@@ -10,6 +11,27 @@ timeout = 120
 keepalive = 5
 max_requests = 1000
 max_requests_jitter = 50
-accesslog = "-"
+# Access lines come from the app (app/core/access_log.py), with request ids and timings
+accesslog = None
 errorlog = "-"
 loglevel = "info"
+
+# Import the app (settings, models, metadata fingerprint) once in the master;
+# workers inherit it copy-on-write. Run `python -m app.cli migrate` before
+# starting so the per-worker schema check passes.
+preload_app = True
+
+
+def when_ready(server):
+    # Move everything allocated during preload into the permanent GC generation
+    # so collections in the workers don't touch (and un-share) those pages.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app.core.database import engine
+    from app.core.startup import mark_forked
+
+    mark_forked()
+    # Drop pooled connections inherited from the master without closing them
+    engine.dispose(close=False)
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark of per-request JWT handling
+
+Times ``decode_access_token`` (what ``get_current_user_id`` runs on every
+authenticated request) for HMAC and asymmetric keys, with the verified-token
+cache cold (every call verifies the signature) and warm (repeat requests
+with the same token).
+
+Usage (from backend/): python scripts/bench_auth.py [--iterations 20000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec, rsa  # noqa: E402
+
+from app.core import security  # noqa: E402
+
+
+def _pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+def keyrings():
+    rsa_key = _pem(rsa.generate_private_key(public_exponent=65537, key_size=2048))
+    ec_key = _pem(ec.generate_private_key(ec.SECP256R1()))
+    return {
+        "HS256 (SECRET_KEY)": security.KeyRing("bench-secret", "HS256", "RS256", {}, {}, None, True),
+        "RS256 (kid)": security.KeyRing("bench-secret", "HS256", "RS256", {"k1": rsa_key}, {}, "k1", True),
+        "ES256 (kid)": security.KeyRing("bench-secret", "HS256", "ES256", {"k1": ec_key}, {}, "k1", True),
+    }
+
+
+def run(iterations: int, cached: bool) -> float:
+    token = security.create_access_token({"sub": "00000000-0000-0000-0000-000000000001"},
+                                         expires_delta=timedelta(minutes=30))
+    samples = []
+    for _ in range(iterations):
+        if not cached:
+            security.token_cache.clear()
+        start = time.perf_counter()
+        claims = security.decode_access_token(token)
+        samples.append(time.perf_counter() - start)
+        assert claims is not None
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'key':20s} {'verify every time':>20s} {'verified-token cache':>22s}")
+    for name, keyring in keyrings().items():
+        security.keyring = keyring
+        cold = run(args.iterations, cached=False)
+        warm = run(args.iterations, cached=True)
+        print(f"{name:20s} {cold * 1e6:17.1f} us {warm * 1e6:19.1f} us")
+    print(f"(median per call over {args.iterations} calls)")
+
+
+if __name__ == "__main__":
+    main()
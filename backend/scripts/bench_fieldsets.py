@@ -0,0 +1,116 @@
+"""
+Payload size and latency of event list responses with and without sparse fieldsets
+
+Without --url, builds list responses in-process from synthetic Event rows
+(realistic description and form_schema sizes) the way the endpoints do and
+times building plus JSON encoding. With --url, calls a running server and
+reports wall-clock latency and body size for each variant instead.
+
+Usage (from backend/):
+    python scripts/bench_fieldsets.py [--rows 100] [--repeat 200]
+    python scripts/bench_fieldsets.py --url http://localhost:8000/api/v1/events/public [--token JWT]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import urllib.request
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.api.v1.fields import EVENT_LIST_FIELDS, event_projection  # noqa: E402
+# Importing the schema module registers every model, so relationships resolve
+from app.core import schema  # noqa: E402,F401
+from app.models.event import Event  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.event import EventPartialResponse, EventResponse  # noqa: E402
+
+VARIANTS = {
+    "full (previous behaviour)": None,
+    "default list (form_schema deferred)": "",
+    "fields=title,event_date,status": "title,event_date,status",
+}
+
+
+def synthetic_events(rows: int) -> List[Event]:
+    creator = User(id=uuid.uuid4(), full_name="Event Organiser")
+    now = datetime.now(timezone.utc)
+    form_schema = {
+        f"question_{i}": {"type": "text", "label": f"Question {i} " + "x" * 60, "required": i % 2 == 0,
+                          "options": [f"option {j}" for j in range(5)]}
+        for i in range(15)
+    }
+    events = []
+    for i in range(rows):
+        events.append(Event(
+            id=uuid.uuid4(), title=f"Event {i}", description="Lorem ipsum dolor sit amet. " * 30,
+            event_date=now + timedelta(days=i), registration_deadline=now + timedelta(days=i - 1),
+            is_paid=i % 3 == 0, price=Decimal("499.00"), max_participants=200, current_participants=i,
+            waitlist_count=0, status="published", registration_open=True, created_by=creator.id,
+            creator=creator, form_schema=form_schema, created_at=now, updated_at=now,
+        ))
+    return events
+
+
+def bench_in_process(rows: int, repeat: int) -> None:
+    events = synthetic_events(rows)
+    full_adapter = TypeAdapter(List[EventResponse])
+    partial_adapter = TypeAdapter(List[EventPartialResponse])
+
+    for label, fields in VARIANTS.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if fields is None:
+                items = [EventResponse(**{**e.__dict__, "creator_name": e.creator.full_name}) for e in events]
+                body = full_adapter.dump_json(items)
+            else:
+                selected = event_projection.select(fields, EVENT_LIST_FIELDS)
+                items = [event_projection.item(e, selected) for e in events]
+                body = partial_adapter.dump_json(items, exclude_unset=True)
+            timings.append(time.perf_counter() - start)
+        print(f"{label:40s} {len(body) / 1024:8.1f} KiB  "
+              f"p50 {statistics.median(timings) * 1000:6.2f} ms  "
+              f"p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:6.2f} ms")
+
+
+def bench_http(url: str, token: str, repeat: int) -> None:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    for label, fields in VARIANTS.items():
+        if fields is None:
+            continue
+        target = f"{url}{'&' if '?' in url else '?'}fields={fields}" if fields else url
+        timings, size = [], 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with urllib.request.urlopen(urllib.request.Request(target, headers=headers)) as response:
+                size = len(response.read())
+            timings.append(time.perf_counter() - start)
+        print(f"{label:40s} {size / 1024:8.1f} KiB  "
+              f"p50 {statistics.median(timings) * 1000:6.2f} ms  "
+              f"p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:6.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--url", help="list endpoint of a running server")
+    parser.add_argument("--token", default="")
+    args = parser.parse_args()
+
+    if args.url:
+        bench_http(args.url, args.token, args.repeat)
+    else:
+        bench_in_process(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
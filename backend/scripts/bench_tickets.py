@@ -0,0 +1,56 @@
+"""
+Micro-benchmark of ticket signing and verification
+
+Times ``TicketSigner.issue`` and ``TicketSigner.verify`` (what
+``POST /admin/events/{id}/checkins/batch`` runs per scan, and what a scanner
+runs offline), and the signature part of a full check-in batch.
+
+Usage (from backend/): python scripts/bench_tickets.py [--iterations 5000] [--batch 500]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.tickets import signer  # noqa: E402
+
+
+def median_call(func, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=5_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    registration_id, event_id = uuid.uuid4(), uuid.uuid4()
+    ticket = signer.issue(registration_id, event_id, 1)
+    assert signer.verify(ticket) == (registration_id, event_id, 1)
+
+    issue = median_call(lambda: signer.issue(registration_id, event_id, 1), args.iterations)
+    verify = median_call(lambda: signer.verify(ticket), args.iterations)
+    tickets = [signer.issue(uuid.uuid4(), event_id, 1) for _ in range(args.batch)]
+    start = time.perf_counter()
+    for t in tickets:
+        signer.verify(t)
+    batch = time.perf_counter() - start
+
+    print(f"ticket length        {len(ticket):8d} chars")
+    print(f"issue                {issue * 1e6:8.1f} us (median)")
+    print(f"verify               {verify * 1e6:8.1f} us (median)")
+    print(f"verify batch of {args.batch:<4d} {batch * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
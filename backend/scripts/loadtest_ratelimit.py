@@ -0,0 +1,112 @@
+"""
+Load test for the rate limiting middleware
+
+Drives RateLimitMiddleware in-process around a stand-in login handler that
+does a real bcrypt verify in the threadpool, with one abusive client hammering
+/auth/login while well-behaved clients log in at a normal pace. Prints the
+legitimate clients' latency with and without the limiter.
+
+Usage (from backend/): python scripts/loadtest_ratelimit.py [--abuse 2000] [--backend memory|sqlite]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passlib.context import CryptContext  # noqa: E402
+from starlette.concurrency import run_in_threadpool  # noqa: E402
+
+from app.core.ratelimit import BucketSpec, MemoryBackend, RateLimitMiddleware, SQLiteBackend  # noqa: E402
+
+LOGIN = "/api/v1/auth/login"
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+HASH = pwd_context.hash("password")
+
+
+async def login_app(scope, receive, send):
+    await run_in_threadpool(pwd_context.verify, "password", HASH)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def call(app, ip: str) -> int:
+    scope = {"type": "http", "method": "POST", "path": LOGIN, "headers": [], "client": (ip, 1234)}
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app(scope, receive, send)
+    return status["code"]
+
+
+async def abuser(app, total: int, concurrency: int, counts: dict):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            code = await call(app, "10.0.0.66")
+            counts[code] = counts.get(code, 0) + 1
+
+    await asyncio.gather(*(one() for _ in range(total)))
+
+
+async def legit(app, clients: int, per_client: int, latencies: list):
+    async def client(i: int):
+        for _ in range(per_client):
+            start = time.perf_counter()
+            await call(app, f"10.1.0.{i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.2)
+
+    await asyncio.gather(*(client(i) for i in range(clients)))
+
+
+async def scenario(app, args, abuse: bool = True) -> tuple:
+    counts: dict = {}
+    latencies: list = []
+    await asyncio.gather(
+        abuser(app, args.abuse if abuse else 0, args.concurrency, counts),
+        legit(app, args.clients, args.per_client, latencies),
+    )
+    return counts, latencies
+
+
+def report(name: str, counts: dict, latencies: list):
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:>16}: legit p50={statistics.median(latencies):7.1f} ms  p95={p95:7.1f} ms  "
+          f"abuser responses={dict(sorted(counts.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--abuse", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=5)
+    parser.add_argument("--per-client", type=int, default=5)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    args = parser.parse_args()
+
+    rules = {f"POST {LOGIN}": {"ip": BucketSpec.parse("10/60")}}
+    if args.backend == "sqlite":
+        backend = SQLiteBackend(os.path.join(tempfile.mkdtemp(), "ratelimit.db"))
+    else:
+        backend = MemoryBackend()
+
+    report("no abuse", *asyncio.run(scenario(login_app, args, abuse=False)))
+    report("no limiter", *asyncio.run(scenario(login_app, args)))
+    report(f"limiter/{args.backend}", *asyncio.run(scenario(RateLimitMiddleware(login_app, rules, backend), args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""
+Hot queries keep using their indexes (same check as ``python -m app.cli explain-check``)
+
+Needs a migrated PostgreSQL database in DATABASE_URL; the seed rows are rolled back.
+"""
+import os
+
+import pytest
+
+if not os.environ.get("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from app.core.database import engine
+from app.services import query_plans
+
+
+@pytest.fixture(scope="module")
+def plan_problems():
+    with engine.connect() as conn:
+        return query_plans.check(conn, seed_scale=int(os.environ.get("PLAN_CHECK_SCALE", "1000")))
+
+
+@pytest.mark.parametrize("query", query_plans.HOT_QUERIES, ids=lambda q: q.name)
+def test_hot_query_uses_indexes(plan_problems, query):
+    assert plan_problems[query.name] == []
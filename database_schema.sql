@@ -18,11 +18,16 @@ CREATE TABLE users (
     role VARCHAR(20) NOT NULL CHECK (role IN ('client', 'admin', 'developer')),
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    change_xid BIGINT NOT NULL, -- Analytics export position, stamped by stamp_change()
+    change_seq BIGINT NOT NULL
 );
 
 CREATE INDEX idx_users_email ON users(email);
-CREATE INDEX idx_users_role ON users(role);
+CREATE INDEX idx_users_role_created_at ON users(role, created_at DESC);
+CREATE INDEX idx_users_created_at ON users(created_at DESC);
+-- Incremental analytics export
+CREATE INDEX idx_users_change ON users(change_xid, change_seq);
 
 -- ============================================
 -- EVENTS
@@ -38,16 +43,30 @@ CREATE TABLE events (
     price DECIMAL(10, 2) DEFAULT 0.00,
     max_participants INTEGER,
     current_participants INTEGER DEFAULT 0,
+    waitlist_count INTEGER DEFAULT 0,
     status VARCHAR(20) DEFAULT 'draft' CHECK (status IN ('draft', 'published', 'cancelled', 'completed')),
+    registration_open BOOLEAN DEFAULT TRUE, -- Closed by the lifecycle job after registration_deadline
     created_by UUID NOT NULL REFERENCES users(id) ON DELETE RESTRICT,
     form_schema JSONB, -- Dynamic form schema stored as JSON
+    live_version INTEGER NOT NULL DEFAULT 1, -- Bumped on capacity/status changes; orders the live stream
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    change_xid BIGINT NOT NULL, -- Delta-sync position, stamped by stamp_change()
+    change_seq BIGINT NOT NULL
 );
 
-CREATE INDEX idx_events_created_by ON events(created_by);
-CREATE INDEX idx_events_status ON events(status);
+CREATE INDEX idx_events_status_date ON events(status, event_date DESC);
+CREATE INDEX idx_events_created_by_created_at ON events(created_by, created_at DESC);
+CREATE INDEX idx_events_created_at ON events(created_at DESC);
 CREATE INDEX idx_events_event_date ON events(event_date);
+-- Delta-sync cursor (GET /events/changes)
+CREATE INDEX idx_events_change ON events(change_xid, change_seq);
+-- Clients' delta-sync feed only pages through published events
+CREATE INDEX idx_events_published_change ON events(change_xid, change_seq) WHERE status = 'published';
+-- Hot public listing; past events drop out once the lifecycle job completes them
+CREATE INDEX idx_events_published_date ON events(event_date DESC) WHERE status = 'published';
+-- Events whose registration still has to be closed by the lifecycle job
+CREATE INDEX idx_events_open_deadline ON events(registration_deadline) WHERE status = 'published' AND registration_open;
 
 -- ============================================
 -- REGISTRATIONS
@@ -57,20 +76,32 @@ CREATE TABLE registrations (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     event_id UUID NOT NULL REFERENCES events(id) ON DELETE CASCADE,
     user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-    status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'accepted', 'rejected')),
+    status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'accepted', 'rejected', 'waitlisted', 'cancelled')),
     form_data JSONB NOT NULL, -- User's form submission data
     payment_status VARCHAR(20) DEFAULT 'not_required' CHECK (payment_status IN ('not_required', 'pending', 'completed', 'failed', 'refunded')),
     payment_order_id VARCHAR(255), -- Razorpay order ID
     payment_id VARCHAR(255), -- Razorpay payment ID
+    waitlist_position BIGINT, -- Queue order while waitlisted (from registration_waitlist_seq)
+    ticket_version INTEGER NOT NULL DEFAULT 1, -- Bumped on status/payment_status changes; signed into tickets
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    change_xid BIGINT NOT NULL, -- Delta-sync position, stamped by stamp_change()
+    change_seq BIGINT NOT NULL,
     UNIQUE(event_id, user_id) -- One registration per user per event
 );
 
-CREATE INDEX idx_registrations_event_id ON registrations(event_id);
-CREATE INDEX idx_registrations_user_id ON registrations(user_id);
+CREATE INDEX idx_registrations_user_created_at ON registrations(user_id, created_at DESC);
+CREATE INDEX idx_registrations_event_created_at ON registrations(event_id, created_at DESC);
+CREATE INDEX idx_registrations_created_at ON registrations(created_at DESC);
+-- Per-user delta-sync cursor (GET /registrations/my-registrations/changes)
+CREATE INDEX idx_registrations_user_change ON registrations(user_id, change_xid, change_seq);
+-- Incremental analytics export
+CREATE INDEX idx_registrations_change ON registrations(change_xid, change_seq);
 CREATE INDEX idx_registrations_status ON registrations(status);
 CREATE INDEX idx_registrations_payment_status ON registrations(payment_status);
+CREATE INDEX idx_registrations_waitlist ON registrations(event_id, waitlist_position) WHERE status = 'waitlisted';
+
+CREATE SEQUENCE registration_waitlist_seq;
 
 -- ============================================
 -- PAYMENTS
@@ -85,16 +116,22 @@ CREATE TABLE payments (
     amount DECIMAL(10, 2) NOT NULL,
     currency VARCHAR(3) DEFAULT 'INR',
     status VARCHAR(20) NOT NULL CHECK (status IN ('created', 'paid', 'failed', 'refunded')),
+    status_version INTEGER NOT NULL DEFAULT 1, -- Bumped on status changes; orders payment_status notifications
     webhook_received BOOLEAN DEFAULT FALSE,
     webhook_verified BOOLEAN DEFAULT FALSE,
     metadata JSONB,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    change_xid BIGINT NOT NULL, -- Analytics export position, stamped by stamp_change()
+    change_seq BIGINT NOT NULL
 );
 
-CREATE INDEX idx_payments_registration_id ON payments(registration_id);
+CREATE INDEX idx_payments_registration_created_at ON payments(registration_id, created_at DESC);
+CREATE INDEX idx_payments_created_at ON payments(created_at DESC);
 CREATE INDEX idx_payments_razorpay_order_id ON payments(razorpay_order_id);
 CREATE INDEX idx_payments_status ON payments(status);
+-- Incremental analytics export
+CREATE INDEX idx_payments_change ON payments(change_xid, change_seq);
 
 -- ============================================
 -- AUDIT LOGS (Admin Actions)
@@ -109,13 +146,136 @@ CREATE TABLE audit_logs (
     details JSONB, -- Additional context
     ip_address VARCHAR(45),
     user_agent TEXT,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    change_xid BIGINT NOT NULL, -- Analytics export position, stamped by stamp_change()
+    change_seq BIGINT NOT NULL
 );
 
-CREATE INDEX idx_audit_logs_admin_id ON audit_logs(admin_id);
-CREATE INDEX idx_audit_logs_action_type ON audit_logs(action_type);
+CREATE INDEX idx_audit_logs_admin_created_at ON audit_logs(admin_id, created_at DESC);
+CREATE INDEX idx_audit_logs_action_created_at ON audit_logs(action_type, created_at DESC);
 CREATE INDEX idx_audit_logs_created_at ON audit_logs(created_at);
-CREATE INDEX idx_audit_logs_target ON audit_logs(target_type, target_id);
+-- Per-target timeline; id is included so paging is an index-only scan
+CREATE INDEX idx_audit_logs_target_created_at ON audit_logs(target_type, target_id, created_at DESC) INCLUDE (id);
+-- details @> '{...}' filters
+CREATE INDEX idx_audit_logs_details ON audit_logs USING gin (details jsonb_path_ops);
+-- Incremental analytics export
+CREATE INDEX idx_audit_logs_change ON audit_logs(change_xid, change_seq);
+
+-- ============================================
+-- IDEMPOTENCY KEYS (Retried POSTs)
+-- ============================================
+
+CREATE TABLE idempotency_keys (
+    user_id UUID NOT NULL,
+    route VARCHAR(100) NOT NULL, -- e.g. 'POST /registrations'
+    key VARCHAR(255) NOT NULL, -- Client-supplied Idempotency-Key header
+    request_hash VARCHAR(64) NOT NULL, -- sha256 of the canonical request body
+    status VARCHAR(20) NOT NULL CHECK (status IN ('in_progress', 'completed')),
+    response_status INTEGER,
+    response_body JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (user_id, route, key)
+);
+
+CREATE INDEX idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
+
+-- ============================================
+-- SCHEDULED JOBS (Last run per background job, shared by all workers)
+-- ============================================
+
+CREATE TABLE scheduled_jobs (
+    name VARCHAR(100) PRIMARY KEY,
+    last_run_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- ============================================
+-- USER SESSIONS (Rotating refresh tokens)
+-- ============================================
+
+CREATE TABLE user_sessions (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    token_hash VARCHAR(64) NOT NULL, -- sha256 of the current refresh secret
+    previous_token_hash VARCHAR(64), -- Rotated-out secret, for reuse detection
+    user_agent VARCHAR,
+    ip_address VARCHAR(45),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    rotated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE,
+    revoked_reason VARCHAR(50) -- 'logout', 'revoked', 'reuse_detected', 'user_inactive'
+);
+
+CREATE INDEX idx_user_sessions_user_created_at ON user_sessions(user_id, created_at DESC);
+CREATE INDEX idx_user_sessions_expires_at ON user_sessions(expires_at);
+
+-- ============================================
+-- USER IMPORTS (Bulk CSV onboarding)
+-- ============================================
+
+CREATE TABLE user_imports (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    created_by UUID NOT NULL REFERENCES users(id) ON DELETE RESTRICT,
+    filename VARCHAR(255),
+    status VARCHAR(20) NOT NULL CHECK (status IN ('running', 'completed', 'failed')),
+    rows_processed INTEGER NOT NULL DEFAULT 0, -- Data rows committed; a resume skips these
+    created_count INTEGER NOT NULL DEFAULT 0,
+    skipped_count INTEGER NOT NULL DEFAULT 0, -- Email already registered
+    error_count INTEGER NOT NULL DEFAULT 0,
+    errors JSONB NOT NULL DEFAULT '[]', -- [{"row", "email", "error"}], capped
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================
+-- TOMBSTONES (Deletions for delta-sync feeds)
+-- ============================================
+
+CREATE TABLE tombstones (
+    table_name VARCHAR(50) NOT NULL, -- 'events', 'registrations', 'published_events'
+    row_id UUID NOT NULL,
+    owner_id UUID, -- registrations: user_id, for per-user feeds
+    deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    change_xid BIGINT NOT NULL, -- Same position as the live rows, stamped by stamp_change()
+    change_seq BIGINT NOT NULL,
+    PRIMARY KEY (table_name, row_id)
+);
+
+CREATE INDEX idx_tombstones_table_change ON tombstones(table_name, change_xid, change_seq);
+CREATE INDEX idx_tombstones_owner_change ON tombstones(table_name, owner_id, change_xid, change_seq);
+
+-- Orders writes within a transaction for the delta-sync feeds
+CREATE SEQUENCE change_feed_seq;
+
+-- ============================================
+-- CHECK-INS
+-- ============================================
+
+CREATE TABLE checkins (
+    registration_id UUID PRIMARY KEY REFERENCES registrations(id) ON DELETE CASCADE, -- one check-in per ticket
+    event_id UUID NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    ticket_version INTEGER NOT NULL,
+    gate VARCHAR(50),
+    scanned_by UUID REFERENCES users(id) ON DELETE SET NULL,
+    scanned_at TIMESTAMP WITH TIME ZONE NOT NULL, -- scanner's clock
+    synced_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_checkins_event_scanned_at ON checkins(event_id, scanned_at);
+
+-- ============================================
+-- SCHEMA VERSION
+-- ============================================
+
+-- Populated by `python -m app.cli migrate`; workers compare the latest
+-- fingerprint with the application models at boot.
+CREATE TABLE schema_version (
+    version INTEGER PRIMARY KEY,
+    fingerprint VARCHAR(64) NOT NULL,
+    description VARCHAR(255),
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
 
 -- ============================================
 -- FUNCTIONS & TRIGGERS
@@ -142,6 +302,198 @@ CREATE TRIGGER update_registrations_updated_at BEFORE UPDATE ON registrations
 CREATE TRIGGER update_payments_updated_at BEFORE UPDATE ON payments
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Version capacity/status changes in commit order (row lock serialises them)
+CREATE OR REPLACE FUNCTION bump_live_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.live_version = OLD.live_version + 1;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER bump_events_live_version BEFORE UPDATE ON events
+    FOR EACH ROW
+    WHEN (OLD.current_participants IS DISTINCT FROM NEW.current_participants
+          OR OLD.max_participants IS DISTINCT FROM NEW.max_participants
+          OR OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION bump_live_version();
+
+-- Publish capacity/status changes for the live seat-availability stream
+CREATE OR REPLACE FUNCTION notify_event_capacity()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('event_capacity', json_build_object(
+        'id', NEW.id,
+        'status', NEW.status,
+        'current_participants', NEW.current_participants,
+        'max_participants', NEW.max_participants,
+        'version', NEW.live_version
+    )::text);
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER notify_events_capacity AFTER UPDATE ON events
+    FOR EACH ROW
+    WHEN (OLD.current_participants IS DISTINCT FROM NEW.current_participants
+          OR OLD.max_participants IS DISTINCT FROM NEW.max_participants
+          OR OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION notify_event_capacity();
+
+-- Invalidate previously issued tickets when a registration's status changes
+CREATE OR REPLACE FUNCTION bump_ticket_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.ticket_version = OLD.ticket_version + 1;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER bump_registrations_ticket_version BEFORE UPDATE ON registrations
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.payment_status IS DISTINCT FROM NEW.payment_status)
+    EXECUTE FUNCTION bump_ticket_version();
+
+-- Version payment status changes in commit order (row lock serialises them)
+CREATE OR REPLACE FUNCTION bump_status_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.status_version = OLD.status_version + 1;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER bump_payments_status_version BEFORE UPDATE ON payments
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION bump_status_version();
+
+-- Wake long-polls waiting on a payment (GET /payments/{order_id}/await)
+CREATE OR REPLACE FUNCTION notify_payment_status()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('payment_status', json_build_object(
+        'order_id', NEW.razorpay_order_id,
+        'status', NEW.status,
+        'version', NEW.status_version
+    )::text);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER notify_payments_status AFTER UPDATE ON payments
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION notify_payment_status();
+
+-- Tell every worker to drop cached users/events after a change
+CREATE OR REPLACE FUNCTION notify_cache_invalidate()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('cache_invalidate', json_build_object(
+        'table', TG_TABLE_NAME,
+        'id', OLD.id
+    )::text);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER cache_invalidate_users AFTER UPDATE OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidate();
+
+CREATE TRIGGER cache_invalidate_events AFTER UPDATE OR DELETE ON events
+    FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidate();
+
+-- Record deletions (including cascades) for the delta-sync feeds;
+-- TG_ARGV[0] names the owner column
+CREATE OR REPLACE FUNCTION record_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO tombstones (table_name, row_id, owner_id, deleted_at)
+    VALUES (
+        TG_TABLE_NAME,
+        OLD.id,
+        CASE WHEN TG_NARGS > 0 THEN (to_jsonb(OLD) ->> TG_ARGV[0])::uuid END,
+        CURRENT_TIMESTAMP
+    )
+    ON CONFLICT (table_name, row_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER tombstone_events AFTER DELETE ON events
+    FOR EACH ROW EXECUTE FUNCTION record_tombstone();
+
+CREATE TRIGGER tombstone_registrations AFTER DELETE ON registrations
+    FOR EACH ROW EXECUTE FUNCTION record_tombstone('user_id');
+
+-- Clients' event feed hides unpublished events, so leaving "published" is their deletion
+CREATE OR REPLACE FUNCTION record_unpublished_event()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO tombstones (table_name, row_id, owner_id, deleted_at)
+    VALUES ('published_events', OLD.id, NULL, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name, row_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER tombstone_events_unpublished AFTER UPDATE ON events
+    FOR EACH ROW
+    WHEN (OLD.status = 'published' AND NEW.status IS DISTINCT FROM 'published')
+    EXECUTE FUNCTION record_unpublished_event();
+
+CREATE TRIGGER tombstone_events_published_deleted AFTER DELETE ON events
+    FOR EACH ROW
+    WHEN (OLD.status = 'published')
+    EXECUTE FUNCTION record_unpublished_event();
+
+-- A republished event is a change again, not a deletion
+CREATE OR REPLACE FUNCTION clear_unpublished_event()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM tombstones WHERE table_name = 'published_events' AND row_id = NEW.id;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER untombstone_events_republished AFTER UPDATE ON events
+    FOR EACH ROW
+    WHEN (NEW.status = 'published' AND OLD.status IS DISTINCT FROM 'published')
+    EXECUTE FUNCTION clear_unpublished_event();
+
+-- Delta-sync position: feeds page in (transaction id, sequence) order and only
+-- hand out writes older than the oldest running transaction, so a late commit
+-- can't land behind a client's cursor
+CREATE OR REPLACE FUNCTION stamp_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.change_xid = pg_current_xact_id()::text::bigint;
+    NEW.change_seq = nextval('change_feed_seq');
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER stamp_events_change BEFORE INSERT OR UPDATE ON events
+    FOR EACH ROW EXECUTE FUNCTION stamp_change();
+
+CREATE TRIGGER stamp_registrations_change BEFORE INSERT OR UPDATE ON registrations
+    FOR EACH ROW EXECUTE FUNCTION stamp_change();
+
+CREATE TRIGGER stamp_tombstones_change BEFORE INSERT OR UPDATE ON tombstones
+    FOR EACH ROW EXECUTE FUNCTION stamp_change();
+
+-- The analytics export pages the remaining tables the same way
+CREATE TRIGGER stamp_users_change BEFORE INSERT OR UPDATE ON users
+    FOR EACH ROW EXECUTE FUNCTION stamp_change();
+
+CREATE TRIGGER stamp_payments_change BEFORE INSERT OR UPDATE ON payments
+    FOR EACH ROW EXECUTE FUNCTION stamp_change();
+
+CREATE TRIGGER stamp_audit_logs_change BEFORE INSERT OR UPDATE ON audit_logs
+    FOR EACH ROW EXECUTE FUNCTION stamp_change();
+
 -- ============================================
 -- INITIAL DATA (Optional)
 -- ============================================
@@ -28,14 +28,75 @@ api.interceptors.request.use(
   }
 )
 
+// Shared by concurrent 401s so one refresh token is only rotated once
+let refreshPromise: Promise<string | null> | null = null
+
+// Another tab rotated the refresh token first (409 inside the grace window);
+// its new tokens land in the shared localStorage, possibly a moment later
+function rotatedAccessToken(previousRefreshToken: string, timeoutMs = 2000): Promise<string | null> {
+  const current = () =>
+    localStorage.getItem('refresh_token') !== previousRefreshToken
+      ? localStorage.getItem('access_token')
+      : null
+  const token = current()
+  if (token) return Promise.resolve(token)
+  return new Promise((resolve) => {
+    const onStorage = (event: StorageEvent) => {
+      if (event.key !== 'refresh_token') return
+      const rotated = current()
+      if (rotated) done(rotated)
+    }
+    const timer = window.setTimeout(() => done(current()), timeoutMs)
+    const done = (value: string | null) => {
+      window.clearTimeout(timer)
+      window.removeEventListener('storage', onStorage)
+      resolve(value)
+    }
+    window.addEventListener('storage', onStorage)
+  })
+}
+
+function refreshAccessToken(): Promise<string | null> {
+  const refreshToken = localStorage.getItem('refresh_token')
+  if (!refreshToken) return Promise.resolve(null)
+  if (!refreshPromise) {
+    refreshPromise = axios
+      .post(`${API_URL}/api/v1/auth/refresh`, { refresh_token: refreshToken })
+      .then((response) => {
+        localStorage.setItem('access_token', response.data.access_token)
+        localStorage.setItem('refresh_token', response.data.refresh_token)
+        localStorage.setItem('user', JSON.stringify(response.data.user))
+        return response.data.access_token as string
+      })
+      .catch((error) =>
+        error.response?.status === 409 ? rotatedAccessToken(refreshToken) : null
+      )
+      .finally(() => {
+        refreshPromise = null
+      })
+  }
+  return refreshPromise
+}
+
 // Response interceptor for error handling
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const config = error.config
     // Only redirect to login for 401 errors on protected routes
     // Public routes (like /events/public) should not trigger redirect
-    if (error.response?.status === 401 && !error.config?.url?.includes('/public')) {
+    if (error.response?.status === 401 && !config?.url?.includes('/public')) {
+      // Try once to get a new access token without asking for the password again
+      if (config && !config._retried && !config.url?.includes('/auth/')) {
+        config._retried = true
+        const accessToken = await refreshAccessToken()
+        if (accessToken) {
+          config.headers.Authorization = `Bearer ${accessToken}`
+          return api(config)
+        }
+      }
       localStorage.removeItem('access_token')
+      localStorage.removeItem('refresh_token')
       localStorage.removeItem('user')
       // Only redirect if not already on home page
       if (window.location.pathname !== '/') {
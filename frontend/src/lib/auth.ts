@@ -15,6 +15,8 @@ export interface User {
 export interface LoginResponse {
   access_token: string
   token_type: string
+  expires_in?: number
+  refresh_token?: string
   user: User
 }
 
@@ -34,6 +36,9 @@ export const authService = {
       localStorage.setItem('access_token', response.data.access_token)
       localStorage.setItem('user', JSON.stringify(response.data.user))
     }
+    if (response.data.refresh_token) {
+      localStorage.setItem('refresh_token', response.data.refresh_token)
+    }
     
     return response.data
   },
@@ -54,7 +59,13 @@ export const authService = {
   },
 
   logout(): void {
+    const refreshToken = localStorage.getItem('refresh_token')
+    if (refreshToken) {
+      // End the server-side session; local state is cleared regardless
+      api.post('/auth/logout', { refresh_token: refreshToken }).catch(() => undefined)
+    }
     localStorage.removeItem('access_token')
+    localStorage.removeItem('refresh_token')
     localStorage.removeItem('user')
   },
 